@@ -52,6 +52,10 @@ async function connectToMongoDB() {
         logs = db.collection("logs");
         console.log("✅ Using database: Terrahacks2025, collection: logs");
         
+        // Same indexes as db/check.py: per-event stats and time-range queries
+        await logs.createIndex({ event: 1, time: -1 }, { name: "event_1_time_-1" });
+        await logs.createIndex({ time: -1 }, { name: "time_-1" });
+        
     } catch (error) {
         console.error("❌ MongoDB connection failed:", error);
         console.error("❌ URI used:", uri);
@@ -121,13 +125,18 @@ app.get('/api/event-stats', async (req, res) => {
         const startTime = new Date();
         startTime.setDate(startTime.getDate() - days);
         
-        // Find all occurrences of the specific event
-        const events = await logs.find({
-            event: eventName,
-            time: { $gte: startTime }
-        }).sort({ time: -1 }).toArray();
-        
-        if (events.length === 0) {
+        // Count, first and last time computed on the server from the {event, time} index
+        const [stats] = await logs.aggregate([
+            { $match: { event: eventName, time: { $gte: startTime } } },
+            { $group: {
+                _id: null,
+                count: { $sum: 1 },
+                first_occurrence: { $min: "$time" },
+                last_occurrence: { $max: "$time" }
+            } }
+        ]).toArray();
+        
+        if (!stats) {
             return res.json({
                 event: eventName,
                 count: 0,
@@ -137,9 +146,9 @@ app.get('/api/event-stats', async (req, res) => {
             });
         }
         
-        const count = events.length;
-        const firstOccurrence = events[events.length - 1].time;
-        const lastOccurrence = events[0].time;
+        const count = stats.count;
+        const firstOccurrence = stats.first_occurrence;
+        const lastOccurrence = stats.last_occurrence;
         const averagePerDay = count / days;
         
         res.json({
@@ -0,0 +1,223 @@
+import threading
+import time
+from collections import deque
+
+DUPLICATE_KEY = 11000
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+def only_duplicates(error) -> bool:
+    """True when a BulkWriteError only rejected documents that are already stored"""
+    details = getattr(error, 'details', None)  # a list on AutoReconnect, a dict on BulkWriteError
+    write_errors = details.get('writeErrors', []) if isinstance(details, dict) else []
+    return bool(write_errors) and all(e.get('code') == DUPLICATE_KEY for e in write_errors)
+
+
+def notify_inserted(callback, documents):
+    """Run an ``on_insert`` hook; its failure must not fail a write that already succeeded"""
+    if callback is None or not documents:
+        return
+    try:
+        callback(documents)
+    except Exception as e:
+        print(f"⚠ MongoDB: on_insert hook failed for {len(documents)} events - {e}")
+
+
+class BatchLogger:
+    """Write-behind buffer in front of ``insert_many``.
+
+    ``log()`` appends a document and returns; a background thread writes
+    the buffer in batches of up to ``batch_size`` as soon as that many are
+    waiting, or ``flush_interval`` seconds after the oldest one arrived.
+
+    The buffer holds at most ``max_buffer`` documents.  When it is full,
+    ``overflow`` decides: ``drop_oldest`` (default) discards the oldest
+    document, ``drop_newest`` refuses the new one and ``block`` waits up
+    to ``block_timeout`` seconds for room, then refuses it.
+
+    A failed batch goes back to the front of the buffer and is retried
+    after ``retry_interval`` seconds (``flush()`` and ``close()`` retry at
+    once).  Documents keep the ``_id`` pymongo gave them on the first
+    attempt, so a retry of a partly written batch never stores anything
+    twice.  With a ``spool`` (``db/spool.py``) a failed batch is journaled
+    to disk instead, and while the spool has a backlog new batches queue
+    behind it, so MongoDB receives events in order.
+
+    ``on_insert`` is called once per document, with the batch whose write
+    finally went through, e.g. to update rollup counters.  A document
+    rejected as a duplicate was stored by an earlier attempt that failed
+    before ``on_insert`` ran, so it is passed on like the others.
+    """
+
+    def __init__(self, collection, batch_size=100, flush_interval=1.0, max_buffer=10000,
+                 overflow='drop_oldest', block_timeout=1.0, retry_interval=5.0, spool=None, replayer=None,
+                 on_insert=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self.collection = collection  # callable: the client is only created on the first write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.retry_interval = retry_interval
+        self.spool = spool
+        self.replayer = replayer  # woken when a batch is spooled
+        self.on_insert = on_insert
+
+        self.buffer = deque()  # (arrival time, document)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.closing = False
+        self.flush_requested = False
+        self.retry_at = 0.0
+
+        self.logged = 0
+        self.inserted = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+        self.spooled = 0
+        self.last_error = None
+
+        self.thread = threading.Thread(target=self.run, name="mongo-batch-logger", daemon=True)
+        self.thread.start()
+
+    def log(self, document) -> bool:
+        """Queue one document; False when the overflow policy refused it"""
+        with self.condition:
+            if self.closing:
+                self.dropped += 1
+                return False
+            if len(self.buffer) >= self.max_buffer:
+                if self.overflow == 'drop_oldest':
+                    self.buffer.popleft()
+                    self.dropped += 1
+                elif self.overflow == 'block':
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self.buffer) >= self.max_buffer and not self.closing:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not self.condition.wait(remaining):
+                            break
+                if len(self.buffer) >= self.max_buffer or self.closing:
+                    self.dropped += 1
+                    return False
+            self.buffer.append((time.monotonic(), document))
+            self.logged += 1
+            if len(self.buffer) in (1, self.batch_size):  # start the flush timer, or flush by size
+                self.condition.notify_all()
+        return True
+
+    def due(self) -> bool:
+        if not self.buffer:
+            return False
+        now = time.monotonic()
+        if now < self.retry_at:
+            return False
+        if self.closing or self.flush_requested:
+            return True
+        return len(self.buffer) >= self.batch_size or now - self.buffer[0][0] >= self.flush_interval
+
+    def wait_time(self) -> float:
+        """Seconds until the buffer is due by time (None: nothing buffered)"""
+        if not self.buffer:
+            return None
+        now = time.monotonic()
+        return max(0.0, self.retry_at - now, self.buffer[0][0] + self.flush_interval - now)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.due():
+                    if self.closing and not self.buffer:
+                        return
+                    self.condition.wait(self.wait_time())
+                batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+                self.in_flight = len(batch)
+            documents = [document for _, document in batch]
+            if self.spool is not None and self.spool.pending:
+                error = self.write_spool(documents)  # keep order behind the backlog
+            else:
+                error = self.write(documents)
+                if error is not None and self.spool is not None:
+                    error = self.write_spool(documents)
+            with self.condition:
+                self.in_flight = 0
+                if error is None:
+                    self.inserted += len(batch)  # stored, or durably journaled
+                    self.batches += 1
+                else:
+                    self.failures += 1
+                    self.last_error = error
+                    # Back to the front, oldest first; anything past the cap is lost
+                    room = self.max_buffer - len(self.buffer)
+                    if room < len(batch):
+                        self.dropped += len(batch) - max(room, 0)
+                        batch = batch[len(batch) - max(room, 0):]
+                    self.buffer.extendleft(reversed(batch))
+                    self.retry_at = time.monotonic() + self.retry_interval
+                if not self.buffer:
+                    self.flush_requested = False
+                self.condition.notify_all()
+
+    def write(self, documents):
+        """``insert_many``; returns the error, or None when every document is stored"""
+        try:
+            self.collection().insert_many(documents, ordered=False)
+        except Exception as e:
+            if not only_duplicates(e):
+                if self.spool is None:
+                    print(f"⚠ MongoDB: batch of {len(documents)} not saved, will retry - {e}")
+                return e
+        # Duplicates went in on a failed attempt of this batch and were never counted
+        notify_inserted(self.on_insert, documents)
+        return None
+
+    def write_spool(self, documents):
+        """Journal a batch for the replayer; returns the error, or None once it is on disk"""
+        try:
+            self.spool.append(documents)
+        except Exception as e:
+            print(f"⚠ Spool: batch of {len(documents)} not journaled, will retry - {e}")
+            return e
+        self.spooled += len(documents)
+        if self.replayer is not None:
+            self.replayer.notify()
+        return None
+
+    def flush(self, timeout=10.0) -> bool:
+        """Write everything buffered now; True when the buffer emptied within ``timeout``"""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.flush_requested = True
+            self.retry_at = 0.0
+            self.condition.notify_all()
+            while self.buffer or self.in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0) -> int:
+        """Flush and stop; returns the number of documents not written within ``timeout``"""
+        with self.condition:
+            self.closing = True
+            self.retry_at = 0.0
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        with self.condition:
+            return len(self.buffer) + self.in_flight
+
+    def stats(self) -> dict:
+        return {
+            'logged': self.logged,
+            'inserted': self.inserted,
+            'batches': self.batches,
+            'avg_batch': self.inserted / self.batches if self.batches else 0.0,
+            'buffered': len(self.buffer),
+            'dropped': self.dropped,
+            'failures': self.failures,
+            'spooled': self.spooled,
+            'last_error': str(self.last_error) if self.last_error else None,
+        }
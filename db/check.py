@@ -1,25 +1,43 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 import dotenv
 import certifi
 import os
+import sys
 import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.insert import tls_options
+from db.rollups import ROLLUP_COLLECTION, bucket_query, bucket_start, ensure_rollup_indexes, next_bucket, summarize_range
+
 dotenv.load_dotenv()
 uri = os.getenv("MONGO_URI")
-client = MongoClient(uri, tlsCAFile=certifi.where())
+DB_NAME = os.getenv("MONGO_DB", "Terrahacks2025")
+client = MongoClient(uri, **tls_options(uri, certifi.where()))
 
-def check_logs(days=1):
-    db = client["Terrahacks2025"]
-    logs = db.logs
-    
-    # Calculate the start time (days ago from now)
-    start_time = datetime.datetime.now() - datetime.timedelta(days=days)
-    
-    # Find all events within the time range
-    pipeline = [
+# Every query below is served by one of these: per-event stats by the compound
+# index, time-range summaries and "most recent" by the time index
+LOG_INDEXES = [
+    ([("event", ASCENDING), ("time", DESCENDING)], "event_1_time_-1"),
+    ([("time", DESCENDING)], "time_-1"),
+]
+
+def ensure_indexes(logs=None):
+    """Create the log indexes if they are missing (a no-op when they exist)"""
+    logs = logs if logs is not None else client[DB_NAME].logs
+    return [logs.create_index(keys, name=name) for keys, name in LOG_INDEXES]
+
+def time_window(start_time, end_time=None):
+    """``start_time <= time`` and, when given, ``time <= end_time``"""
+    window = {"$gte": start_time}
+    if end_time is not None:
+        window["$lte"] = end_time
+    return window
+
+def summary_pipeline(start_time, end_time=None):
+    return [
         {
             "$match": {
-                "time": {"$gte": start_time}
+                "time": time_window(start_time, end_time)
             }
         },
         {
@@ -33,8 +51,108 @@ def check_logs(days=1):
             "$sort": {"count": -1}
         }
     ]
+
+def event_stats_pipeline(event_name, start_time, end_time=None):
+    return [
+        {
+            "$match": {
+                "event": event_name,
+                "time": time_window(start_time, end_time)
+            }
+        },
+        {
+            "$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "first_occurrence": {"$min": "$time"},
+                "last_occurrence": {"$max": "$time"}
+            }
+        }
+    ]
+
+_warned_uncovered = False
+
+def rollup_summary(db, start_time, end_time, event_name=None):
+    """
+    Count, first and last time of each event in ``[start_time, end_time]``, read from the rollups
+    Buckets hold whole minutes, so the seconds before the first whole minute and
+    after the last one are read from the raw logs and the result matches the raw
+    aggregation exactly. Returns None when the buckets do not reach back to the
+    oldest event they should hold (``db/rollups.py backfill`` has not been run),
+    so the caller can read the raw logs instead.
+    """
+    first_minute = bucket_start(start_time, "minute")
+    if first_minute < start_time:
+        first_minute = next_bucket(start_time, "minute")
+    end_minute = bucket_start(end_time, "minute")  # whole minutes stop here
     
-    results = list(logs.aggregate(pipeline))
+    summary = {}
+    raw_ranges = [{"$gte": start_time, "$lte": end_time}]
+    if first_minute < end_minute:
+        # summarize_range includes the minute its end falls in, so end on the last whole one
+        summary = summarize_range(db[ROLLUP_COLLECTION], first_minute, end_minute - datetime.timedelta(minutes=1),
+                                  event=event_name)
+        
+        # Coverage: the oldest event in the whole minutes must be in a bucket (one index lookup)
+        match = {"time": {"$gte": first_minute, "$lt": end_minute}}
+        if event_name is not None:
+            match["event"] = event_name
+        oldest = next(db.logs.find(match, {"time": 1}).sort("time", 1).limit(1), None)
+        if oldest is not None and (not summary or
+                                   oldest["time"] < min(data["first_occurrence"] for data in summary.values())):
+            global _warned_uncovered
+            if not _warned_uncovered:
+                print("⚠ Rollups do not cover these events yet (run python db/rollups.py backfill) - reading raw logs")
+                _warned_uncovered = True
+            return None
+        raw_ranges = [{"$gte": start_time, "$lt": first_minute}, {"$gte": end_minute, "$lte": end_time}]
+    
+    # The partial minutes at either end, from the same indexes as the raw queries
+    for time_range in raw_ranges:
+        match = {"time": time_range}
+        if event_name is not None:
+            match["event"] = event_name
+        partial = db.logs.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": "$event",
+                "count": {"$sum": 1},
+                "first_occurrence": {"$min": "$time"},
+                "last_occurrence": {"$max": "$time"}
+            }}
+        ])
+        for result in partial:
+            entry = summary.setdefault(result["_id"], {"count": 0, "first_occurrence": result["first_occurrence"],
+                                                       "last_occurrence": result["last_occurrence"]})
+            entry["count"] += result["count"]
+            entry["first_occurrence"] = min(entry["first_occurrence"], result["first_occurrence"])
+            entry["last_occurrence"] = max(entry["last_occurrence"], result["last_occurrence"])
+    return summary
+
+def check_logs(days=1, use_rollups=True, now=None):
+    """
+    Count and last time of each event within the specified days
+    Args:
+        days (int): Number of days to look back (default: 1)
+        use_rollups (bool): Read the minute/hour/day buckets instead of the raw logs
+            (the raw logs are read anyway until ``db/rollups.py backfill`` has been run)
+        now (datetime): End of the window, which starts days before it (default: the current time)
+    """
+    db = client[DB_NAME]
+    logs = db.logs
+    
+    # Calculate the start time (days ago from now)
+    now = now or datetime.datetime.now()
+    start_time = now - datetime.timedelta(days=days)
+    
+    buckets = rollup_summary(db, start_time, now) if use_rollups else None
+    if buckets is not None:
+        ranked = sorted(buckets.items(), key=lambda item: item[1]["count"], reverse=True)
+        return {event: {"count": data["count"], "last_occurrence": data["last_occurrence"]}
+                for event, data in ranked}
+    
+    # Count and latest time per event, computed on the server
+    results = list(logs.aggregate(summary_pipeline(start_time, now)))
     
     # Convert to a more readable format
     event_summary = {}
@@ -87,27 +205,31 @@ def print_daily_summary(days=1):
         print(f"   Last: {time_str}")
         print()
 
-def get_event_stats(event_name, days=1):
+def get_event_stats(event_name, days=1, use_rollups=True, now=None):
     """
     Get detailed statistics for a specific event
     Args:
         event_name (str): Name of the event to check
         days (int): Number of days to look back (default: 1)
+        use_rollups (bool): Read the bucket counters instead of the raw logs
+        now (datetime): End of the window, which starts days before it (default: the current time)
     Returns:
         dict: Statistics for the event
     """
-    db = client["Terrahacks2025"]
+    db = client[DB_NAME]
     logs = db.logs
     
-    start_time = datetime.datetime.now() - datetime.timedelta(days=days)
+    now = now or datetime.datetime.now()
+    start_time = now - datetime.timedelta(days=days)
     
-    # Find all occurrences of the specific event
-    events = list(logs.find({
-        "event": event_name,
-        "time": {"$gte": start_time}
-    }).sort("time", -1))
+    buckets = rollup_summary(db, start_time, now, event_name) if use_rollups else None
+    if buckets is not None:
+        results = [buckets[event_name]] if event_name in buckets else []
+    else:
+        # One $group on the server instead of pulling every matching document
+        results = list(logs.aggregate(event_stats_pipeline(event_name, start_time, now)))
     
-    if not events:
+    if not results:
         return {
             "event": event_name,
             "count": 0,
@@ -116,9 +238,9 @@ def get_event_stats(event_name, days=1):
             "average_per_day": 0
         }
     
-    count = len(events)
-    first_occurrence = events[-1]["time"]
-    last_occurrence = events[0]["time"]
+    count = results[0]["count"]
+    first_occurrence = results[0]["first_occurrence"]
+    last_occurrence = results[0]["last_occurrence"]
     average_per_day = count / days
     
     return {
@@ -137,12 +259,58 @@ def get_recent_events(limit=10):
     Returns:
         list: List of recent events
     """
-    db = client["Terrahacks2025"]
+    db = client[DB_NAME]
     logs = db.logs
     
     events = list(logs.find().sort("time", -1).limit(limit))
     return events
 
+def plan_summary(explain):
+    """Stage names and index names anywhere in the winning plan of an explain() result"""
+    stages, indexes = set(), set()
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("stage"), str):
+                stages.add(node["stage"])
+            if "indexName" in node:
+                indexes.add(node["indexName"])
+            for key, value in node.items():
+                if key not in ("rejectedPlans", "allPlansExecution"):
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+    walk(explain)
+    return stages, indexes
+
+def check_index_usage(event_name="fallen", days=30):
+    """
+    Explain the queries above and check each one is answered from its index
+    Returns:
+        dict: query name -> True if it uses the expected index and no collection scan
+    """
+    db = client[DB_NAME]
+    start_time = datetime.datetime.now() - datetime.timedelta(days=days)
+    
+    def explain_aggregate(pipeline):
+        return db.command("explain", {"aggregate": "logs", "pipeline": pipeline, "cursor": {}},
+                          verbosity="queryPlanner")
+    
+    checks = [
+        ("get_event_stats", "event_1_time_-1", explain_aggregate(event_stats_pipeline(event_name, start_time))),
+        ("check_logs", "time_-1", explain_aggregate(summary_pipeline(start_time))),
+        ("get_recent_events", "time_-1", db.logs.find().sort("time", -1).limit(10).explain()),
+        ("rollup summary", "bucket_key",
+         db[ROLLUP_COLLECTION].find(bucket_query(start_time, datetime.datetime.now())).explain()),
+    ]
+    usage = {}
+    for name, expected, explain in checks:
+        stages, indexes = plan_summary(explain)
+        usage[name] = expected in indexes and "COLLSCAN" not in stages
+        print(f"{'✓' if usage[name] else '❌'} {name}: index {', '.join(sorted(indexes)) or 'none'} "
+              f"(stages {', '.join(sorted(stages))})")
+    return usage
+
 def print_recent_events(limit=10):
     """
     Print the most recent events
@@ -182,6 +350,13 @@ if __name__ == "__main__":
     print("🔍 Alzheimer's Action Detection - Log Checker")
     print("=" * 60)
     
+    # Make sure the summaries below are index-backed
+    ensure_indexes()
+    ensure_rollup_indexes(client[DB_NAME][ROLLUP_COLLECTION])
+    check_index_usage()
+    
+    print("\n" + "=" * 60)
+    
     # Print daily summary
     print_daily_summary()
     
@@ -1,22 +1,108 @@
-from pymongo import MongoClient
+import atexit
+import threading
 import dotenv
  
-import certifi
 import os
 import datetime 
 
+from db.batch_logger import BatchLogger
+from db.spool import EventSpool, SpoolReplayer
+from db.rollups import ROLLUP_COLLECTION, apply_rollups, ensure_rollup_indexes
+
 dotenv.load_dotenv()
 uri = os.getenv("MONGO_URI")
-# Create a new client and connect to the server
-client = MongoClient(uri, tlsCAFile=certifi.where())
+DB_NAME = os.getenv("MONGO_DB", "Terrahacks2025")
+
+# The client is created on first use, not at import: building it resolves the
+# SRV record and loads TLS certificates, which used to delay camera startup
+_client = None
+_client_lock = threading.Lock()
+
+def tls_options(uri, ca_file):
+    """Atlas (SRV or tls=true) gets certifi's CA bundle; a plain local mongod takes no TLS options"""
+    lowered = (uri or "").lower()
+    if lowered.startswith("mongodb+srv://") or "tls=true" in lowered or "ssl=true" in lowered:
+        return {"tlsCAFile": ca_file}
+    return {}
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from pymongo import MongoClient
+            import certifi
+            # Fail over to the spool after a few seconds instead of pymongo's default 30
+            _client = MongoClient(uri, serverSelectionTimeoutMS=int(os.getenv("MONGO_TIMEOUT_MS", "5000")),
+                                  **tls_options(uri, certifi.where()))
+        return _client
+
+def connect():
+    """Create the client, open a connection and make sure the log indexes exist ahead of the first insert"""
+    get_client().admin.command("ping")
+    from db.check import ensure_indexes
+    ensure_indexes(_collection())
+    ensure_rollup_indexes(get_client()[DB_NAME][ROLLUP_COLLECTION])
+
+def _collection():
+    if not uri:
+        raise RuntimeError("MONGO_URI is not set")
+    return get_client()[DB_NAME].logs
+
+def _update_rollups(documents):
+    """Count stored events into the minute/hour/day buckets the summaries read"""
+    apply_rollups(get_client()[DB_NAME][ROLLUP_COLLECTION], documents)
 
-def insert_logs(event):
-    db = client["Terrahacks2025"]
-    logs = db.logs
+# Events MongoDB could not take wait on disk here ("" turns the spool off)
+SPOOL_DIR = os.getenv("MONGO_SPOOL_DIR", os.path.join(os.path.expanduser("~"), ".terrahacks2025", "spool"))
+
+_logger = None
+_replayer = None
+_logger_lock = threading.Lock()
+
+def get_logger():
+    """The process-wide write-behind logger, flushed at exit"""
+    global _logger, _replayer
+    with _logger_lock:
+        if _logger is None:
+            spool = None
+            if SPOOL_DIR:
+                spool = EventSpool(SPOOL_DIR, max_bytes=int(os.getenv("MONGO_SPOOL_MAX_MB", "64")) * 1024 * 1024)
+                _replayer = SpoolReplayer(spool, _collection, on_insert=_update_rollups)
+                if spool.pending:
+                    print(f"📈 Spool: {spool.pending} events from an earlier run waiting for MongoDB")
+            _logger = BatchLogger(_collection,
+                                  batch_size=int(os.getenv("MONGO_BATCH_SIZE", "100")),
+                                  flush_interval=float(os.getenv("MONGO_FLUSH_INTERVAL", "1.0")),
+                                  max_buffer=int(os.getenv("MONGO_MAX_BUFFER", "10000")),
+                                  overflow=os.getenv("MONGO_OVERFLOW", "drop_oldest"),
+                                  spool=spool, replayer=_replayer, on_insert=_update_rollups)
+            atexit.register(close_logs)
+        return _logger
+
+def insert_logs(event, time=None):
+    """Queue one event; ``time`` is when it happened (default now), since it is written later in a batch"""
     log_data = {
-        "time": datetime.datetime.now(),
+        "time": time or datetime.datetime.now(),
         "event": event
     }
-    result = logs.insert_one(log_data)
-    print(f"✅ MongoDB: Event saved - {event}")
-    return result
+    if get_logger().log(log_data):
+        print(f"✅ MongoDB: Event queued - {event}")
+    else:
+        print(f"⚠ MongoDB: buffer full, event dropped - {event}")
+
+def flush_logs(timeout=10.0):
+    """Write every queued event now; False if some are still waiting after ``timeout``"""
+    return _logger is None or _logger.flush(timeout)
+
+def close_logs(timeout=10.0):
+    """Flush and stop the logger; returns how many events were neither written nor spooled"""
+    if _logger is None:
+        return 0
+    unsaved = _logger.close(timeout)
+    if _replayer is not None:
+        _replayer.close()  # whatever is still spooled is replayed on the next start
+    return unsaved
+
+def spool_stats():
+    """Backlog and counters of the on-disk spool (None when it is off or not opened yet)"""
+    return _logger.spool.stats() if _logger is not None and _logger.spool is not None else None
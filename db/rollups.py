@@ -0,0 +1,194 @@
+"""Per-minute, hourly and daily event counters kept next to the raw logs.
+
+Every batch the logger stores is folded into ``log_rollups`` with ``$inc``
+upserts, so a summary over any range reads a few bucket documents instead
+of scanning ``logs``:
+
+    python db/rollups.py backfill              # build every bucket from the raw logs
+    python db/rollups.py repair --days 2       # rebuild recent buckets (e.g. from cron)
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROLLUP_COLLECTION = "log_rollups"
+GRANULARITIES = ("minute", "hour", "day")
+ALL_PATIENTS = ""  # patient key of events logged without one
+BUCKET_KEY = ["granularity", "bucket", "event", "patient"]
+
+
+def bucket_start(time, granularity):
+    """Start of the ``granularity`` bucket that contains ``time``"""
+    if granularity == "minute":
+        return time.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return time.replace(minute=0, second=0, microsecond=0)
+    return time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_bucket(time, granularity):
+    step = {"minute": datetime.timedelta(minutes=1), "hour": datetime.timedelta(hours=1),
+            "day": datetime.timedelta(days=1)}[granularity]
+    return bucket_start(time, granularity) + step
+
+
+def ensure_rollup_indexes(rollups):
+    """One unique key per bucket; its (granularity, bucket) prefix also serves range reads"""
+    return rollups.create_index([(field, 1) for field in BUCKET_KEY], name="bucket_key", unique=True)
+
+
+def rollup_updates(documents):
+    """``$inc`` upserts for a batch of log documents, one per touched bucket"""
+    from pymongo import UpdateOne
+    buckets = defaultdict(lambda: [0, None, None])
+    for document in documents:
+        patient = document.get("patient", ALL_PATIENTS)
+        for granularity in GRANULARITIES:
+            bucket = buckets[(granularity, bucket_start(document["time"], granularity), document["event"], patient)]
+            bucket[0] += 1
+            bucket[1] = document["time"] if bucket[1] is None else min(bucket[1], document["time"])
+            bucket[2] = document["time"] if bucket[2] is None else max(bucket[2], document["time"])
+    return [UpdateOne(dict(zip(BUCKET_KEY, key)),
+                      {"$inc": {"count": count},
+                       "$min": {"first_occurrence": first},
+                       "$max": {"last_occurrence": last}},
+                      upsert=True)
+            for key, (count, first, last) in buckets.items()]
+
+
+def apply_rollups(rollups, documents):
+    """Count newly stored log documents into their buckets"""
+    updates = rollup_updates(documents)
+    if updates:
+        rollups.bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+def bucket_ranges(start, end):
+    """``(granularity, from, to)`` pieces that tile ``[start, end)`` with as few buckets as possible.
+
+    ``start`` is rounded down to its minute and the minute containing
+    ``end`` is included, so the range is covered to the minute.
+    """
+    ranges = []
+    cursor = bucket_start(start, "minute")
+    end = next_bucket(end, "minute")
+    # Walk up: minutes to the next hour, hours to the next day, whole days...
+    for granularity, coarser in (("minute", "hour"), ("hour", "day")):
+        boundary = bucket_start(cursor, coarser)
+        if boundary < cursor:
+            boundary = next_bucket(cursor, coarser)
+        stop = min(boundary, bucket_start(end, granularity))
+        if cursor < stop:
+            ranges.append((granularity, cursor, stop))
+            cursor = stop
+    day_end = bucket_start(end, "day")
+    if cursor < day_end:
+        ranges.append(("day", cursor, day_end))
+        cursor = day_end
+    # ...then back down: hours and minutes of the last, partial day
+    for granularity in ("hour", "minute"):
+        stop = bucket_start(end, granularity)
+        if cursor < stop:
+            ranges.append((granularity, cursor, stop))
+            cursor = stop
+    return ranges
+
+
+def bucket_query(start, end, event=None, patient=None):
+    clauses = [{"granularity": granularity, "bucket": {"$gte": low, "$lt": high}}
+               for granularity, low, high in bucket_ranges(start, end)]
+    query = {"$or": clauses}
+    if event is not None:
+        query["event"] = event
+    if patient is not None:
+        query["patient"] = patient
+    return query
+
+
+def summarize_range(rollups, start, end, event=None, patient=None):
+    """``{event: {count, first_occurrence, last_occurrence}}`` for ``[start, end]`` from the buckets"""
+    summary = {}
+    for bucket in rollups.find(bucket_query(start, end, event, patient),
+                               {"event": 1, "count": 1, "first_occurrence": 1, "last_occurrence": 1}):
+        entry = summary.setdefault(bucket["event"], {"count": 0, "first_occurrence": bucket["first_occurrence"],
+                                                     "last_occurrence": bucket["last_occurrence"]})
+        entry["count"] += bucket["count"]
+        entry["first_occurrence"] = min(entry["first_occurrence"], bucket["first_occurrence"])
+        entry["last_occurrence"] = max(entry["last_occurrence"], bucket["last_occurrence"])
+    return summary
+
+
+def rebuild_rollups(logs, rollups, start=None, end=None):
+    """Recompute every bucket overlapping ``[start, end)`` from the raw logs (all of them by default).
+
+    The range is widened to whole days so no bucket is half rebuilt; the
+    buckets in it are deleted and written again with ``$merge``.  Run it
+    once to backfill, and now and then to repair counts a failed rollup
+    update missed.  Events stored while it runs may be counted twice or
+    not at all in the newest buckets; the next repair fixes them.
+    """
+    match = {}
+    bucket_filter = {}
+    if start is not None:
+        start = bucket_start(start, "day")
+        match["$gte"] = start
+        bucket_filter["$gte"] = start
+    if end is not None:
+        end = next_bucket(end, "day")
+        match["$lt"] = end
+        bucket_filter["$lt"] = end
+    ensure_rollup_indexes(rollups)
+    rollups.delete_many({"bucket": bucket_filter} if bucket_filter else {})
+    for granularity in GRANULARITIES:
+        pipeline = [{"$match": {"time": match}}] if match else []
+        pipeline += [
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$time", "unit": granularity}},
+                    "event": "$event",
+                    "patient": {"$ifNull": ["$patient", ALL_PATIENTS]},
+                },
+                "count": {"$sum": 1},
+                "first_occurrence": {"$min": "$time"},
+                "last_occurrence": {"$max": "$time"},
+            }},
+            {"$project": {
+                "_id": 0,
+                "granularity": {"$literal": granularity},
+                "bucket": "$_id.bucket",
+                "event": "$_id.event",
+                "patient": "$_id.patient",
+                "count": 1,
+                "first_occurrence": 1,
+                "last_occurrence": 1,
+            }},
+            {"$merge": {"into": rollups.name, "on": BUCKET_KEY, "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ]
+        logs.aggregate(pipeline)
+    return rollups.count_documents({"bucket": bucket_filter} if bucket_filter else {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or repair the event rollup buckets")
+    parser.add_argument('command', choices=['backfill', 'repair'])
+    parser.add_argument('--days', type=float, default=2, help="repair: how far back to rebuild")
+    args = parser.parse_args()
+
+    from db.insert import DB_NAME, get_client
+    db = get_client()[DB_NAME]
+    start = None
+    if args.command == 'repair':
+        start = datetime.datetime.now() - datetime.timedelta(days=args.days)
+    began = time.perf_counter()
+    buckets = rebuild_rollups(db.logs, db[ROLLUP_COLLECTION], start=start)
+    print(f"✓ {buckets} buckets rebuilt in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+from db.batch_logger import notify_inserted, only_duplicates
+
+# Each record: payload length, CRC32 of the payload, then the BSON document
+RECORD_HEADER = struct.Struct('<II')
+SEGMENT_PREFIX = 'spool-'
+SEGMENT_SUFFIX = '.log'
+CURSOR_FILE = 'cursor.json'
+
+
+def encode(document) -> bytes:
+    import bson
+    document.setdefault('_id', bson.ObjectId())  # the idempotency key, fixed before the first write
+    return bson.encode(document)
+
+
+def decode(payload: bytes) -> dict:
+    import bson
+    return bson.decode(payload)
+
+
+def scan(path, offset=0):
+    """``(offset, payload)`` of every intact record from ``offset``; stops at a torn or corrupt tail"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            length, crc = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            yield offset, payload
+            offset += RECORD_HEADER.size + length
+
+
+class EventSpool:
+    """Append-only on-disk journal of events that are not in MongoDB yet.
+
+    Records go to numbered segment files and are fsync'd in groups: after
+    ``sync_every`` records or ``sync_interval`` seconds, whichever comes
+    first.  ``read()`` and ``commit()`` move a cursor that is itself
+    persisted, so a restart resumes where replay stopped; segments behind
+    the cursor are deleted.  A torn record at the end of a segment (power
+    loss mid-write) is cut off when the spool is opened.
+
+    Past ``max_bytes`` the oldest segment is dropped: recent events matter
+    more than old ones here.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, segment_bytes=4 * 1024 * 1024,
+                 sync_every=64, sync_interval=1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+        self.cursor = self.load_cursor()  # (segment number, offset) of the next record to replay
+        self.segments = self.list_segments()
+        if self.segments:
+            self.recover(self.segments[-1])
+        self.pending = sum(self.count_records(n) for n in self.segments)
+        self.sizes = {n: os.path.getsize(self.segment_path(n)) for n in self.segments}
+        self.file = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+        self.appended = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.syncs = 0
+
+    def segment_path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+
+    def list_segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                number = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+                if number < self.cursor[0]:
+                    os.remove(self.segment_path(number))  # replayed, but not deleted before a crash
+                else:
+                    numbers.append(number)
+        return sorted(numbers)
+
+    def load_cursor(self):
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                cursor = json.load(f)
+            return cursor['segment'], cursor['offset']
+        except (OSError, ValueError, KeyError):
+            return 0, 0
+
+    def save_cursor(self):
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'segment': self.cursor[0], 'offset': self.cursor[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def recover(self, number):
+        """Truncate a torn or corrupt tail left by a crash"""
+        path = self.segment_path(number)
+        end = 0
+        for offset, payload in scan(path):
+            end = offset + RECORD_HEADER.size + len(payload)
+        if end < os.path.getsize(path):
+            print(f"⚠ Spool: cut {os.path.getsize(path) - end} bytes of torn records from {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+
+    def count_records(self, number):
+        start = self.cursor[1] if number == self.cursor[0] else 0
+        return sum(1 for _ in scan(self.segment_path(number), start))
+
+    def append(self, documents):
+        """Journal documents (each gets an ``_id`` if it has none); durable at the next group sync"""
+        with self.lock:
+            if self.file is None or self.sizes[self.segments[-1]] >= self.segment_bytes:
+                self.open_segment()
+            data = bytearray()
+            for document in documents:
+                payload = encode(document)
+                data += RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+            segment = self.segments[-1]
+            try:
+                self.file.write(data)
+                self.file.flush()
+                self.unsynced += len(documents)
+                if self.unsynced >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+                    self.sync()
+            except Exception:
+                self.discard_tail(segment)
+                raise
+            self.sizes[segment] += len(data)
+            self.pending += len(documents)
+            self.appended += len(documents)
+            self.enforce_cap()
+
+    def discard_tail(self, segment):
+        """Cut a failed append off its segment: the caller retries the batch, which must not be replayed twice"""
+        try:
+            self.file.close()
+        except OSError:
+            pass
+        self.file = None  # the next append starts a new segment
+        os.truncate(self.segment_path(segment), self.sizes[segment])
+
+    def sync(self):
+        with self.lock:
+            if self.file is not None and self.unsynced:
+                os.fsync(self.file.fileno())
+                self.syncs += 1
+            self.unsynced = 0
+            self.last_sync = time.monotonic()
+
+    def open_segment(self):
+        self.close_file()
+        number = self.segments[-1] + 1 if self.segments else max(self.cursor[0], 1)
+        self.segments.append(number)
+        self.sizes[number] = 0
+        self.file = open(self.segment_path(number), 'ab')
+
+    def close_file(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def enforce_cap(self):
+        while sum(self.sizes.values()) > self.max_bytes and len(self.segments) > 1:
+            number = self.segments[0]
+            lost = self.count_records(number)
+            self.remove_segment(number)
+            self.cursor = (self.segments[0], 0)
+            self.save_cursor()
+            self.pending -= lost
+            self.dropped += lost
+            print(f"⚠ Spool over {self.max_bytes / 1e6:.1f} MB: dropped {lost} oldest events")
+
+    def remove_segment(self, number):
+        self.segments.remove(number)
+        del self.sizes[number]
+        os.remove(self.segment_path(number))
+
+    def read(self, limit=500):
+        """Up to ``limit`` documents from the cursor on, oldest first, and the position after them"""
+        with self.lock:
+            documents = []
+            segment, offset = self.cursor
+            for number in self.segments:
+                if number < segment:
+                    continue
+                start = offset if number == segment else 0
+                segment, offset = number, start
+                for offset, payload in scan(self.segment_path(number), start):
+                    documents.append(decode(payload))
+                    offset += RECORD_HEADER.size + len(payload)
+                    if len(documents) >= limit:
+                        return documents, (segment, offset)
+            return documents, (segment, offset)
+
+    def commit(self, position, count):
+        """Move the cursor past ``count`` replayed documents; drop segments it has left behind"""
+        with self.lock:
+            if position[0] < self.cursor[0]:
+                return  # the cap dropped this segment while it was being replayed
+            self.cursor = position
+            for number in [n for n in self.segments if n < position[0]]:
+                self.remove_segment(number)
+            if self.file is None and self.segments and self.segments[-1] == position[0] \
+                    and position[1] >= self.sizes[position[0]]:
+                self.remove_segment(position[0])  # a finished segment from an earlier run
+                self.cursor = (position[0] + 1, 0)
+            self.save_cursor()
+            self.pending = max(0, self.pending - count)
+            self.replayed += count
+
+    def close(self):
+        with self.lock:
+            self.close_file()
+
+    def stats(self) -> dict:
+        return {
+            'backlog': self.pending,
+            'bytes': sum(self.sizes.values()),
+            'segments': len(self.segments),
+            'appended': self.appended,
+            'replayed': self.replayed,
+            'dropped': self.dropped,
+            'syncs': self.syncs,
+        }
+
+
+class SpoolReplayer:
+    """Drains an ``EventSpool`` into MongoDB in order once the connection is back.
+
+    Batches are written with the ``_id`` they were journaled with, so a
+    batch that was partly stored before a crash or timeout is simply
+    written again: the duplicates are rejected and the cursor moves on.
+    ``on_insert`` gets the whole batch, duplicates included, after the
+    cursor has moved, so each spooled event is counted exactly once
+    (short of a crash between the two).
+    """
+
+    def __init__(self, spool, collection, batch_size=500, interval=5.0, on_insert=None):
+        self.spool = spool
+        self.collection = collection
+        self.on_insert = on_insert
+        self.batch_size = batch_size
+        self.interval = interval
+        self.wake = threading.Event()
+        self.stopping = False
+        self.connected = True
+        self.thread = threading.Thread(target=self.run, name="mongo-spool-replayer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopping:
+            if self.spool.pending and self.replay_batch():
+                continue  # keep going while MongoDB takes batches
+            self.spool.sync()  # the group sync for a quiet spool
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def replay_batch(self) -> bool:
+        documents, position = self.spool.read(self.batch_size)
+        if not documents:
+            return False
+        try:
+            self.collection().insert_many(documents, ordered=False)
+        except Exception as e:
+            if not only_duplicates(e):
+                if self.connected:
+                    print(f"⚠ MongoDB unreachable, {self.spool.pending} events spooled - {e}")
+                self.connected = False
+                return False
+        # Counted only once the cursor has moved past them, so a duplicate here was
+        # stored by an attempt that failed (or crashed) before counting it
+        self.spool.commit(position, len(documents))
+        notify_inserted(self.on_insert, documents)
+        if not self.connected and not self.spool.pending:
+            print("✅ MongoDB: spooled events replayed")
+        self.connected = True
+        return True
+
+    def notify(self):
+        self.wake.set()
+
+    def close(self, timeout=5.0):
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout)
+        self.spool.close()
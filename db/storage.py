@@ -0,0 +1,172 @@
+"""Where event logs live: the remote MongoDB or an embedded SQLite file.
+
+Both backends offer the same four calls with the same results, so a unit
+with poor connectivity can log locally:
+
+    STORAGE_BACKEND=sqlite SQLITE_PATH=/var/lib/terrahacks/logs.db python python/camera_ocr.py
+"""
+import atexit
+import datetime
+import os
+import sqlite3
+import threading
+
+
+class LogStorage:
+    """``insert_logs`` / ``check_logs`` / ``get_event_stats`` / ``get_recent_events``.
+
+    Summaries use the shapes of ``db/check.py``: ``check_logs`` returns
+    ``{event: {count, last_occurrence}}`` ordered by count, and recent
+    events are dicts with ``_id``, ``time`` and ``event``.  Windows run
+    from ``now - days`` to ``now`` (default: the current time), both ends
+    included.
+    """
+
+    name = None
+
+    def insert_logs(self, event, time=None):
+        raise NotImplementedError
+
+    def check_logs(self, days=1, now=None):
+        raise NotImplementedError
+
+    def get_event_stats(self, event_name, days=1, now=None):
+        raise NotImplementedError
+
+    def get_recent_events(self, limit=10):
+        raise NotImplementedError
+
+    def flush(self, timeout=10.0):
+        """Make every logged event visible to the queries; False if ``timeout`` ran out"""
+        return True
+
+    def close(self, timeout=10.0):
+        """Returns how many events were not saved"""
+        return 0
+
+
+class MongoStorage(LogStorage):
+    """The ``logs`` collection through ``db/insert.py`` (batched, spooled) and ``db/check.py`` (rollups)"""
+
+    name = 'mongo'
+
+    def insert_logs(self, event, time=None):
+        from db.insert import insert_logs
+        insert_logs(event, time)
+
+    def check_logs(self, days=1, now=None):
+        from db.check import check_logs
+        return check_logs(days, now=now)
+
+    def get_event_stats(self, event_name, days=1, now=None):
+        from db.check import get_event_stats
+        return get_event_stats(event_name, days, now=now)
+
+    def get_recent_events(self, limit=10):
+        from db.check import get_recent_events
+        return get_recent_events(limit)
+
+    def flush(self, timeout=10.0):
+        from db.insert import flush_logs
+        return flush_logs(timeout)
+
+    def close(self, timeout=10.0):
+        from db.insert import close_logs
+        return close_logs(timeout)
+
+
+class SQLiteStorage(LogStorage):
+    """A local SQLite file in WAL mode; times are stored as epoch seconds.
+
+    ``(event, time)`` serves per-event stats and ``(time)`` serves time
+    ranges and "most recent", mirroring the MongoDB indexes.  Each insert
+    is its own transaction, so a crash of the process loses nothing that
+    was logged (a power cut may lose the last few, see ``synchronous``).
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY,
+            time REAL NOT NULL,
+            event TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS logs_event_time ON logs (event, time DESC);
+        CREATE INDEX IF NOT EXISTS logs_time ON logs (time DESC);
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SQLITE_PATH", os.path.join(os.path.expanduser("~"), ".terrahacks2025", "logs.db"))
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.lock = threading.Lock()  # one connection, shared by the dispatcher thread and readers
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # no fsync per commit; the WAL stays consistent
+        self.conn.executescript(self.SCHEMA)
+
+    def insert_logs(self, event, time=None):
+        time = time or datetime.datetime.now()
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO logs (time, event) VALUES (?, ?)", (time.timestamp(), event))
+        print(f"✅ SQLite: Event saved - {event}")
+
+    def query(self, sql, parameters=()):
+        with self.lock:
+            return self.conn.execute(sql, parameters).fetchall()
+
+    def check_logs(self, days=1, now=None):
+        now = now or datetime.datetime.now()
+        start_time = now - datetime.timedelta(days=days)
+        rows = self.query("SELECT event, COUNT(*) AS count, MAX(time) FROM logs WHERE time >= ? AND time <= ? "
+                          "GROUP BY event ORDER BY count DESC", (start_time.timestamp(), now.timestamp()))
+        return {event: {"count": count, "last_occurrence": datetime.datetime.fromtimestamp(last)}
+                for event, count, last in rows}
+
+    def get_event_stats(self, event_name, days=1, now=None):
+        now = now or datetime.datetime.now()
+        start_time = now - datetime.timedelta(days=days)
+        (count, first, last), = self.query("SELECT COUNT(*), MIN(time), MAX(time) FROM logs "
+                                           "WHERE event = ? AND time >= ? AND time <= ?",
+                                           (event_name, start_time.timestamp(), now.timestamp()))
+        return {
+            "event": event_name,
+            "count": count,
+            "first_occurrence": datetime.datetime.fromtimestamp(first) if count else None,
+            "last_occurrence": datetime.datetime.fromtimestamp(last) if count else None,
+            "average_per_day": count / days if count else 0
+        }
+
+    def get_recent_events(self, limit=10):
+        rows = self.query("SELECT id, time, event FROM logs ORDER BY time DESC LIMIT ?", (limit,))
+        return [{"_id": log_id, "time": datetime.datetime.fromtimestamp(time), "event": event}
+                for log_id, time, event in rows]
+
+    def query_plan(self, sql, parameters=()):
+        """``EXPLAIN QUERY PLAN`` details, e.g. to check a query uses its index"""
+        return [row[-1] for row in self.query("EXPLAIN QUERY PLAN " + sql, parameters)]
+
+    def close(self, timeout=10.0):
+        with self.lock:
+            self.conn.close()
+        return 0
+
+
+STORAGE_BACKENDS = {
+    'mongo': MongoStorage,
+    'sqlite': SQLiteStorage,
+}
+
+_storages = {}
+_storage_lock = threading.Lock()
+
+
+def get_storage(name=None):
+    """The configured backend (``STORAGE_BACKEND`` env var, default ``mongo``), one per process"""
+    name = (name or os.getenv("STORAGE_BACKEND", "mongo")).lower()
+    with _storage_lock:
+        if name not in _storages:
+            _storages[name] = STORAGE_BACKENDS[name]()
+            atexit.register(_storages[name].close)
+        return _storages[name]
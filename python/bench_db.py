@@ -0,0 +1,190 @@
+"""Benchmark: event logging and summary queries on each storage backend (db/storage.py).
+
+Every backend gets the same synthetic events through ``insert_logs`` and
+then answers ``check_logs``, ``get_event_stats`` and ``get_recent_events``;
+the answers are compared across backends, with events placed just inside
+and just outside both ends of the query windows (one window ends 6 h ago).  MongoDB runs against a scratch
+database of a local mongod (skipped if none is reachable), and also
+compares one ``insert_one`` per event with the batch logger.
+
+    python python/bench_db.py [--backends sqlite,mongo] [--uri mongodb://localhost:27017] [--events 5000]
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import percentile
+
+EVENTS = ["standing", "consuming", "consumed water", "consumed pill", "pill reminder", "fallen"]
+BENCH_DB = "Terrahacks2025_bench"
+PAST = datetime.timedelta(hours=6)  # a window that ends in the past, with later events to leave out
+QUERIES = ("check_logs", "check_logs_past", "get_event_stats", "get_recent_events")
+
+
+def make_events(count: int, now: datetime.datetime, seed: int = 0):
+    """Events over the two days before ``now``, plus some either side of every window edge queried.
+
+    The edges are the one- and two-day window starts before ``now`` and
+    both ends of the one-day window before ``now - PAST``.  ``now`` is 30 s
+    into a minute, so the events just outside an edge share its minute,
+    which minute rollups would round them into.
+    """
+    rng = random.Random(seed)
+    events = [(EVENTS[rng.randrange(len(EVENTS))], now - datetime.timedelta(hours=rng.uniform(0.1, 47.9)))
+              for _ in range(count)]
+    edges = [now - datetime.timedelta(days=1), now - datetime.timedelta(days=2),
+             now - PAST, now - PAST - datetime.timedelta(days=1)]
+    for edge in edges:
+        for seconds in (-45, -20, -1, -0.001, 0, 0.001, 1, 20, 45):
+            events += [(event, edge + datetime.timedelta(seconds=seconds)) for event in ("fallen", "standing")]
+    # Whole milliseconds, as BSON dates store them
+    events = [(event, when.replace(microsecond=when.microsecond // 1000 * 1000)) for event, when in events]
+    return sorted(events, key=lambda event: event[1])
+
+
+def timed_calls(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return result, times
+
+
+def comparable(results: dict) -> dict:
+    """Query answers with times cut to milliseconds (BSON dates) and ids left out"""
+    def ms(value):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000) if value else value
+    def summary(name):
+        return {event: (data["count"], ms(data["last_occurrence"])) for event, data in results[name].items()}
+    stats = results["get_event_stats"]
+    return {
+        "check_logs": summary("check_logs"),
+        "check_logs_past": summary("check_logs_past"),
+        "get_event_stats": (stats["count"], ms(stats["first_occurrence"]), ms(stats["last_occurrence"])),
+        "get_recent_events": [(event["event"], ms(event["time"])) for event in results["get_recent_events"]],
+    }
+
+
+def bench_storage(storage, events, now, repeat: int):
+    quiet = io.StringIO()  # insert_logs prints one line per event
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(quiet):
+        for event, when in events:
+            storage.insert_logs(event, when)
+        storage.flush(timeout=60)
+    insert_rate = len(events) / (time.perf_counter() - start)
+
+    queries = {
+        "check_logs": lambda: storage.check_logs(1, now=now),
+        "check_logs_past": lambda: storage.check_logs(1, now=now - PAST),
+        "get_event_stats": lambda: storage.get_event_stats("fallen", 2, now=now),
+        "get_recent_events": lambda: storage.get_recent_events(10),
+    }
+    results, latencies = {}, {}
+    for name, query in queries.items():
+        results[name], latencies[name] = timed_calls(query, repeat)
+    return insert_rate, results, latencies
+
+
+def open_sqlite(args):
+    from db.storage import SQLiteStorage
+    return SQLiteStorage(os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "logs.db"))
+
+
+def open_mongo(args):
+    # Set before db/ reads them: a scratch database, no spool, the local server
+    os.environ.update(MONGO_URI=args.uri, MONGO_DB=BENCH_DB, MONGO_SPOOL_DIR="")
+    from db.insert import connect, get_client
+    get_client().drop_database(BENCH_DB)
+    connect()  # creates the indexes
+    from db.storage import MongoStorage
+    return MongoStorage()
+
+
+def bench_mongo_writes(args, events):
+    """One insert_one per event against the batch logger at several batch sizes"""
+    from db.batch_logger import BatchLogger
+    from db.insert import get_client
+    collection = get_client()[BENCH_DB].write_bench
+    documents = [{"time": when, "event": event} for event, when in events]
+
+    print(f"\n{'mongo writes':<22}{'events/s':>12}{'p50 us':>12}{'p99 us':>12}")
+    modes = [("insert_one", None)] + [(f"batched ({size})", size) for size in map(int, args.batch_sizes.split(','))]
+    for label, batch_size in modes:
+        collection.drop()
+        logger = None
+        if batch_size:
+            logger = BatchLogger(lambda: collection, batch_size=batch_size, max_buffer=len(documents))
+        call_times = []
+        start = time.perf_counter()
+        for document in documents:
+            t = time.perf_counter()
+            if logger is None:
+                collection.insert_one(dict(document))
+            else:
+                logger.log(dict(document))
+            call_times.append(time.perf_counter() - t)
+        if logger is not None:
+            logger.close(timeout=60)
+        elapsed = time.perf_counter() - start
+        call_times.sort()
+        print(f"{label:<22}{len(documents) / elapsed:>12,.0f}{1e6 * percentile(call_times, 0.5):>12.1f}"
+              f"{1e6 * percentile(call_times, 0.99):>12.1f}")
+    collection.drop()
+
+
+BACKENDS = {'sqlite': open_sqlite, 'mongo': open_mongo}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', default="sqlite,mongo")
+    parser.add_argument('--uri', default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50, help="runs of each query")
+    parser.add_argument('--batch-sizes', default="10,100,500", help="batch logger sizes for the MongoDB write test")
+    args = parser.parse_args()
+
+    # Every backend is queried as of the same moment, so their windows match to the millisecond
+    now = datetime.datetime.now().replace(second=30, microsecond=0)
+    events = make_events(args.events, now)
+    print(f"{len(events)} events, queries run {args.repeat}x")
+    print(f"{'backend':<10}{'insert/s':>12}" + "".join(f"{name + ' p50 ms':>26}" for name in QUERIES))
+    answers = {}
+    for name in args.backends.split(','):
+        try:
+            storage = BACKENDS[name](args)
+        except Exception as e:
+            print(f"{name:<10}unavailable: {str(e).split(' (')[0]}")
+            continue
+        insert_rate, results, latencies = bench_storage(storage, events, now, args.repeat)
+        answers[name] = comparable(results)
+        print(f"{name:<10}{insert_rate:>12,.0f}" + "".join(f"{1000 * percentile(times, 0.5):>26.3f}"
+                                                           for times in latencies.values()))
+        if name == 'mongo':
+            bench_mongo_writes(args, events)
+            from db.insert import get_client
+            get_client().drop_database(BENCH_DB)
+        storage.close()
+
+    if len(answers) > 1:
+        reference, *others = answers.items()
+        for name, answer in others:
+            same = [query for query in answer if answer[query] == reference[1][query]]
+            differ = [query for query in answer if query not in same]
+            print(f"{'✓' if not differ else '❌'} {name} vs {reference[0]}: "
+                  f"{'same results' if not differ else 'different ' + ', '.join(differ)}")
+
+
+if __name__ == "__main__":
+    main()
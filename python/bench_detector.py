@@ -0,0 +1,91 @@
+"""Benchmark: YOLO latency and detection agreement for each detector backend.
+
+Runs every backend over the same frames of a recorded clip (or frame
+directory) and compares its boxes with the first backend's: a box agrees
+when a reference box of the same class overlaps it by IoU >= 0.5.
+
+    python python/bench_detector.py clip.mp4 [--backends torch,onnx,int8] [--frames 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from detector_backends import DETECTOR_BACKENDS, sample_frames
+from detections import results_to_arrays
+from pipeline import percentile
+from tracker import iou_matrix
+
+
+def agreement(reference, candidate, min_iou: float = 0.5):
+    """(matched, reference boxes, candidate boxes, mean IoU of matches) for one frame"""
+    ref_xyxy, _, ref_cls = reference
+    cand_xyxy, _, cand_cls = candidate
+    ious = iou_matrix(ref_xyxy.astype(float), cand_xyxy.astype(float))
+    if ious.size:
+        ious[ref_cls[:, None] != cand_cls[None, :]] = 0.0
+    matched, matched_ious, used = 0, [], set()
+    for r in range(len(ref_xyxy)):
+        if not ious.shape[1]:
+            break
+        c = int(np.argmax(ious[r]))
+        if ious[r, c] >= min_iou and c not in used:
+            used.add(c)
+            matched += 1
+            matched_ious.append(ious[r, c])
+    return matched, len(ref_xyxy), len(cand_xyxy), matched_ious
+
+
+def run_backend(detector, frames):
+    latencies, outputs = [], []
+    detector(frames[0])  # warm up
+    for frame in frames:
+        start = time.perf_counter()
+        result = detector(frame)
+        latencies.append(time.perf_counter() - start)
+        outputs.append(results_to_arrays(result))
+    return sorted(latencies), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help="recorded clip or frame directory")
+    parser.add_argument('--backends', default=','.join(DETECTOR_BACKENDS))
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--frames', type=int, default=200)
+    args = parser.parse_args()
+
+    frames = sample_frames(args.source, args.frames)
+    print(f"{len(frames)} frames from {args.source}")
+    print(f"{'backend':<8}{'p50 ms':>9}{'p90 ms':>9}{'FPS':>8}{'boxes':>8}{'recall':>9}{'precision':>11}{'IoU':>7}")
+
+    reference = None
+    for name in args.backends.split(','):
+        try:
+            detector = DETECTOR_BACKENDS[name](args.weights)
+        except Exception as e:
+            print(f"{name:<8}unavailable: {e}")
+            continue
+        latencies, outputs = run_backend(detector, frames)
+        p50, p90 = 1000 * percentile(latencies, 0.5), 1000 * percentile(latencies, 0.9)
+        fps = len(latencies) / sum(latencies)
+        boxes = sum(len(output[0]) for output in outputs)
+
+        if reference is None:
+            reference = outputs
+            print(f"{name:<8}{p50:>9.1f}{p90:>9.1f}{fps:>8.1f}{boxes:>8}{'(reference)':>20}")
+            continue
+        matched = ref_total = cand_total = 0
+        ious = []
+        for ref, cand in zip(reference, outputs):
+            m, r, c, i = agreement(ref, cand)
+            matched, ref_total, cand_total = matched + m, ref_total + r, cand_total + c
+            ious.extend(i)
+        recall = matched / ref_total if ref_total else 1.0
+        precision = matched / cand_total if cand_total else 1.0
+        mean_iou = float(np.mean(ious)) if ious else 0.0
+        print(f"{name:<8}{p50:>9.1f}{p90:>9.1f}{fps:>8.1f}{boxes:>8}{recall:>9.0%}{precision:>11.0%}{mean_iou:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Micro-benchmark: OCR keyword checks per detection, before and after ocr_keywords.
+
+"Before" mirrors the old classify_object: keyword lists rebuilt on every call
+and scanned with ``any(word in text ...)`` once per branch.  "After" is the
+single ``match_ocr_keywords`` pass followed by set lookups.
+
+    python python/bench_keywords.py
+"""
+import timeit
+
+from ocr_keywords import (OCR_VOCABULARY, MEDICINE_KEYWORDS, MEDICINE_BOTTLE_KEYWORDS, MEDICINE_LABEL_KEYWORDS,
+                          FOOD_KEYWORDS, BEVERAGE_KEYWORDS, BEVERAGE_LABEL_KEYWORDS, match_ocr_keywords)
+
+# Typical Tesseract output on 100px crops: short, noisy, often partial
+OCR_SAMPLES = [
+    "ibuprofen tablets 200 mg",
+    "advil 50 ct",
+    "vitamin d3 1000 iu softgels",
+    "nature made fish oil",
+    "spring water 500 ml",
+    "pure life",
+    "nature valley granola bar",
+    "blueberry muffin",
+    "apple juice 200ml",
+    "lot 4471 exp 2026/03",
+    "directions: take 1 tablet twice daily",
+    "kirkland signature",
+    "2%",
+    "tl ee rn",
+    "",
+]
+
+
+def legacy_bottle(text):
+    medicine_keywords = list(MEDICINE_BOTTLE_KEYWORDS)
+    return any(word in text for word in medicine_keywords)
+
+
+def legacy_generic(text):
+    medicine_keywords = list(MEDICINE_KEYWORDS)
+    if any(word in text for word in medicine_keywords):
+        return 'pills'
+    if any(word in text for word in list(BEVERAGE_KEYWORDS)):
+        return 'water'
+    food_ocr_keywords = list(FOOD_KEYWORDS)
+    if any(word in text for word in food_ocr_keywords):
+        return 'food'
+    medicine_keywords = list(MEDICINE_LABEL_KEYWORDS)
+    if any(word in text for word in medicine_keywords):
+        return 'pills'
+    elif any(word in text for word in list(BEVERAGE_LABEL_KEYWORDS)):
+        return 'water'
+    return None
+
+
+def legacy_all_tags(text):
+    return frozenset(tag for tag, words in OCR_VOCABULARY.items() if any(word in text for word in words))
+
+
+def matcher_bottle(text):
+    return 'medicine_bottle' in match_ocr_keywords(text)
+
+
+def matcher_generic(text):
+    tags = match_ocr_keywords(text)
+    if 'medicine' in tags:
+        return 'pills'
+    if 'beverage' in tags:
+        return 'water'
+    if 'food' in tags:
+        return 'food'
+    if 'medicine_label' in tags:
+        return 'pills'
+    elif 'beverage_label' in tags:
+        return 'water'
+    return None
+
+
+def per_call_us(fn, repeat=5, number=2000):
+    best = min(timeit.repeat(lambda: [fn(text) for text in OCR_SAMPLES], repeat=repeat, number=number))
+    return 1e6 * best / (number * len(OCR_SAMPLES))
+
+
+def main():
+    for text in OCR_SAMPLES:
+        assert legacy_bottle(text) == matcher_bottle(text), text
+        assert legacy_generic(text) == matcher_generic(text), text
+        assert legacy_all_tags(text) == match_ocr_keywords(text), text
+
+    print(f"OCR keyword matching, {len(OCR_SAMPLES)} sample strings (µs per detection)")
+    print(f"{'path':<28}{'before':>10}{'after':>10}{'speedup':>10}")
+    for name, before, after in [
+        ("bottle branch", legacy_bottle, matcher_bottle),
+        ("generic object branch", legacy_generic, matcher_generic),
+        ("all categories", legacy_all_tags, match_ocr_keywords),
+    ]:
+        before_us = per_call_us(before)
+        after_us = per_call_us(after)
+        print(f"{name:<28}{before_us:>10.2f}{after_us:>10.2f}{before_us / after_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: ROIs per second for each OCR backend, single and tiled.
+
+Renders label-like crops (the size extract_text_from_region feeds Tesseract)
+and reads them with every backend that is installed, one ROI per call and in
+tiled batches.  Also reports how many crops came back with the right text.
+
+    python python/bench_ocr.py [--rois 64] [--batch 4]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from ocr_backends import OCR_BACKENDS
+from ocr_worker import prepare_ocr_roi
+
+LABELS = ["ADVIL", "200 MG", "ASPIRIN", "WATER", "JUICE", "MUFFIN", "50 CT", "VITAMIN", "TYLENOL", "GRANOLA"]
+
+
+def make_rois(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    rois, truth = [], []
+    for i in range(count):
+        text = LABELS[i % len(LABELS)]
+        width = 18 * len(text) + 30
+        roi = np.full((70, width, 3), 255, dtype=np.uint8)
+        roi[:] = rng.integers(200, 256, size=3, dtype=np.uint8)
+        cv2.putText(roi, text, (15, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (20, 20, 20), 2)
+        noise = rng.normal(0, 6, roi.shape)
+        roi = np.clip(roi + noise, 0, 255).astype(np.uint8)
+        rois.append(prepare_ocr_roi(roi))
+        truth.append(text)
+    return rois, truth
+
+
+def accuracy(texts, truth) -> float:
+    hits = sum(1 for text, expected in zip(texts, truth) if expected.replace(' ', '') in text.upper().replace(' ', ''))
+    return hits / len(truth)
+
+
+def bench(backend, rois, batch: int):
+    start = time.perf_counter()
+    single = [backend.recognize(roi) for roi in rois]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(rois), batch):
+        batched.extend(backend.recognize_batch(rois[i:i + batch]))
+    batch_time = time.perf_counter() - start
+    return single, single_time, batched, batch_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rois', type=int, default=64)
+    parser.add_argument('--batch', type=int, default=4)
+    args = parser.parse_args()
+
+    rois, truth = make_rois(args.rois)
+    print(f"{args.rois} ROIs, tiled batches of {args.batch}")
+    print(f"{'backend':<14}{'mode':<10}{'ROIs/s':>10}{'accuracy':>10}")
+    for name, backend_cls in OCR_BACKENDS.items():
+        try:
+            backend = backend_cls()
+            engine = backend.version()  # fail early if the engine is missing
+            backend.recognize(rois[0])  # warm up
+        except Exception as e:
+            print(f"{name:<14}unavailable: {e}")
+            continue
+        print(f"{name:<14}{engine}")
+        single, single_time, batched, batch_time = bench(backend, rois, args.batch)
+        print(f"{name:<14}{'single':<10}{len(rois) / single_time:>10.1f}{accuracy(single, truth):>10.0%}")
+        print(f"{name:<14}{'tiled':<10}{len(rois) / batch_time:>10.1f}{accuracy(batched, truth):>10.0%}")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
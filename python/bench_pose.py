@@ -0,0 +1,90 @@
+"""Benchmark: per-frame cost of reading pose geometry through the list API vs the array API.
+
+MediaPipe runs once per frame up front; only the work after ``findPose``
+is timed - landmarks plus the distances and angles the fall/consumption
+rules and joint checks need.  Without a clip, random landmarks stand in
+for MediaPipe output.
+
+    python python/bench_pose.py [clip.mp4] [--frames 100] [--repeat 50]
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from bodydetect import NUM_LANDMARKS, poseDetector
+from pipeline import percentile
+
+PAIRS = [(2, 27), (9, 19), (11, 12), (15, 16)]
+TRIPLES = [(11, 13, 15), (12, 14, 16), (23, 25, 27), (24, 26, 28)]
+
+
+def synthetic_results(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    results = []
+    for _ in range(count):
+        landmark = [SimpleNamespace(x=rng.random(), y=rng.random(), z=rng.uniform(-1, 1), visibility=rng.random())
+                    for _ in range(NUM_LANDMARKS)]
+        results.append(SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmark)))
+    return results
+
+
+def list_api(detector, img):
+    lmList = detector.findPosition(img, draw=False)
+    distances = [detector.findDistance(img, p1, p2, draw=False) for p1, p2 in PAIRS]
+    angles = [detector.findAngle(img, p1, p2, p3) for p1, p2, p3 in TRIPLES]
+    return lmList, distances, angles
+
+
+def array_api(detector, img):
+    landmarks = detector.findLandmarks(img)
+    return landmarks, detector.distances(PAIRS), detector.angles(TRIPLES)
+
+
+def time_api(api, detector, frames, results, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for frame, result in zip(frames, results):
+            detector.results = result
+            start = time.perf_counter()
+            api(detector, frame)
+            latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', nargs='?', help="recorded clip or frame directory (default: random landmarks)")
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    detector = poseDetector()
+    if args.source:
+        from detector_backends import sample_frames
+        frames = sample_frames(args.source, args.frames)
+        results = []
+        for frame in frames:
+            detector.findPose(frame)
+            results.append(detector.results)
+        keep = [i for i, result in enumerate(results) if result.pose_landmarks]
+        frames, results = [frames[i] for i in keep], [results[i] for i in keep]
+        print(f"{len(frames)} frames with a body from {args.source}")
+    else:
+        frames = [np.zeros((360, 480, 3), dtype=np.uint8)] * args.frames
+        results = synthetic_results(args.frames)
+        print(f"{len(frames)} frames of random landmarks")
+
+    print(f"{len(PAIRS)} distances + {len(TRIPLES)} angles per frame")
+    print(f"{'api':<8}{'p50 us':>9}{'p90 us':>9}{'mean us':>9}")
+    for name, api in (('list', list_api), ('array', array_api)):
+        latencies = time_api(api, detector, frames, results, args.repeat)
+        p50, p90 = 1e6 * percentile(latencies, 0.5), 1e6 * percentile(latencies, 0.9)
+        mean = 1e6 * sum(latencies) / len(latencies)
+        print(f"{name:<8}{p50:>9.1f}{p90:>9.1f}{mean:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,45 @@
 import cv2
 import mediapipe as mp
+import numpy as np
 import time
-import math
+from metrics import timed
+from event_engine import EventEngine
+from pose_complexity import ComplexityController
+
+NUM_LANDMARKS = 33
+
+
+def fill_landmarks(pose_landmarks, shape, out):
+    """Copy MediaPipe landmarks into ``out`` (33, 4): pixel x, pixel y, z, visibility"""
+    h, w = shape[:2]
+    out[:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark]
+    out[:, 0] *= w
+    out[:, 1] *= h
+    return out
+
+
+def pairwise_distances(points, pairs):
+    """Euclidean distance for every ``(p1, p2)`` row of ``pairs``"""
+    pairs = np.asarray(pairs)
+    delta = points[pairs[:, 1], :2] - points[pairs[:, 0], :2]
+    return np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+
+def joint_angles(points, triples):
+    """Angle at ``p2`` from ``p1`` to ``p3`` in degrees [0, 360), for every row of ``triples``"""
+    triples = np.asarray(triples)
+    p1, p2, p3 = points[triples[:, 0], :2], points[triples[:, 1], :2], points[triples[:, 2], :2]
+    angle = np.degrees(np.arctan2(p3[:, 1] - p2[:, 1], p3[:, 0] - p2[:, 0]) -
+                       np.arctan2(p1[:, 1] - p2[:, 1], p1[:, 0] - p2[:, 0]))
+    return np.where(angle < 0, angle + 360, angle)
+
 
 class poseDetector():
     def __init__(self, mode=False, upBody=False, smooth=True,
-                 detectionCon=0.5, trackCon=0.5):
+                 detectionCon=0.5, trackCon=0.5, complexity=1, budget_ms=30.0, name="pose"):
+        """``complexity`` is MediaPipe's model_complexity (0, 1, 2) or "auto" to pick
+        the heaviest model whose measured latency fits ``budget_ms`` per frame.
+        """
         self.mode = mode
         self.upBody = upBody
         self.smooth = smooth
@@ -13,9 +47,25 @@ class poseDetector():
         self.trackCon = trackCon
         self.mpDraw = mp.solutions.drawing_utils
         self.mpPose = mp.solutions.pose
+        self.controller = None
+        if complexity == "auto":
+            self.controller = ComplexityController(budget_ms, name=name)
+            complexity = self.controller.level
+        self.pose = None
+        self.setComplexity(int(complexity))
+        # Reused every frame: findLandmarks overwrites these in place
+        self.landmarks = np.zeros((NUM_LANDMARKS, 4))
+        self.pixels = np.zeros((NUM_LANDMARKS, 2), dtype=int)
+        self.lmList = []
+
+    def setComplexity(self, complexity):
+        """(Re)build the MediaPipe graph with another model_complexity"""
+        if self.pose is not None:
+            self.pose.close()
+        self.complexity = complexity
         self.pose = self.mpPose.Pose(
             static_image_mode=self.mode,
-            model_complexity=1,
+            model_complexity=complexity,
             smooth_landmarks=self.smooth,
             enable_segmentation=False,
             smooth_segmentation=True,
@@ -23,24 +73,47 @@ class poseDetector():
             min_tracking_confidence=self.trackCon
         )
 
+    @timed('findPose')
     def findPose(self, img, draw=False):
         imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        start = time.perf_counter()
         self.results = self.pose.process(imgRGB)
+        if self.controller is not None:
+            level = self.controller.observe(time.perf_counter() - start)
+            if level is not None:
+                self.setComplexity(level)
         if self.results.pose_landmarks:
             if draw:
                 self.mpDraw.draw_landmarks(img, self.results.pose_landmarks,
                                            self.mpPose.POSE_CONNECTIONS)
         return img
 
+    def findLandmarks(self, img):
+        """Landmarks of the last ``findPose`` as a (33, 4) array of x, y (pixels), z, visibility.
+
+        The array is preallocated and overwritten by the next call; None when no body was found.
+        """
+        if not self.results.pose_landmarks:
+            return None
+        fill_landmarks(self.results.pose_landmarks, img.shape, self.landmarks)
+        # Truncated like int(); what the list API reports
+        self.pixels[:] = self.landmarks[:, :2]
+        return self.landmarks
+
+    def distances(self, pairs, points=None):
+        """Distances for many landmark pairs at once, e.g. ``[(2, 27), (9, 19)]``"""
+        return pairwise_distances(self.landmarks if points is None else points, pairs)
+
+    def angles(self, triples, points=None):
+        """Joint angles for many ``(p1, p2, p3)`` landmark triples at once"""
+        return joint_angles(self.landmarks if points is None else points, triples)
+
     def findPosition(self, img, draw=False):
         self.lmList = []
-        if self.results.pose_landmarks:
-            for id, lm in enumerate(self.results.pose_landmarks.landmark):
-                h, w, c = img.shape
-                # print(id, lm)
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                self.lmList.append([id, cx, cy])
-                if draw:
+        if self.findLandmarks(img) is not None:
+            self.lmList = [[id, cx, cy] for id, (cx, cy) in enumerate(self.pixels.tolist())]
+            if draw:
+                for _, cx, cy in self.lmList:
                     cv2.circle(img, (cx, cy), 5, (255, 0, 0), cv2.FILLED)
         return self.lmList
 
@@ -53,11 +126,7 @@ class poseDetector():
         x2, y2 = self.lmList[p2][1:]
         x3, y3 = self.lmList[p3][1:]
         # Calculate the Angle
-        angle = math.degrees(math.atan2(y3 - y2, x3 - x2) -
-                             math.atan2(y1 - y2, x1 - x2))
-        if angle < 0:
-            angle += 360
-        # print(angle)
+        angle = float(self.angles([(p1, p2, p3)], self.pixels)[0])
         # Draw
         if draw:
             cv2.line(img, (x1, y1), (x2, y2), (255, 255, 255), 3)
@@ -81,7 +150,7 @@ class poseDetector():
         x2, y2 = self.lmList[p2][1:]
         
         # Calculate Euclidean distance
-        distance = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+        distance = float(self.distances([(p1, p2)], self.pixels)[0])
         
         # Draw line between points
         if draw:
@@ -92,11 +161,38 @@ class poseDetector():
         
         return distance
 
+def trigger_emergency(reason):
+    print("FALL DETECTED!")
+    # Trigger emergency notification with location
+    try:
+        # Import SMS service to trigger emergency call
+        import sys
+        import os
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from services.sms_service import SMSService
+        
+        sms_service = SMSService()
+        
+        # Get location (placeholder - in real implementation, get GPS location)
+        location = "Emergency location detected by fall detection camera"  # Replace with actual GPS
+        
+        # Trigger emergency call and SMS
+        success = sms_service.trigger_emergency_call("Patient", location)
+        
+        if success:
+            print("✅ Emergency notification sent successfully!")
+        else:
+            print("⚠️ Emergency notification may have failed")
+            
+    except Exception as e:
+        print(f"❌ Error triggering emergency notification: {e}")
+
 def main():
     # Use webcam instead of video file
     cap = cv2.VideoCapture(0)
-    pTime = 0
     detector = poseDetector()
+    # Same rules as LiveCameraOCR; start_time=0 alarms on the first fallen-looking frame
+    engine = EventEngine(start_time=0)
     
     while True:
         success, img = cap.read()
@@ -107,43 +203,11 @@ def main():
         img = detector.findPose(img)
         lmList = detector.findPosition(img, draw=False)
 
-        if len(lmList) != 0:
-            headfoot = detector.findDistance(img, 2, 27)
-            if headfoot > 150 and lmList[2][2] - lmList[27][2] < 15:
-                consuming = detector.findDistance(img, 9, 19)
-                if consuming < 150:
-                    print("consuming")
-                else: 
-                    print("standing")
+        for event in engine.update(time.time(), lmList):
+            if event.kind == 'fall':
+                trigger_emergency(event.details['reason'])
             else:
-                if time.time() - pTime > 5:
-                    print("FALL DETECTED!")
-                    # Trigger emergency notification with location
-                    try:
-                        # Import SMS service to trigger emergency call
-                        import sys
-                        import os
-                        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                        from services.sms_service import SMSService
-                        
-                        sms_service = SMSService()
-                        
-                        # Get location (placeholder - in real implementation, get GPS location)
-                        location = "Emergency location detected by fall detection camera"  # Replace with actual GPS
-                        
-                        # Trigger emergency call and SMS
-                        success = sms_service.trigger_emergency_call("Patient", location)
-                        
-                        if success:
-                            print("✅ Emergency notification sent successfully!")
-                        else:
-                            print("⚠️ Emergency notification may have failed")
-                            
-                    except Exception as e:
-                        print(f"❌ Error triggering emergency notification: {e}")
-                    
-                    pTime = time.time()
-                pTime = time.time()
+                print(event.name)
                 
         cv2.imshow("Pose Detection", img)
         
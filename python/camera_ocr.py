@@ -1,13 +1,11 @@
+from startup import StartupTrace
 import cv2
-import pytesseract
 import numpy as np
-from PIL import Image
-from ultralytics import YOLO
 import time
-from typing import List, Dict, Tuple
 from datetime import datetime
-import pyttsx3
+from typing import List, Dict, Tuple, Optional
 import threading
+import argparse
 import sys
 import os
 
@@ -15,64 +13,168 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from bodydetect import poseDetector
-from db.insert import insert_logs
+from pipeline import FrameGrabber, DropOldestQueue, PipelineStage, NullStageTimer
+from metrics import REGISTRY, timed
+from scheduler import InferenceScheduler
+from pose_roi import pose_rois, crop_windows, inference_size
+from detections import BoxFeatures, results_to_arrays, box_features, feature_rows
+from detector_backends import get_detector
+from event_engine import Event, EventEngine, meal_time, trace_line
+from recording import FrameRecorder
+from process_pipeline import WorkerPool, RemoteDetector
+from dispatcher import EventDispatcher
+from ocr_keywords import match_ocr_keywords
+from ocr_cache import OCRCache, roi_hash
+from tracker import ObjectTracker
+from ocr_worker import OCRPoolView, OCRWorkerPool, prepare_ocr_roi, run_ocr
+from db.insert import get_logger, connect as connect_mongo
+from db.storage import get_storage
+
+def parse_source(source):
+    """Camera sources are device indices; anything else is a video file or stream URL"""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+def open_capture(source=0) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(parse_source(source))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)  # Reduced resolution for better performance
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)  # Reduced resolution for better performance
+    cap.set(cv2.CAP_PROP_FPS, 20)  # Lower FPS for better processing
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size to minimize lag
+    return cap
+
+
+# YOLO classes whose label text is worth reading
+OCR_CLASS_KEYWORDS = ['bottle', 'container', 'package', 'box', 'object', 'cylinder', 'jar', 'can', 'cup']
+
+
+class OfflineNotifier:
+    """Stands in for SMSService when running offline: notifications go to the event timeline"""
+    
+    def __init__(self, owner):
+        self.owner = owner
+    
+    def __getattr__(self, name):
+        def record(*args):
+            self.owner.record_event('notify', name, args=[str(arg) for arg in args])
+            return True
+        return record
 
-# Add the project root to the Python path for services
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from services.sms_service import SMSService
 
 class LiveCameraOCR:
-    def __init__(self, patient_id: str = "default_patient"):
+    def __init__(self, patient_id: str = "default_patient", source=0, model=None, stream_name: str = None,
+                 cap=None, clock=None, offline_events: Optional[list] = None,
+                 adaptive: bool = True, skip_static_pose: bool = False, roi_mode: bool = False,
+                 detector: str = None, pose_complexity=1, pose_budget_ms: float = 30.0,
+                 process_workers: bool = False, ocr_pool: Optional[OCRWorkerPool] = None):
+        """``cap`` replaces the capture opened from ``source``; ``clock`` replaces
+        ``time.time`` for all event timing.  Passing an ``offline_events`` list
+        turns off MongoDB, SMS and TTS and appends those events to the list instead.
+        ``adaptive`` / ``skip_static_pose`` configure the motion-gated scheduler;
+        ``roi_mode`` runs YOLO on crops around the hands and mouth.
+        ``detector`` picks the YOLO backend (torch / onnx / int8 / auto).
+        ``pose_complexity`` is MediaPipe's model_complexity, or "auto" to fit ``pose_budget_ms``.
+        ``process_workers`` leaves YOLO and MediaPipe to ``run_multiprocess()``'s worker processes.
+        ``ocr_pool`` shares one OCR worker pool between several streams, like ``model``.
+        """
         self.patient_id = patient_id
-        self.model = YOLO('yolov8n.pt')
-        # Set Tesseract path for macOS (installed via Homebrew)
-        import os
-        if os.path.exists('/opt/homebrew/bin/tesseract'):
-            pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
-        else:
-            pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+        self.source = source
+        self.stream_name = stream_name or str(source)
+        self.clock = clock or time.time
+        self.events = offline_events
+        self.offline = offline_events is not None
+        # Per-stage timing hooks used by the replay harness
+        self.stage_timer = NullStageTimer()
         
-        # Initialize pose detector
-        self.pose_detector = poseDetector()
+        # Capture and pose come up first so fall detection is watching as soon as possible;
+        # everything else initializes in the background and is skipped until ready
+        self.startup = StartupTrace()
+        self.startup.mark('imports')
+        with self.startup.step('capture'):
+            self.cap = cap if cap is not None else open_capture(source)
+        self.detector_backend = detector
+        self.pose_complexity = pose_complexity
+        self.pose_budget_ms = pose_budget_ms
+        self.pose_detector = None
+        if not process_workers:
+            with self.startup.step('pose'):
+                self.pose_detector = poseDetector(complexity=pose_complexity, budget_ms=pose_budget_ms,
+                                                  name=self.stream_name)
         
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)  # Reduced resolution for better performance
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)  # Reduced resolution for better performance
-        self.cap.set(cv2.CAP_PROP_FPS, 20)  # Lower FPS for better processing
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer size to minimize lag
+        # A shared model lets several camera streams batch through one YOLO instance
+        self.model = model
+        if model is None and not process_workers:
+            self.startup.background('detector', lambda: get_detector(detector),
+                                    lambda loaded: setattr(self, 'model', loaded))
         
         self.frame_count = 0
         self.process_every_n_frames = 5  # Much more frequent processing for better responsiveness
         self.last_detections = []
         
-        # OCR cache to avoid redundant processing
-        self.ocr_cache = {}
-        self.cache_frame_count = 0
+        # YOLO runs every N frames only while something moves; a still, empty room is barely checked
+        self.scheduler = InferenceScheduler(base_interval=self.process_every_n_frames, adaptive=adaptive,
+                                            skip_pose_when_static=skip_static_pose,
+                                            clock=self.clock, name=self.stream_name)
         
-        # Pose detection variables
-        self.pTime = time.time()
-        self.pose_status = "idle"
+        # ROI mode: YOLO only looks around the wrists and mouth of the last pose
+        self.roi_mode = roi_mode
+        self.roi_max_age = 1.0  # seconds before landmarks are too old to aim crops with
+        self.last_landmarks = []
+        self.last_landmarks_time = float('-inf')
         
-        # Consumption tracking
-        self.last_consumption_time = 0
-        self.consumption_cooldown = 5  # seconds between outputs
-        self.last_pill_output_time = 0  # Track pill outputs for standing position
-        self.last_pose_output_time = 0  # Track pose status outputs
-        self.last_food_consumption_time = 0  # Track food consumption with 30-min cooldown
-        self.food_cooldown = 1800  # 30 minutes in seconds
+        # Serializes YOLO/OCR access when detection runs on its own thread (pipelined mode)
+        self.detect_lock = threading.Lock()
+        self.pipeline_stages = []
         
-        # Initialize text-to-speech engine
-        self.tts_engine = pyttsx3.init()
-        self.tts_engine.setProperty('rate', 150)  # Speed of speech
-        self.tts_engine.setProperty('volume', 0.9)  # Volume level (0.0 to 1.0)
+        # OCR cache keyed on region content, so a bottle that moves a little keeps its text;
+        # entries expire on the stream clock, so a replay sees the same hits at any speed
+        self.ocr_cache = OCRCache(clock=self.clock)
         
-        # Initialize SMS service
-        self.sms_service = SMSService()
+        # Objects are tracked between YOLO runs so each one is OCR'd and classified once
+        self.tracker = ObjectTracker(max_age=2 * self.process_every_n_frames)
         
-        # SMS timing controls
-        self.last_food_sms_time = 0  # Track food SMS with 30-min cooldown
-        self.last_water_sms_time = 0  # Track water SMS with 30-sec cooldown
-        self.water_cooldown = 30  # 30 seconds in seconds
+        # Tesseract runs in worker processes; tracks are upgraded when their text arrives
+        self.ocr_pool = OCRPoolView(ocr_pool, self.stream_name) if ocr_pool is not None else OCRWorkerPool()
+        
+        self.register_metrics()
+        
+        # Pose status, fall and consumption rules; every cooldown lives in the engine
+        self.event_engine = EventEngine(start_time=self.clock())
+        self.event_trace = None  # file that receives every engine input (see event_engine.py)
+        self.recorder = None  # FrameRecorder when --record is on
+        self.pose_landmarks = []  # landmarks from the latest pose run
+        
+        # Text-to-speech, SMS and MongoDB connect in the background
+        self.tts_engine = None
+        self.sms_service = OfflineNotifier(self) if self.offline else None
+        self.storage = None
+        if not self.offline:
+            self.storage = get_storage()  # STORAGE_BACKEND: mongo (default) or sqlite
+            self.startup.background('tts', self.init_tts, lambda engine: setattr(self, 'tts_engine', engine))
+            self.startup.background('sms', self.init_sms, lambda service: setattr(self, 'sms_service', service))
+            if self.storage.name == 'mongo':
+                self.startup.background('mongo', connect_mongo)
+        
+        # The frame loop only enqueues; MongoDB, Twilio and speech each drain their own bounded queue
+        self.dispatcher = None
+        if not self.offline:
+            self.dispatcher = EventDispatcher(stream=self.stream_name)
+            self.dispatcher.add_channel('persist', self.storage.insert_logs, capacity=1000, retries=3, backoff=1.0)
+            self.dispatcher.add_channel('sms', self.send_notification, capacity=50, retries=2, backoff=5.0)
+            self.dispatcher.add_channel('tts', self.speak_message, capacity=3)  # stale speech is worse than none
+        if self.storage is not None and self.storage.name == 'mongo':
+            mongo = get_logger()  # one write-behind buffer for every stream in the process
+            REGISTRY.gauge('mongo_buffered_events', lambda: mongo.stats()['buffered'], "Events waiting for insert_many")
+            REGISTRY.gauge('mongo_events_dropped_total', lambda: mongo.dropped, "Events lost to buffer overflow",
+                           kind="counter")
+            if mongo.spool is not None:
+                REGISTRY.gauge('mongo_spool_backlog_events', lambda: mongo.spool.pending,
+                               "Events journaled on disk, waiting for MongoDB")
+                REGISTRY.gauge('mongo_spool_bytes', lambda: sum(mongo.spool.sizes.values()), "On-disk spool size")
+                REGISTRY.gauge('mongo_spool_dropped_total', lambda: mongo.spool.dropped,
+                               "Spooled events lost to the size cap", kind="counter")
         
         print("Live Camera OCR + Pose Detection Started!")
         print("Controls:")
@@ -80,51 +182,45 @@ class LiveCameraOCR:
         print("- Q: Quit")
         print("- ESC: Exit")
     
-    def classify_object(self, class_name: str, bbox: tuple, frame: np.ndarray) -> str:
+    @timed('classify_object')
+    def classify_object(self, class_name: str, bbox: tuple, frame: np.ndarray, ocr_text: Optional[str] = None,
+                        features: Optional[BoxFeatures] = None) -> str:
+        """Classify a detection as pills / water / food / unknown.
+        
+        ``ocr_text`` can be passed in when the region was already read (e.g. by
+        a track); otherwise OCR runs here for classes that carry labels.
+        ``features`` is the box's row from ``box_features`` when the whole
+        frame's geometry was computed in one go.
+        """
         class_name_lower = class_name.lower()
         x1, y1, x2, y2 = bbox
-        width = x2 - x1
-        height = y2 - y1
-        area = width * height
-        aspect_ratio = max(width/height if height > 0 else 1, height/width if width > 0 else 1)
+        if features is None:
+            features = feature_rows(box_features(np.array([bbox]), frame.shape))[0]
+        area = features.area
+        aspect_ratio = features.aspect_ratio
         
         # Skip OCR for very obvious food items to improve performance
         obvious_food_classes = ['apple', 'banana', 'orange', 'sandwich', 'pizza', 'donut', 'cake', 'hotdog']
         if any(food_class in class_name_lower for food_class in obvious_food_classes):
             return 'food'  # Skip OCR for obvious food items
         
-        # Use cached OCR result if available, but always do OCR for bottles and containers
-        cache_key = f"{self.cache_frame_count}_{x1}_{y1}_{x2}_{y2}"
-        if cache_key in self.ocr_cache:
-            ocr_text = self.ocr_cache[cache_key]
-        else:
-            # Always do OCR for bottles, containers, and potentially ambiguous objects
-            if any(keyword in class_name_lower for keyword in ['bottle', 'container', 'package', 'box', 'object', 'cylinder', 'jar', 'can', 'cup']):
-                ocr_text = self.extract_text_from_region(frame, (x1, y1, x2, y2))
-                self.ocr_cache[cache_key] = ocr_text
+        # Always do OCR for bottles, containers, and potentially ambiguous objects (cached)
+        if ocr_text is None:
+            if self.needs_ocr(class_name):
+                ocr_text = self.cached_text_from_region(frame, (x1, y1, x2, y2))
             else:
                 ocr_text = ""
         
         ocr_text_lower = ocr_text.lower() if ocr_text.strip() else ""
+        # Every OCR keyword category in one pass over the text
+        ocr_tags = match_ocr_keywords(ocr_text_lower)
         
         # BOTTLE CLASSIFICATION - CHECK FOR PILL BOTTLES FIRST WITH ENHANCED DETECTION
         if 'bottle' in class_name_lower:
             # Use cached OCR to check if it's actually a pill bottle
             if ocr_text_lower:
                 # Check for medicine/pill keywords in OCR text - EXPANDED LIST
-                medicine_keywords = [
-                    'mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'dose', 'capsule', 
-                    'ibuprofen', 'aspirin', 'tylenol', 'advil', 'aleve', 'motrin', 'bayer',
-                    'prescription', 'drug', 'medication', 'supplement', 'capsules', 'pills',
-                    'tablets', 'softgel', 'gel cap', 'gelcap', 'caplet', 'pharmacy', 'pharma',
-                    'mcg', 'iu', 'international unit', 'milligram', 'microgram', 'dosage',
-                    'strength', 'potency', 'expiry', 'exp', 'lot', 'ndc', 'usp', 'otc',
-                    'take with food', 'take daily', 'twice daily', 'morning', 'evening',
-                    'acetaminophen', 'naproxen', 'diphenhydramine', 'loratadine', 'cetirizine',
-                    'omeprazole', 'ranitidine', 'simvastatin', 'lisinopril', 'metformin',
-                    'count', 'ct', 'tablets', 'caps', 'gelcaps', 'softgels', 'warning', 'directions'
-                ]
-                if any(word in ocr_text_lower for word in medicine_keywords):
+                if 'medicine_bottle' in ocr_tags:
                     return 'pills'  # It's a pill bottle
             
             # SMART bottle detection - distinguish pill bottles from water bottles
@@ -151,19 +247,13 @@ class LiveCameraOCR:
             return 'unknown'  # Don't classify very small background objects
         
         # Additional background filtering based on position
-        frame_height, frame_width = frame.shape[:2]
-        center_x = (x1 + x2) / 2
-        center_y = (y1 + y2) / 2
-        
         # Objects at edges are likely background - but be more lenient for center objects (near mouth)
-        if (center_x < frame_width * 0.05 or center_x > frame_width * 0.95 or
-            center_y < frame_height * 0.05 or center_y > frame_height * 0.95):
+        if features.near_edge:
             if area < 5000:  # Much lower threshold for edge objects to catch muffins
                 return 'unknown'
         
         # Special handling for objects in center region (likely near mouth during consuming)
-        elif (frame_width * 0.2 < center_x < frame_width * 0.8 and 
-              frame_height * 0.2 < center_y < frame_height * 0.8):
+        elif features.central:
             # Objects in center region (near mouth) - be very permissive with small objects
             if area < 400:  # Very low threshold for center objects to catch muffins
                 return 'unknown'
@@ -173,27 +263,11 @@ class LiveCameraOCR:
             # Use cached OCR for classification
             if ocr_text_lower:
                 # HIGHEST PRIORITY: Medicine keywords - pills stay pills
-                medicine_keywords = [
-                    'mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'dose', 'capsule', 
-                    'ibuprofen', 'aspirin', 'tylenol', 'advil', 'aleve', 'motrin', 'bayer',
-                    'prescription', 'drug', 'medication', 'supplement', 'capsules', 'pills',
-                    'tablets', 'softgel', 'gel cap', 'gelcap', 'caplet', 'pharmacy', 'pharma',
-                    'mcg', 'iu', 'international unit', 'milligram', 'microgram', 'dosage',
-                    'strength', 'potency', 'expiry', 'exp', 'lot', 'ndc', 'usp', 'otc'
-                ]
-                if any(word in ocr_text_lower for word in medicine_keywords):
+                if 'medicine' in ocr_tags:
                     return 'pills'  # Pills take priority even when consuming
                 
                 # SECOND PRIORITY: Food keywords - muffins stay food, never pills
-                food_keywords = [
-                    'muffin', 'cupcake', 'cake', 'bagel', 'pastry', 'croissant', 'danish', 'scone', 'biscuit',
-                    'sandwich', 'burger', 'pizza', 'bread', 'donut', 'cookie', 'brownie', 'bar', 'energy bar',
-                    'chips', 'crackers', 'cookies', 'cereal', 'snack', 'candy', 'chocolate', 'granola', 'pretzel',
-                    'fruit', 'apple', 'banana', 'orange', 'grape', 'berry', 'nuts', 'trail mix', 'jerky',
-                    'cheese', 'yogurt', 'pudding', 'ice cream', 'frozen', 'fresh', 'bakery', 'baked',
-                    'wrapper', 'wrapped', 'packaging', 'packaged', 'food'
-                ]
-                if any(word in ocr_text_lower for word in food_keywords):
+                if 'food_consuming' in ocr_tags:
                     return 'food'  # Food items stay food, never pills
             
             # LOWEST PRIORITY: Check for drink containers (only if not pills or food)
@@ -271,25 +345,15 @@ class LiveCameraOCR:
             if ocr_text_lower:
                 
                 # Check for beverage keywords (juice boxes, milk, etc.)
-                if any(word in ocr_text_lower for word in ['juice', 'milk', 'water', 'drink', 'soda', 'cola', 'beverage', 'apple juice', 'orange juice', 'grape juice']):
+                if 'beverage_package' in ocr_tags:
                     return 'water'
                 
                 # Check for food keywords - COMPREHENSIVE LIST INCLUDING MUFFINS AND WRAPPED ITEMS
-                food_ocr_keywords = [
-                    'chips', 'crackers', 'cookies', 'cereal', 'snack', 'candy', 'chocolate', 'granola', 'pretzel', 'popcorn',
-                    'muffin', 'cupcake', 'cake', 'bagel', 'pastry', 'croissant', 'danish', 'scone', 'biscuit',
-                    'sandwich', 'burger', 'pizza', 'bread', 'donut', 'cookie', 'brownie', 'bar', 'energy bar',
-                    'fruit', 'apple', 'banana', 'orange', 'grape', 'berry', 'nuts', 'trail mix', 'jerky',
-                    'cheese', 'yogurt', 'pudding', 'ice cream', 'frozen', 'fresh', 'bakery', 'baked',
-                    'wrapper', 'wrapped', 'packaging', 'packaged', 'foil', 'plastic', 'peel', 'skin',
-                    'hostess', 'little debbie', 'entenmann', 'pepperidge farm', 'nabisco', 'kellogg',
-                    'organic', 'natural', 'gluten free', 'whole grain', 'multigrain', 'wheat', 'oat'
-                ]
-                if any(word in ocr_text_lower for word in food_ocr_keywords):
+                if 'food_package' in ocr_tags:
                     return 'food'
                 
                 # Check for medicine keywords
-                if any(word in ocr_text_lower for word in ['pill', 'tablet', 'vitamin', 'medicine', 'capsule', 'mg']):
+                if 'medicine_package' in ocr_tags:
                     return 'pills'
             
             # Fallback shape-based detection - JUICE BOXES ARE NEVER PILLS
@@ -315,33 +379,15 @@ class LiveCameraOCR:
             if ocr_text_lower:
                 
                 # Medicine containers (pill bottles, medicine jars) - COMPREHENSIVE CHECK
-                medicine_keywords = [
-                    'mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'dose', 'capsule', 
-                    'ibuprofen', 'aspirin', 'tylenol', 'advil', 'aleve', 'motrin', 'bayer',
-                    'prescription', 'drug', 'medication', 'supplement', 'capsules', 'pills',
-                    'tablets', 'softgel', 'gel cap', 'gelcap', 'caplet', 'pharmacy', 'pharma',
-                    'mcg', 'iu', 'international unit', 'milligram', 'microgram', 'dosage',
-                    'strength', 'potency', 'expiry', 'exp', 'lot', 'ndc', 'usp', 'otc'
-                ]
-                if any(word in ocr_text_lower for word in medicine_keywords):
+                if 'medicine' in ocr_tags:
                     return 'pills'
                 
                 # Food containers/packages - COMPREHENSIVE FOOD DETECTION
-                food_ocr_keywords = [
-                    'chips', 'crackers', 'cookies', 'cereal', 'snack', 'candy', 'chocolate', 'granola', 'pretzel', 'popcorn',
-                    'muffin', 'cupcake', 'cake', 'bagel', 'pastry', 'croissant', 'danish', 'scone', 'biscuit',
-                    'sandwich', 'burger', 'pizza', 'bread', 'donut', 'cookie', 'brownie', 'bar', 'energy bar',
-                    'fruit', 'apple', 'banana', 'orange', 'grape', 'berry', 'nuts', 'trail mix', 'jerky',
-                    'cheese', 'yogurt', 'pudding', 'ice cream', 'frozen', 'fresh', 'bakery', 'baked',
-                    'wrapper', 'wrapped', 'packaging', 'packaged', 'foil', 'plastic', 'peel', 'skin',
-                    'hostess', 'little debbie', 'entenmann', 'pepperidge farm', 'nabisco', 'kellogg',
-                    'organic', 'natural', 'gluten free', 'whole grain', 'multigrain', 'wheat', 'oat', 'food'
-                ]
-                if any(word in ocr_text_lower for word in food_ocr_keywords):
+                if 'food' in ocr_tags:
                     return 'food'
                 
                 # Beverage containers (cans, bottles)
-                if any(word in ocr_text_lower for word in ['cola', 'pepsi', 'coke', 'sprite', 'water', 'juice', 'soda', 'drink']):
+                if 'beverage_brand' in ocr_tags:
                     return 'water'
             
             # SMART fallback for containers - distinguish pills from water
@@ -370,33 +416,15 @@ class LiveCameraOCR:
             if ocr_text_lower:
                 
                 # Medicine/pill keywords take priority - COMPREHENSIVE CHECK
-                medicine_keywords = [
-                    'mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'dose', 'capsule', 
-                    'ibuprofen', 'aspirin', 'tylenol', 'advil', 'aleve', 'motrin', 'bayer',
-                    'prescription', 'drug', 'medication', 'supplement', 'capsules', 'pills',
-                    'tablets', 'softgel', 'gel cap', 'gelcap', 'caplet', 'pharmacy', 'pharma',
-                    'mcg', 'iu', 'international unit', 'milligram', 'microgram', 'dosage',
-                    'strength', 'potency', 'expiry', 'exp', 'lot', 'ndc', 'usp', 'otc'
-                ]
-                if any(word in ocr_text_lower for word in medicine_keywords):
+                if 'medicine' in ocr_tags:
                     return 'pills'
                 
                 # Beverage keywords
-                if any(word in ocr_text_lower for word in ['water', 'juice', 'soda', 'cola', 'drink', 'beverage', 'ml', 'fl oz', 'liter']):
+                if 'beverage' in ocr_tags:
                     return 'water'
                 
                 # Food keywords - COMPREHENSIVE DETECTION INCLUDING MUFFINS AND WRAPPED ITEMS
-                food_ocr_keywords = [
-                    'chips', 'crackers', 'cookies', 'cereal', 'snack', 'candy', 'chocolate', 'granola', 'pretzel', 'popcorn',
-                    'muffin', 'cupcake', 'cake', 'bagel', 'pastry', 'croissant', 'danish', 'scone', 'biscuit',
-                    'sandwich', 'burger', 'pizza', 'bread', 'donut', 'cookie', 'brownie', 'bar', 'energy bar',
-                    'fruit', 'apple', 'banana', 'orange', 'grape', 'berry', 'nuts', 'trail mix', 'jerky',
-                    'cheese', 'yogurt', 'pudding', 'ice cream', 'frozen', 'fresh', 'bakery', 'baked',
-                    'wrapper', 'wrapped', 'packaging', 'packaged', 'foil', 'plastic', 'peel', 'skin',
-                    'hostess', 'little debbie', 'entenmann', 'pepperidge farm', 'nabisco', 'kellogg',
-                    'organic', 'natural', 'gluten free', 'whole grain', 'multigrain', 'wheat', 'oat', 'food'
-                ]
-                if any(word in ocr_text_lower for word in food_ocr_keywords):
+                if 'food' in ocr_tags:
                     return 'food'
             
             # Shape-based fallback when OCR fails - AGGRESSIVE WATER/JUICE DETECTION
@@ -412,18 +440,9 @@ class LiveCameraOCR:
             elif 1500 < area < 40000 and aspect_ratio < 2.5:  # Very expanded range for pill bottles
                 # Use cached OCR to check for medicine keywords first (more specific)
                 if ocr_text_lower:
-                    medicine_keywords = [
-                        'mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'dose', 'capsule', 
-                        'ibuprofen', 'aspirin', 'tylenol', 'advil', 'aleve', 'motrin', 'bayer',
-                        'prescription', 'drug', 'medication', 'supplement', 'capsules', 'pills',
-                        'tablets', 'softgel', 'gel cap', 'gelcap', 'caplet', 'pharmacy', 'pharma',
-                        'mcg', 'iu', 'international unit', 'milligram', 'microgram', 'dosage',
-                        'strength', 'potency', 'expiry', 'exp', 'lot', 'ndc', 'usp', 'otc',
-                        'count', 'ct', 'warning', 'directions', 'daily', 'twice'
-                    ]
-                    if any(word in ocr_text_lower for word in medicine_keywords):
+                    if 'medicine_label' in ocr_tags:
                         return 'pills'
-                    elif any(word in ocr_text_lower for word in ['water', 'juice', 'soda', 'drink', 'cola', 'ml', 'oz', 'liter']):
+                    elif 'beverage_label' in ocr_tags:
                         return 'water'
                 
                 # ENHANCED shape-based classification - include square pill bottles
@@ -435,8 +454,7 @@ class LiveCameraOCR:
                 elif area < 25000:  # Medium objects default to pills
                     # Use cached OCR for food keywords to avoid misclassifying muffins as pills
                     if ocr_text_lower:
-                        food_check_keywords = ['muffin', 'cupcake', 'cake', 'food', 'bakery', 'baked', 'pastry', 'snack']
-                        if any(word in ocr_text_lower for word in food_check_keywords):
+                        if 'food_label' in ocr_tags:
                             return 'food'  # Food items, not pills
                     return 'pills'  # Smaller objects = likely pill bottles (if not food)
                 else:
@@ -450,11 +468,9 @@ class LiveCameraOCR:
             elif 1000 < area < 30000 and (aspect_ratio < 1.8 or (0.8 < aspect_ratio < 1.2)):  # Compact OR square objects
                 # Check OCR first for medicine keywords
                 if ocr_text_lower:
-                    medicine_keywords = ['mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'capsule', 'count', 'ct']
-                    if any(word in ocr_text_lower for word in medicine_keywords):
+                    if 'medicine_compact' in ocr_tags:
                         return 'pills'
-                    food_keywords = ['muffin', 'cake', 'food', 'snack']
-                    if any(word in ocr_text_lower for word in food_keywords):
+                    if 'food_compact' in ocr_tags:
                         return 'food'
                 # Default compact objects to pills
                 return 'pills'  # Compact objects = likely pill bottles
@@ -473,77 +489,170 @@ class LiveCameraOCR:
                 else:
                     return 'food'  # Everything else = food to catch muffins
     
-    def detect_objects(self, frame: np.ndarray) -> List[Dict]:
-        # Clear OCR cache when processing new frame
-        self.cache_frame_count += 1
-        if self.cache_frame_count % 100 == 0:  # Clear cache less frequently
-            self.ocr_cache.clear()
-        
+    @timed('detect_objects')
+    def detect_objects(self, frame: np.ndarray, full_frame: bool = False) -> List[Dict]:
+        if self.model is None:
+            return self.last_detections  # detector still loading in the background
+        windows = [] if full_frame else self.detection_windows(frame)
+        if windows:
+            # Crops at native resolution: fewer pixels than the letterboxed frame, small bottles stay big
+            crops = crop_windows(frame, windows)
+            results = self.model(crops, imgsz=inference_size(crops), verbose=False)
+            REGISTRY.counter('detect_mode_total', "YOLO calls by input", mode="roi").inc()
+            return self.parse_detections(results, frame, offsets=[(x1, y1) for x1, y1, _, _ in windows])
         results = self.model(frame, verbose=False)
-        detections = []
-        
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    confidence = box.conf[0].cpu().numpy()
-                    class_id = int(box.cls[0].cpu().numpy())
-                    class_name = self.model.names[class_id]
-                    
-                    if confidence > 0.25:  # Very low threshold to catch all objects including pills
-                        bbox = (int(x1), int(y1), int(x2), int(y2))
-                        object_type = self.classify_object(class_name, bbox, frame)
-                        detections.append({
-                            'bbox': bbox,
-                            'confidence': float(confidence),
-                            'class': class_name,
-                            'object_type': object_type
-                        })
-        
-        return detections
+        REGISTRY.counter('detect_mode_total', "YOLO calls by input", mode="full").inc()
+        return self.parse_detections(results, frame)
     
-    def extract_text_from_region(self, frame: np.ndarray, bbox: Tuple[int, int, int, int]) -> str:
-        x1, y1, x2, y2 = bbox
+    def detection_windows(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Hand/mouth crop windows for ROI mode; empty means run on the full frame"""
+        if not self.roi_mode or self.clock() - self.last_landmarks_time > self.roi_max_age:
+            return []
+        return pose_rois(self.last_landmarks, frame.shape)
+    
+    def parse_detections(self, results, frame: np.ndarray, offsets: Optional[List[Tuple[int, int]]] = None) -> List[Dict]:
+        """Turn YOLO results for ``frame`` into classified, tracked detections.
         
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+        ``offsets`` gives the top-left corner of each result's crop when YOLO
+        ran on ROIs, so boxes come back in frame coordinates.
+        """
+        # Very low threshold to catch all objects including pills
+        xyxy, confidence, class_id = results_to_arrays(results, offsets, min_confidence=0.25)
+        bboxes = [tuple(bbox) for bbox in xyxy.tolist()]
+        names = self.model.names
+        boxes = [(bbox, conf, names[cls]) for bbox, conf, cls in zip(bboxes, confidence.tolist(), class_id.tolist())]
+        # Geometry for every box in one pass; looked up by box when a track gets classified
+        features = dict(zip(bboxes, feature_rows(box_features(xyxy, frame.shape))))
         
-        roi = frame[y1:y2, x1:x2]
+        # Only objects the tracker has not seen before pay for OCR + classification
+        matched, new = self.tracker.update(boxes)
+        ocr_batch = {}
+        for track in new:
+            self.classify_track(track, frame, ocr_batch, features.get(track.bbox))
+        for track in matched:
+            if track.classified_as != (track.class_name, self.pose_status):
+                self.classify_track(track, frame, ocr_batch, features.get(track.bbox))
+            elif track.ocr_text is None and self.needs_ocr(track.class_name):
+                self.request_track_ocr(track, frame, ocr_batch)  # retry if the OCR queue was full
+        self.submit_ocr_batch(ocr_batch)
         
-        if roi.size == 0 or roi.shape[0] < 15 or roi.shape[1] < 15:
-            return ""  # Skip very small regions faster
+        return self.tracked_detections()
+    
+    def needs_ocr(self, class_name: str) -> bool:
+        class_name_lower = class_name.lower()
+        return any(keyword in class_name_lower for keyword in OCR_CLASS_KEYWORDS)
+    
+    def classify_track(self, track, frame: np.ndarray, ocr_batch: Optional[Dict] = None,
+                       features: Optional[BoxFeatures] = None):
+        """(Re)classify a track, reading its label at most once.
         
-        # Calculate area for performance check
-        area = roi.shape[0] * roi.shape[1]
+        Until the OCR text arrives the track is classified from shape alone.
+        """
+        if track.ocr_text is None and self.needs_ocr(track.class_name):
+            self.request_track_ocr(track, frame, ocr_batch)
+        track.object_type = self.classify_object(track.class_name, track.bbox, frame, ocr_text=track.ocr_text or "",
+                                                 features=features)
+        # Classification is pose-aware, so redo it (without OCR) when either input changes
+        track.classified_as = (track.class_name, self.pose_status)
+    
+    def request_track_ocr(self, track, frame: np.ndarray, ocr_batch: Optional[Dict] = None):
+        """Use cached text for the track's ROI, or queue it for the OCR workers.
         
-        # Skip OCR for very small regions to improve performance
-        if area < 2000:
-            return ""
+        Requests collected in ``ocr_batch`` are sent together by ``submit_ocr_batch``
+        so the workers can read them in one engine call.
+        """
+        roi = self.crop_region(frame, track.bbox)
+        prepared = prepare_ocr_roi(roi)
+        if prepared is None:
+            track.ocr_text = ""  # Too small to OCR - nothing worth caching
+            return
         
-        # Ultra-fast OCR with minimal processing
-        try:
-            # Resize for faster OCR processing
-            if roi.shape[0] > 100 or roi.shape[1] > 100:
-                scale = min(100/roi.shape[0], 100/roi.shape[1])
-                new_width = int(roi.shape[1] * scale)
-                new_height = int(roi.shape[0] * scale)
-                roi = cv2.resize(roi, (new_width, new_height))
-            
-            roi_pil = Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
-            
-            # Fastest OCR configuration
-            config = '--psm 8'
-            
-            try:
-                text = pytesseract.image_to_string(roi_pil, config=config).strip()
-                return text
-            except:
-                return ""
-        except Exception:
+        phash = roi_hash(roi)
+        cached = self.ocr_cache.get(phash, track.bbox)
+        if cached is not None:
+            track.ocr_text = cached
+            return
+        
+        batch = {} if ocr_batch is None else ocr_batch
+        batch[track.track_id] = (track, prepared.copy(), phash, track.bbox)
+        if ocr_batch is None:
+            self.submit_ocr_batch(batch)
+    
+    def submit_ocr_batch(self, ocr_batch: Dict):
+        if not ocr_batch:
+            return
+        # A request coalesced into one still in flight keeps the ROI that one read
+        fresh = {track_id for track_id in ocr_batch if not self.ocr_pool.is_pending(track_id)}
+        accepted = self.ocr_pool.submit_many({track_id: roi for track_id, (_, roi, _, _) in ocr_batch.items()})
+        for track_id in accepted & fresh:
+            track, _, phash, bbox = ocr_batch[track_id]
+            track.ocr_request = (phash, bbox)
+    
+    def collect_ocr_results(self, frame: np.ndarray):
+        """Attach finished OCR text to its track and upgrade the classification"""
+        # ROIs that left the frame are no longer worth reading.  In pipelined mode the
+        # detect thread adds tracks concurrently, so the pool reads them under its lock
+        self.ocr_pool.cancel_missing(lambda: [track.track_id for track in self.tracker.active_tracks()])
+        
+        results = self.ocr_pool.poll()
+        tracks = {track.track_id: track for track in self.tracker.active_tracks()}
+        for track_id, text in results.items():
+            track = tracks.get(track_id)
+            if track is None:
+                continue
+            track.ocr_text = text
+            if track.ocr_request is not None:
+                # Cached under the box that was read; the track has usually moved on since
+                phash, bbox = track.ocr_request
+                self.ocr_cache.put(phash, bbox, text)
+                track.ocr_request = None
+            self.classify_track(track, frame)
+    
+    def tracked_detections(self) -> List[Dict]:
+        return [track.to_detection() for track in self.tracker.active_tracks() if track.object_type is not None]
+    
+    def advance_tracks(self, frame: np.ndarray, predict: bool = True):
+        """Move tracked boxes along and pick up OCR results (every frame).
+        
+        ``predict=False`` holds tracks in place (static scene), so they do not
+        age out while YOLO is being skipped.
+        """
+        if predict:
+            self.tracker.predict()
+        self.collect_ocr_results(frame)
+        self.last_detections = self.tracked_detections()
+    
+    def crop_region(self, frame: np.ndarray, bbox: Tuple[int, int, int, int]) -> np.ndarray:
+        x1, y1, x2, y2 = bbox
+        
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
+        
+        return frame[y1:y2, x1:x2]
+    
+    def cached_text_from_region(self, frame: np.ndarray, bbox: Tuple[int, int, int, int]) -> str:
+        """OCR a region synchronously, reusing the text of a visually matching nearby region"""
+        roi = self.crop_region(frame, bbox)
+        if prepare_ocr_roi(roi) is None:
+            return ""  # Too small to OCR - nothing worth caching
+        
+        phash = roi_hash(roi)
+        ocr_text = self.ocr_cache.get(phash, bbox)
+        if ocr_text is None:
+            ocr_text = self.extract_text_from_region(frame, bbox)
+            self.ocr_cache.put(phash, bbox, ocr_text)
+        return ocr_text
+    
+    @timed('extract_text_from_region')
+    def extract_text_from_region(self, frame: np.ndarray, bbox: Tuple[int, int, int, int]) -> str:
+        """Blocking OCR of one region (interactive snapshot / show_ocr only)"""
+        roi = prepare_ocr_roi(self.crop_region(frame, bbox))
+        if roi is None:
             return ""
+        return run_ocr(roi)
     
     
+    @timed('draw_detections')
     def draw_detections(self, frame: np.ndarray, detections: List[Dict], show_ocr: bool = False) -> np.ndarray:
         annotated_frame = frame.copy()
         
@@ -584,87 +693,29 @@ class LiveCameraOCR:
         
         return annotated_frame
     
+    @timed('process_pose_detection')
     def process_pose_detection(self, frame: np.ndarray) -> np.ndarray:
         """Process pose detection and update status"""
         # Process pose detection
         frame = self.pose_detector.findPose(frame, draw=False)
         lmList = self.pose_detector.findPosition(frame, draw=False)
-        current_time = time.time()
-        
-        
-        # Track body presence for fall detection
-        body_present = len(lmList) != 0
-        
-        if body_present:
-            # Body is detected - update last detection time
-            if not hasattr(self, 'last_body_detection_time'):
-                self.last_body_detection_time = current_time
-            elif self.pose_status == "body_missing":
-                # Body reappeared after being missing
-                time_missing = current_time - self.last_body_detection_time
-                if time_missing < 3.0:  # If body was missing for less than 3 seconds
-                    if (self.pose_status != "fallen" or 
-                        current_time - self.last_pose_output_time > self.consumption_cooldown):
-                        self.pose_status = "fallen"
-                        print("fallen - body disappeared quickly")
-                        self.last_pose_output_time = current_time
-                        
-                        # Send SMS alert for fall detection (async to avoid blocking)
-                        threading.Thread(target=self.sms_service.send_fall_alert_sms, args=(self.patient_id, "body disappeared quickly"), daemon=True).start()
-                        
-                        # Store fall event in MongoDB (async to avoid blocking)
-                        insert_logs("fallen")
-                        
-            # Calculate head to foot distance (landmarks 2 and 27)
-            headfoot = self.pose_detector.findDistance(frame, 2, 27)
-            
-            if headfoot > 150 and lmList[2][2] - lmList[27][2] < 15:
-                # Check for consuming action (distance between ears)
-                consuming = self.pose_detector.findDistance(frame, 9, 19)
-                if consuming < 150:
-                    new_status = "consuming"
-                else: 
-                    new_status = "standing"
-                
-                # Only output if status changed or 5 seconds have passed
-                if (new_status != self.pose_status or 
-                    current_time - self.last_pose_output_time > self.consumption_cooldown):
-                    self.pose_status = new_status
-                    print(self.pose_status)
-                    self.last_pose_output_time = current_time
-                else:
-                    self.pose_status = new_status
-            else:
-                # Check for fallen state based on pose
-                if current_time - self.pTime > 5:
-                    if (self.pose_status != "fallen" or 
-                        current_time - self.last_pose_output_time > self.consumption_cooldown):
-                        self.pose_status = "fallen"
-                        print("fallen - pose detection")
-                        self.last_pose_output_time = current_time
-                        
-                        # Send SMS alert for fall detection (async to avoid blocking)
-                        threading.Thread(target=self.sms_service.send_fall_alert_sms, args=(self.patient_id, "pose detection"), daemon=True).start()
-                        
-                        # Store fall event in MongoDB (async to avoid blocking)
-                        insert_logs("fallen")
-                else:
-                    self.pose_status = "idle"
-                self.pTime = current_time
-        else:
-            # No body detected
-            if hasattr(self, 'last_body_detection_time'):
-                time_since_detection = current_time - self.last_body_detection_time
-                if time_since_detection > 1.0:  # Body missing for more than 1 second
-                    if self.pose_status not in ["fallen", "body_missing"]:
-                        self.pose_status = "body_missing"
-                        print("body_missing")
-                        self.last_pose_output_time = current_time
-            else:
-                # First time no body detected
-                self.last_body_detection_time = current_time
-                self.pose_status = "body_missing"
+        self.apply_pose(lmList)
+        return self.draw_pose_status(frame)
+    
+    def apply_pose(self, lmList: list):
+        """Feed one pose result (``findPosition`` list) to the ROI state and the event rules"""
+        self.pose_landmarks = lmList
+        if lmList:
+            self.last_landmarks = lmList
+            self.last_landmarks_time = self.clock()
         
+        self.run_event_engine(landmarks=lmList)
+    
+    @property
+    def pose_status(self) -> str:
+        return self.event_engine.status
+    
+    def draw_pose_status(self, frame: np.ndarray) -> np.ndarray:
         # Display pose status on frame
         cv2.putText(frame, f"Pose: {self.pose_status}", (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
@@ -673,105 +724,118 @@ class LiveCameraOCR:
     
     def get_meal_time(self):
         """Determine if it's breakfast, lunch, or dinner time"""
-        current_hour = datetime.now().hour
-        
-        if 6 <= current_hour < 11:
-            return "breakfast"
-        elif 11 <= current_hour < 15:
-            return "lunch"
-        else:
-            return "dinner"
-    
+        return meal_time(self.clock())
     
+    @timed('check_consumption_event')
     def check_consumption_event(self):
         """Check for consumption events and standing pill detection"""
-        current_time = time.time()
-        
-        # Check what objects are currently detected
-        detected_categories = set()
-        for detection in self.last_detections:
-            object_type = detection['object_type']
-            if object_type in ['pills', 'water', 'food']:
-                detected_categories.add(object_type)
-        
-        
-        # Handle STANDING position - output pill message with day and meal time
-        if (self.pose_status == "standing" and 
-            'pills' in detected_categories and
-            current_time - self.last_pill_output_time > self.consumption_cooldown):
-            
-            # Get current day of week and meal time
-            day_of_week = datetime.now().strftime("%A")
-            meal_time = self.get_meal_time()
-            
-            # Output formatted message
-            print(f"pill - {day_of_week} {meal_time}")
-            
-            # Create voice announcement
-            voice_message = f"It is {day_of_week} {meal_time}. Make sure to take the right pill."
-            
-            # Store pill reminder event in MongoDB (async to avoid lag)
-            insert_logs("pill reminder")
-            
+        self.run_event_engine(detections=[detection['object_type'] for detection in self.last_detections])
+    
+    def run_event_engine(self, landmarks=None, detections=None):
+        """Feed the engine this frame's pose and/or detections and act on what it returns"""
+        current_time = self.clock()
+        if self.event_trace is not None:
+            self.event_trace.write(trace_line(current_time, landmarks, detections))
+        for event in self.event_engine.update(current_time, landmarks, detections):
+            self.handle_event(event)
+    
+    def start_recording(self, directory: str):
+        """Keep a binary recording of every frame's landmarks and detections (see recording.py)"""
+        self.recorder = FrameRecorder(directory, stream=self.stream_name)
+    
+    def record_frame(self, landmarks=None):
+        if self.recorder is None:
+            return
+        if self.recorder.class_names is None and self.model is not None:
+            self.recorder.class_names = self.model.names
+        self.recorder.append(self.clock(), landmarks, self.last_detections, self.frame_count)
+    
+    def handle_event(self, event: Event):
+        """The side effects of an engine event: console, MongoDB, SMS and voice"""
+        if event.kind == 'status':
+            print(event.name)
+        elif event.kind == 'fall':
+            reason = event.details['reason']
+            print(f"fallen - {reason}")
+            # Send SMS alert for fall detection (async to avoid blocking)
+            self.notify("send_fall_alert_sms", self.patient_id, reason)
+            self.log_event("fallen")
+        elif event.kind == 'pill_reminder':
+            day_of_week, meal = event.details['day_of_week'], event.details['meal_time']
+            print(f"pill - {day_of_week} {meal}")
             # NO SMS for pill reminders - only voice and console output
-            
-            # Speak the message in a separate thread to avoid blocking
-            threading.Thread(target=self.speak_message, args=(voice_message,), daemon=True).start()
-            
-            self.last_pill_output_time = current_time
-        
-        # Handle CONSUMING position - output consumption messages
-        elif self.pose_status == "consuming":
-            
-            # Output consumption messages based on detected categories
-            for category in detected_categories:
-                if category == 'pills':
-                    if current_time - self.last_consumption_time > self.consumption_cooldown:
-                        print("consumed pill")
-                        
-                        # Store consumption event in MongoDB (async to avoid lag)
-                        insert_logs("consumed pill")
-                        
-                        # Send SMS for pill consumption (async to avoid lag)
-                        threading.Thread(target=self.sms_service.send_pill_consumed_sms, args=(self.patient_id,), daemon=True).start()
-                        
-                        self.last_consumption_time = current_time
-                        break
-                elif category == 'water':
-                    if current_time - self.last_consumption_time > self.consumption_cooldown:
-                        print("consumed water")
-                        
-                        # Store consumption event in MongoDB (async to avoid lag)
-                        insert_logs("consumed water")
-                        
-                        # Send SMS for water consumption only every 30 seconds (async to avoid lag)
-                        if current_time - self.last_water_sms_time > self.water_cooldown:
-                            threading.Thread(target=self.sms_service.send_water_consumed_sms, args=(self.patient_id,), daemon=True).start()
-                            self.last_water_sms_time = current_time
-                        
-                        self.last_consumption_time = current_time
-                        break
-                elif category == 'food':
-                    if current_time - self.last_consumption_time > self.consumption_cooldown:
-                        print("consumed food")
-                        
-                        # Store consumption event in MongoDB (async to avoid lag)
-                        insert_logs("consumed food")
-                        
-                        # Also trigger the 30-minute food tracking
-                        if current_time - self.last_food_consumption_time > self.food_cooldown:
-                            # Send SMS for food consumption only every 30 minutes (async to avoid lag)
-                            if current_time - self.last_food_sms_time > self.food_cooldown:
-                                threading.Thread(target=self.sms_service.send_food_consumed_sms, args=(self.patient_id,), daemon=True).start()
-                                self.last_food_sms_time = current_time
-                            self.last_food_consumption_time = current_time
-                        
-                        self.last_consumption_time = current_time
-                        break
+            self.log_event(event.name)
+            self.announce(f"It is {day_of_week} {meal}. Make sure to take the right pill.")
+        elif event.kind == 'consumed':
+            print(event.name)
+            self.log_event(event.name)
+            # Water and food SMS have their own, longer cooldowns
+            if event.details['sms']:
+                self.notify(event.details['sms'], self.patient_id)
     
 
+    def register_metrics(self):
+        """Expose cache and queue state of this stream; sampled only when metrics are exported"""
+        stream = self.stream_name
+        REGISTRY.gauge('ocr_cache_hits_total', lambda: self.ocr_cache.hits, "OCR cache hits", kind="counter", stream=stream)
+        REGISTRY.gauge('ocr_cache_misses_total', lambda: self.ocr_cache.misses, "OCR cache misses", kind="counter", stream=stream)
+        REGISTRY.gauge('ocr_cache_entries', lambda: len(self.ocr_cache), "OCR cache size", stream=stream)
+        REGISTRY.gauge('ocr_pending', lambda: self.ocr_pool.stats()['pending'], "OCR requests in flight", stream=stream)
+        REGISTRY.gauge('tracked_objects', lambda: len(self.tracker.tracks), "Objects currently tracked", stream=stream)
+        REGISTRY.gauge('frames_total', lambda: self.frame_count, "Frames processed", kind="counter", stream=stream)
+    
+    def record_event(self, kind: str, name: str, **details):
+        """Append to the offline event timeline (frame index + clock time)"""
+        self.events.append({'time': self.clock(), 'frame': self.frame_count, 'kind': kind, 'name': name, **details})
+    
+    def log_event(self, event: str):
+        """Persist an event (MongoDB, or the offline timeline)"""
+        REGISTRY.counter('events_total', "Consumption/pose events logged", event=event).inc()
+        if self.offline:
+            self.record_event('log', event)
+        else:
+            self.dispatcher.submit('persist', event, datetime.now())
+    
+    def init_tts(self):
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 150)  # Speed of speech
+        engine.setProperty('volume', 0.9)  # Volume level (0.0 to 1.0)
+        return engine
+    
+    def init_sms(self):
+        from services.sms_service import SMSService
+        return SMSService()
+    
+    def notify(self, method: str, *args):
+        """Call an SMSService method without blocking the frame loop; fall alerts are never dropped"""
+        if self.offline:
+            getattr(self.sms_service, method)(*args)
+        else:
+            self.dispatcher.submit('sms', method, *args, critical=method == 'send_fall_alert_sms')
+    
+    def send_notification(self, method: str, *args) -> bool:
+        """Runs on the dispatcher's SMS worker; False asks it to retry"""
+        # Alerts raised during startup wait for Twilio instead of being lost
+        if not self.startup.wait('sms', timeout=30):
+            print(f"⚠ SMS Service not available, dropped {method}")
+            return True
+        if not self.sms_service.enabled:
+            return True  # nothing to retry: SMS is turned off
+        return getattr(self.sms_service, method)(*args)
+    
+    def announce(self, message: str):
+        """Queue a message for the text-to-speech worker"""
+        if self.offline:
+            self.record_event('voice', message)
+        else:
+            self.dispatcher.submit('tts', message)
+    
     def speak_message(self, message: str):
         """Speak the given message using text-to-speech"""
+        if not self.startup.wait('tts', timeout=10):
+            print(f"TTS Error: engine not available, skipped '{message}'")
+            return
         try:
             self.tts_engine.say(message)
             self.tts_engine.runAndWait()
@@ -792,6 +856,65 @@ class LiveCameraOCR:
         
         return frame
     
+    def analyze_snapshot(self, frame: np.ndarray):
+        """Run detection + OCR on a single frame and print the results (SPACE key)"""
+        print("\n=== Capturing and Analyzing Frame ===")
+        with self.detect_lock:
+            detections = self.detect_objects(frame, full_frame=True)
+        
+        if detections:
+            ocr_frame = self.draw_detections(frame, detections, show_ocr=True)
+            cv2.imshow('OCR Results', ocr_frame)
+            
+            for i, detection in enumerate(detections, 1):
+                text = self.extract_text_from_region(frame, detection['bbox'])
+                print(f"Object {i}: {detection['object_type']} ({detection['confidence']:.2f})")
+                if text:
+                    print(f"  Text: '{text}'")
+                else:
+                    print("  Text: No text detected")
+                print()
+        else:
+            print("No objects detected in current frame")
+            print()
+    
+    def process_frame(self, frame: np.ndarray) -> np.ndarray:
+        """One iteration of the sequential loop; returns the annotated frame"""
+        self.frame_count += 1
+        with self.stage_timer.time('schedule'):
+            decision = self.scheduler.update(frame, self.pose_status)
+        
+        with self.stage_timer.time('track'):
+            self.advance_tracks(frame, predict=decision.moving)
+        
+        # Object detection only when the scheduler asks for it (motion, activity or staleness)
+        if decision.detect:
+            with self.stage_timer.time('detect'):
+                self.last_detections = self.detect_objects(frame)
+        
+        # Process pose detection first
+        if decision.pose:
+            with self.stage_timer.time('pose'):
+                annotated_frame = self.process_pose_detection(frame)
+        else:
+            annotated_frame = self.draw_pose_status(frame)
+        
+        # Check for consumption events
+        with self.stage_timer.time('events'):
+            self.check_consumption_event()
+        
+        if self.recorder is not None:
+            with self.stage_timer.time('record'):
+                self.record_frame(self.pose_landmarks if decision.pose else None)
+        
+        # Then process object detection
+        with self.stage_timer.time('draw'):
+            annotated_frame = self.draw_detections(annotated_frame, self.last_detections, show_ocr=False)
+            annotated_frame = self.add_instructions(annotated_frame)
+        
+        self.startup.mark('first_frame')
+        return annotated_frame
+    
     def run(self):
         if not self.cap.isOpened():
             print("Error: Could not open camera")
@@ -803,22 +926,7 @@ class LiveCameraOCR:
                 print("Error: Could not read frame")
                 break
             
-            self.frame_count += 1
-            
-            # Process object detection less frequently but pose detection every frame
-            if self.frame_count % self.process_every_n_frames == 0:
-                self.last_detections = self.detect_objects(frame)
-            
-            # Process pose detection first
-            annotated_frame = self.process_pose_detection(frame)
-            
-            # Check for consumption events
-            self.check_consumption_event()
-            
-            # Then process object detection
-            annotated_frame = self.draw_detections(annotated_frame, self.last_detections, show_ocr=False)
-            
-            annotated_frame = self.add_instructions(annotated_frame)
+            annotated_frame = self.process_frame(frame)
             
             cv2.imshow('Live Camera OCR - Objects Detection', annotated_frame)
             
@@ -827,41 +935,329 @@ class LiveCameraOCR:
             if key == ord('q') or key == 27:
                 break
             elif key == ord(' '):
-                print("\n=== Capturing and Analyzing Frame ===")
-                detections = self.detect_objects(frame)
+                self.analyze_snapshot(frame)
+        
+        self.cleanup()
+    
+    def _detect_stage(self, packet):
+        """Pipeline stage: YOLO + classification on the newest frame it can get"""
+        with self.detect_lock:
+            self.last_detections = self.detect_objects(packet.frame)
+    
+    def _pose_stage(self, item):
+        """Pipeline stage: pose + event logic at camera rate"""
+        packet, moving = item
+        # Static scene: hold tracks in place, or they age out while YOLO is skipped
+        self.advance_tracks(packet.frame, predict=moving)
+        # Copy so drawing the pose status never races with the detector reading the frame
+        annotated_frame = self.process_pose_detection(packet.frame.copy())
+        self.check_consumption_event()
+        self.record_frame(self.pose_landmarks)
+        self.startup.mark('first_frame')
+        return packet, annotated_frame
+    
+    def run_pipelined(self):
+        """Run capture, detection and pose on separate threads joined by drop-oldest queues.
+        
+        Pose + event logic keep up with the camera while YOLO/OCR process the
+        newest frame whenever they are free; stale frames are dropped and counted.
+        """
+        if not self.cap.isOpened():
+            print("Error: Could not open camera")
+            return
+        
+        grabber = FrameGrabber(self.cap).start()
+        detect_queue = DropOldestQueue(1, "detect")  # YOLO only ever wants the newest frame
+        pose_queue = DropOldestQueue(2, "pose")
+        display_queue = DropOldestQueue(2, "display")
+        self.pipeline_stages = [
+            PipelineStage("detect", self._detect_stage, detect_queue).start(),
+            PipelineStage("pose", self._pose_stage, pose_queue, display_queue).start(),
+        ]
+        for queue in (detect_queue, pose_queue, display_queue):
+            REGISTRY.gauge('queue_depth', queue.__len__, "Frames waiting in a pipeline queue",
+                           stream=self.stream_name, queue=queue.name)
+            REGISTRY.gauge('queue_dropped_total', lambda queue=queue: queue.dropped, "Frames dropped from a pipeline queue",
+                           kind="counter", stream=self.stream_name, queue=queue.name)
+        
+        last_id = 0
+        try:
+            while True:
+                packet = grabber.read(last_id, timeout=1.0)
+                if packet is None:
+                    if grabber.failed:
+                        print("Error: Could not read frame")
+                        break
+                    continue
+                last_id = packet.frame_id
+                self.frame_count += 1
                 
-                if detections:
-                    ocr_frame = self.draw_detections(frame, detections, show_ocr=True)
-                    cv2.imshow('OCR Results', ocr_frame)
-                    
-                    for i, detection in enumerate(detections, 1):
-                        text = self.extract_text_from_region(frame, detection['bbox'])
-                        print(f"Object {i}: {detection['object_type']} ({detection['confidence']:.2f})")
-                        if text:
-                            print(f"  Text: '{text}'")
-                        else:
-                            print("  Text: No text detected")
-                        print()
-                else:
-                    print("No objects detected in current frame")
-                    print()
+                # Pose always runs here; the scheduler only gates YOLO
+                decision = self.scheduler.update(packet.frame, self.pose_status)
+                if decision.detect:
+                    detect_queue.put(packet)
+                pose_queue.put((packet, decision.moving))
+                
+                shown = display_queue.get_latest()
+                if shown is None:
+                    continue
+                
+                source_packet, annotated_frame = shown
+                annotated_frame = self.draw_detections(annotated_frame, self.last_detections, show_ocr=False)
+                annotated_frame = self.add_instructions(annotated_frame)
+                
+                cv2.imshow('Live Camera OCR - Objects Detection', annotated_frame)
+                
+                key = cv2.waitKey(1) & 0xFF
+                
+                if key == ord('q') or key == 27:
+                    break
+                elif key == ord(' '):
+                    self.analyze_snapshot(source_packet.frame)
+        finally:
+            grabber.stop()
+            for stage in self.pipeline_stages:
+                stage.stop()
+            self.print_pipeline_stats(grabber)
         
         self.cleanup()
     
+    def run_multiprocess(self, detector_workers: int = 1):
+        """Capture, tracking, event rules and drawing here; YOLO and MediaPipe in worker processes.
+        
+        Frames reach the workers through a shared-memory ring and only boxes and
+        landmarks come back, so inference runs on other cores without pickling
+        frames or competing for this process's GIL.  Results are applied as
+        they arrive, so pose and detections lag the displayed frame slightly.
+        """
+        if not self.cap.isOpened():
+            print("Error: Could not open camera")
+            return
+        ret, frame = self.cap.read()
+        if not ret:
+            print("Error: Could not read frame")
+            return
+        
+        pool = WorkerPool(frame.shape, detector_workers=detector_workers, backend=self.detector_backend,
+                          pose_complexity=self.pose_complexity, pose_budget_ms=self.pose_budget_ms,
+                          name=self.stream_name)
+        # As in the single-process modes, fall detection is up before the first frame; YOLO may follow later
+        with self.startup.step('pose'):
+            if not pool.wait_ready('pose'):
+                print("⚠ Pose worker did not start")
+        self.worker_pose_complexity = None
+        REGISTRY.gauge('pose_complexity', lambda: self.worker_pose_complexity or 0,
+                       "MediaPipe pose model_complexity in use", stream=self.stream_name)
+        latest = {'detect': 0, 'pose': 0}
+        try:
+            while True:
+                self.frame_count += 1
+                decision = self.scheduler.update(frame, self.pose_status)
+                self.advance_tracks(frame, predict=decision.moving)
+                
+                slot = pool.write(frame)
+                if slot is not None:
+                    if decision.pose:
+                        pool.submit('pose', self.frame_count, slot)
+                    if decision.detect:
+                        pool.submit('detect', self.frame_count, slot, self.detection_windows(frame))
+                
+                pose_updated = False
+                for result in pool.poll():
+                    pose_updated |= self.apply_worker_result(pool, result, latest)
+                self.check_consumption_event()
+                self.record_frame(self.pose_landmarks if pose_updated else None)
+                
+                annotated_frame = self.draw_pose_status(frame)
+                annotated_frame = self.draw_detections(annotated_frame, self.last_detections, show_ocr=False)
+                annotated_frame = self.add_instructions(annotated_frame)
+                self.startup.mark('first_frame')
+                cv2.imshow('Live Camera OCR - Objects Detection', annotated_frame)
+                
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:
+                    break
+                elif key == ord(' '):
+                    self.analyze_snapshot(frame)
+                
+                ret, frame = self.cap.read()
+                if not ret:
+                    print("Error: Could not read frame")
+                    break
+        finally:
+            pool.close()
+            self.print_worker_stats(pool)
+        
+        self.cleanup()
+    
+    def apply_worker_result(self, pool: WorkerPool, result: tuple, latest: Dict[str, int]) -> bool:
+        """Apply one answer from a worker process; True when it was a pose result"""
+        kind, seq, slot, payload, _ = result
+        if kind == 'ready':
+            self.startup.mark(f"{seq}_worker")
+            if seq == 'detect':
+                self.model = RemoteDetector(pool)
+            return False
+        try:
+            if seq < latest[kind]:
+                return False  # several detector workers: an older frame finished last
+            latest[kind] = seq
+            if kind == 'pose':
+                landmarks, self.worker_pose_complexity = payload
+                self.apply_pose(landmarks)
+                return True
+            output, windows = payload
+            offsets = [(x1, y1) for x1, y1, _, _ in windows] if windows else None
+            with self.detect_lock:
+                self.last_detections = self.parse_detections(output, pool.frame(slot), offsets)
+            return False
+        finally:
+            pool.release(slot)
+    
+    def print_worker_stats(self, pool: WorkerPool):
+        print(f"📈 Workers: {pool.dropped} frames dropped with every shared slot in use")
+        for kind in ('pose', 'detect'):
+            latency = REGISTRY.histogram('worker_latency_seconds', stream=self.stream_name, worker=kind)
+            print(f"   {kind}: {latency.count} frames, p50 {1000 * latency.quantile(0.5):.1f} ms, "
+                  f"p90 {1000 * latency.quantile(0.9):.1f} ms")
+    
+    def print_pipeline_stats(self, grabber: FrameGrabber):
+        """Print per-stage frame counters for the pipelined mode"""
+        grab = grabber.stats()
+        print(f"📈 Pipeline: grabbed {grab['grabbed']} frames, {grab['dropped']} dropped before dispatch")
+        for stage in self.pipeline_stages:
+            stats = stage.stats()
+            print(f"   {stage.name}: processed {stats['processed']}, dropped {stats['dropped']}, "
+                  f"errors {stats['errors']}, avg {stats['avg_latency_ms']:.1f} ms, "
+                  f"frame age {stats['avg_frame_age_ms']:.1f} ms")
+    
     def cleanup(self):
-        # Store system shutdown event in MongoDB (async to avoid blocking)
         self.cap.release()
         cv2.destroyAllWindows()
+        self.ocr_pool.shutdown()
+        if self.dispatcher is not None:
+            # Flush queued logs and alerts before exiting; worker threads are daemons
+            undelivered = self.dispatcher.close(timeout=10.0)
+            dispatch = self.dispatcher.stats()
+            print("📈 Dispatcher: " + ", ".join(
+                f"{name} {counts['delivered']} delivered/{counts['retried']} retried/{counts['failed']} failed/"
+                f"{counts['dropped']} dropped" for name, counts in dispatch.items()))
+            if any(undelivered.values()):
+                print(f"⚠ Not delivered before shutdown: {undelivered}")
+            # Buffered events are written now; the storage itself closes at exit (other streams may still log)
+            if not self.storage.flush(timeout=10.0):
+                print(f"⚠ {self.storage.name}: some events were not saved before shutdown")
+        if self.event_trace is not None:
+            self.event_trace.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            recording = self.recorder.stats()
+            print(f"📈 Recorded {recording['frames']} frames to {recording['files']} file(s) in {self.recorder.directory}")
+        schedule = self.scheduler.stats()
+        print(f"🎯 Scheduler: YOLO on {schedule['detect_runs']}/{schedule['frames']} frames "
+              f"({schedule['detect_skip_rate']:.0%} skipped), pose on {schedule['pose_runs']}")
+        if self.pose_detector is not None and self.pose_detector.controller is not None:
+            pose = self.pose_detector.controller.stats()
+            print(f"🎯 Pose model_complexity {pose['level']} after {pose['switches']} switches, "
+                  f"p90 by level: " + ", ".join(f"{level}: {p90:.1f}ms" for level, p90 in sorted(pose['p90_ms'].items())))
+        ocr = self.ocr_pool.stats()
+        print(f"🔤 OCR workers: {ocr['completed']} done, {ocr['coalesced']} coalesced, "
+              f"{ocr['rejected']} rejected (queue full), {ocr['cancelled']} cancelled")
+        cache = self.ocr_cache.stats()
+        print(f"🔤 OCR cache: {cache['hits']} hits / {cache['misses']} misses "
+              f"({cache['hit_rate']:.0%}), {cache['evictions']} evicted, {cache['expirations']} expired")
         print("Camera OCR stopped")
 
 def main():
+    parser = argparse.ArgumentParser(description="Live camera OCR + pose detection")
+    parser.add_argument('--source', action='append', default=None,
+                        help="camera index, video file or RTSP URL (repeat for multi-camera mode)")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="run capture, detection and pose on separate threads")
+    parser.add_argument('--processes', action='store_true',
+                        help="run YOLO and MediaPipe in worker processes fed through shared memory")
+    parser.add_argument('--detector-workers', type=int, default=1,
+                        help="YOLO worker processes for --processes")
+    parser.add_argument('--fixed-schedule', action='store_true',
+                        help="run YOLO every 5th frame regardless of motion (disables the adaptive scheduler)")
+    parser.add_argument('--skip-static-pose', action='store_true',
+                        help="also skip MediaPipe pose on frames where nothing moves")
+    parser.add_argument('--detector', default=None, choices=['torch', 'onnx', 'int8', 'auto'],
+                        help="YOLO backend (default: DETECTOR_BACKEND env var, else torch)")
+    parser.add_argument('--pose-complexity', default=os.getenv('POSE_COMPLEXITY', '1'), choices=['0', '1', '2', 'auto'],
+                        help="MediaPipe model_complexity; auto picks the heaviest that fits --pose-budget-ms")
+    parser.add_argument('--pose-budget-ms', type=float, default=30.0,
+                        help="per-frame pose latency budget for --pose-complexity auto")
+    parser.add_argument('--roi', action='store_true',
+                        help="run YOLO on crops around the wrists and mouth instead of the whole frame")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve /metrics (Prometheus) and /metrics.json on this localhost port")
+    parser.add_argument('--metrics-file', default=None,
+                        help="write metrics here every 5 s and on exit (.prom for Prometheus text, else JSON)")
+    parser.add_argument('--trace', default=None,
+                        help="record every event-engine input to this JSON-lines file for offline threshold tuning "
+                             "(one file per camera with several --source, e.g. trace-cam0.jsonl)")
+    parser.add_argument('--record', default=None, metavar='DIR',
+                        help="record landmarks and detections of every frame to rotating binary files in DIR "
+                             "(DIR/cam0, DIR/cam1, ... with several --source)")
+    parser.add_argument('--headless', action='store_true',
+                        help="replay --source (video file or frame directory) without a display and write a report")
+    parser.add_argument('--report', default='replay_report.json', help="report path for --headless")
+    parser.add_argument('--max-frames', type=int, default=None, help="stop --headless replay after N frames")
+    parser.add_argument('--fps', type=float, default=None, help="frame rate for --headless replay")
+    args = parser.parse_args()
+    sources = args.source or [0]
+    pose_complexity = args.pose_complexity if args.pose_complexity == 'auto' else int(args.pose_complexity)
+    
+    if args.metrics_port is not None:
+        REGISTRY.serve(args.metrics_port)
+    if args.metrics_file:
+        REGISTRY.start_file_export(args.metrics_file)
+    
     try:
-        ocr_system = LiveCameraOCR()
-        ocr_system.run()
+        if args.headless:
+            from replay import run_replay, print_report
+            print_report(run_replay(sources[0], args.report, fps=args.fps, max_frames=args.max_frames,
+                                    adaptive=not args.fixed_schedule, skip_static_pose=args.skip_static_pose,
+                                    roi_mode=args.roi, detector=args.detector, trace_path=args.trace,
+                                    record_dir=args.record, pose_complexity=pose_complexity,
+                                    pose_budget_ms=args.pose_budget_ms))
+            return
+        
+        if len(sources) > 1:
+            from multi_camera import MultiCameraOCR
+            multi = MultiCameraOCR(sources, adaptive=not args.fixed_schedule,
+                                   skip_static_pose=args.skip_static_pose, roi_mode=args.roi,
+                                   detector=args.detector, pose_complexity=pose_complexity,
+                                   pose_budget_ms=args.pose_budget_ms)
+            if args.trace:
+                multi.start_trace(args.trace)
+            if args.record:
+                multi.start_recording(args.record)
+            multi.run()
+            return
+        
+        ocr_system = LiveCameraOCR(source=sources[0], adaptive=not args.fixed_schedule,
+                                   skip_static_pose=args.skip_static_pose, roi_mode=args.roi,
+                                   detector=args.detector, pose_complexity=pose_complexity,
+                                   pose_budget_ms=args.pose_budget_ms, process_workers=args.processes)
+        if args.trace:
+            ocr_system.event_trace = open(args.trace, 'w')
+        if args.record:
+            ocr_system.start_recording(args.record)
+        if args.processes:
+            ocr_system.run_multiprocess(args.detector_workers)
+        elif args.pipelined:
+            ocr_system.run_pipelined()
+        else:
+            ocr_system.run()
     except KeyboardInterrupt:
         print("\nStopped by user")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if args.metrics_file:
+            REGISTRY.write_file(args.metrics_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Geometry of one box, precomputed for classify_object
+BoxFeatures = namedtuple('BoxFeatures', ['width', 'height', 'area', 'aspect_ratio',
+                                         'center_x', 'center_y', 'near_edge', 'central'])
+
+
+def results_to_arrays(results: Sequence[np.ndarray], offsets: Optional[Sequence[Tuple[int, int]]] = None,
+                      min_confidence: float = 0.25) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stack detector output into ``(xyxy, confidence, class_id)`` arrays above ``min_confidence``.
+
+    ``results`` holds one ``(N, 6)`` array (x1, y1, x2, y2, confidence,
+    class) per image, as returned by every detector backend.  ``offsets``
+    shifts each image's boxes from crop to frame coordinates.  Boxes are
+    truncated to whole pixels like ``int()`` did.
+    """
+    xyxy, confidence, class_id = [], [], []
+    for i, data in enumerate(results):
+        if len(data) == 0:
+            continue
+        keep = data[:, 4] > min_confidence
+        if not keep.any():
+            continue
+        boxes = data[keep, :4].astype(int)
+        if offsets:
+            boxes += np.array(offsets[i] * 2, dtype=int)
+        xyxy.append(boxes)
+        confidence.append(data[keep, 4])
+        class_id.append(data[keep, 5].astype(int))
+    if not xyxy:
+        return np.zeros((0, 4), dtype=int), np.zeros(0), np.zeros(0, dtype=int)
+    return np.concatenate(xyxy), np.concatenate(confidence), np.concatenate(class_id)
+
+
+def box_features(xyxy: np.ndarray, frame_shape) -> Dict[str, np.ndarray]:
+    """Size, shape and position of every box at once"""
+    frame_height, frame_width = frame_shape[:2]
+    xyxy = np.asarray(xyxy).reshape(-1, 4)
+    width = xyxy[:, 2] - xyxy[:, 0]
+    height = xyxy[:, 3] - xyxy[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wide = np.where(height > 0, width / np.where(height > 0, height, 1), 1.0)
+        tall = np.where(width > 0, height / np.where(width > 0, width, 1), 1.0)
+    center_x = (xyxy[:, 0] + xyxy[:, 2]) / 2
+    center_y = (xyxy[:, 1] + xyxy[:, 3]) / 2
+    return {
+        'width': width,
+        'height': height,
+        'area': width * height,
+        'aspect_ratio': np.maximum(wide, tall),
+        'center_x': center_x,
+        'center_y': center_y,
+        # Outer 5% of the frame is usually background
+        'near_edge': ((center_x < frame_width * 0.05) | (center_x > frame_width * 0.95) |
+                      (center_y < frame_height * 0.05) | (center_y > frame_height * 0.95)),
+        # Middle of the frame, where things are brought to the mouth
+        'central': ((frame_width * 0.2 < center_x) & (center_x < frame_width * 0.8) &
+                    (frame_height * 0.2 < center_y) & (center_y < frame_height * 0.8)),
+    }
+
+
+def feature_rows(features: Dict[str, np.ndarray]) -> List[BoxFeatures]:
+    """Per-box views of ``box_features`` as plain Python numbers"""
+    columns = [features[name].tolist() for name in BoxFeatures._fields]
+    return [BoxFeatures(*row) for row in zip(*columns)]
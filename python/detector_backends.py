@@ -0,0 +1,311 @@
+"""YOLO object detector behind one interface, with PyTorch, ONNX Runtime and INT8 backends.
+
+Every backend is called like the ultralytics model it replaces,
+``detector(frame_or_frames, imgsz=None, verbose=False)``, and returns one
+``(N, 6)`` float array per image: x1, y1, x2, y2, confidence, class id in
+image coordinates.  ``detector.names`` maps class ids to labels.
+
+Export and calibration (run once, next to the ``.pt`` weights):
+
+    python python/detector_backends.py export                           # yolov8n.onnx
+    python python/detector_backends.py quantize --calibration clip.mp4  # yolov8n-int8.onnx
+"""
+import argparse
+import ast
+import math
+import os
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+DEFAULT_WEIGHTS = 'yolov8n.pt'
+CONFIDENCE = 0.25  # ultralytics predict() defaults
+IOU = 0.7
+MAX_DETECTIONS = 300
+
+
+def onnx_path(weights: str) -> str:
+    return os.path.splitext(weights)[0] + '.onnx'
+
+
+def int8_path(weights: str) -> str:
+    return os.path.splitext(weights)[0] + '-int8.onnx'
+
+
+def as_batch(source) -> List[np.ndarray]:
+    return list(source) if isinstance(source, (list, tuple)) else [source]
+
+
+def letterbox(image: np.ndarray, size: int, stride: int = 32, minimal: bool = False,
+              color: int = 114) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Resize keeping aspect ratio and pad to ``size`` x ``size`` (or, with
+    ``minimal``, only up to the next multiple of ``stride``).
+
+    Returns the padded image, the scale and the (left, top) padding.
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_h, new_w = int(round(h * scale)), int(round(w * scale))
+    if minimal:
+        target_h, target_w = math.ceil(new_h / stride) * stride, math.ceil(new_w / stride) * stride
+    else:
+        target_h = target_w = size
+    if (new_h, new_w) != (h, w):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, left = (target_h - new_h) // 2, (target_w - new_w) // 2
+    canvas = np.full((target_h, target_w, 3), color, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = image
+    return canvas, scale, (left, top)
+
+
+def preprocess(images: Sequence[np.ndarray], size: int) -> Tuple[np.ndarray, list]:
+    """BGR frames -> normalized NCHW float32 batch plus what is needed to undo the letterbox"""
+    # A single image only needs stride padding; a batch must share one shape
+    minimal = len(images) == 1
+    padded, transforms = [], []
+    for image in images:
+        canvas, scale, pad = letterbox(image, size, minimal=minimal)
+        padded.append(canvas)
+        transforms.append((scale, pad, image.shape[:2]))
+    batch = np.stack(padded)[..., ::-1].transpose(0, 3, 1, 2)  # BGR -> RGB, NHWC -> NCHW
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0, transforms
+
+
+def postprocess(output: np.ndarray, transforms: list, confidence: float = CONFIDENCE,
+                iou: float = IOU, max_detections: int = MAX_DETECTIONS) -> List[np.ndarray]:
+    """YOLOv8 head output ``(B, 4 + classes, anchors)`` -> per-image ``(N, 6)`` arrays after NMS"""
+    detections = []
+    for prediction, (scale, (left, top), (height, width)) in zip(output, transforms):
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_id = scores.argmax(axis=1)
+        score = scores[np.arange(len(scores)), class_id]
+        keep = score > confidence
+        if not keep.any():
+            detections.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+        cx, cy, w, h = prediction[keep, :4].T
+        score, class_id = score[keep], class_id[keep]
+        xywh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+        # Class-aware NMS, as ultralytics does by default
+        indices = cv2.dnn.NMSBoxesBatched(xywh.tolist(), score.tolist(), class_id.tolist(), confidence, iou)
+        indices = np.asarray(indices, dtype=int).reshape(-1)[:max_detections]
+        boxes = xywh[indices].copy()
+        boxes[:, 2:] += boxes[:, :2]
+        boxes -= (left, top, left, top)
+        boxes /= scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        detections.append(np.column_stack([boxes, score[indices], class_id[indices]]).astype(np.float32))
+    return detections
+
+
+class DetectorBackend:
+    """Runs the object detector on one frame or a list of frames (crops)"""
+
+    name = "base"
+    names: dict = {}
+
+    def __call__(self, source, imgsz: Optional[int] = None, verbose: bool = False) -> List[np.ndarray]:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+
+class TorchDetector(DetectorBackend):
+    """The original ultralytics/PyTorch model"""
+
+    name = "torch"
+
+    def __init__(self, weights: str = DEFAULT_WEIGHTS):
+        from ultralytics import YOLO
+        self.weights = weights
+        self.model = YOLO(weights)
+        self.names = self.model.names
+
+    def __call__(self, source, imgsz: Optional[int] = None, verbose: bool = False) -> List[np.ndarray]:
+        kwargs = {'imgsz': imgsz} if imgsz else {}
+        results = self.model(source, verbose=verbose, **kwargs)
+        detections = []
+        for result in results:
+            if result.boxes is None:
+                detections.append(np.zeros((0, 6), dtype=np.float32))
+                continue
+            data = result.boxes.data.cpu().numpy()  # one device->host copy per image
+            detections.append(data[:, [0, 1, 2, 3, -2, -1]])  # drop the track id column if present
+        return detections
+
+    def describe(self) -> str:
+        return f"torch ({self.weights})"
+
+
+class OnnxDetector(DetectorBackend):
+    """YOLOv8 exported to ONNX (dynamic batch and input size) and run by ONNX Runtime.
+
+    ``DETECTOR_PROVIDERS`` (comma separated) picks execution providers, e.g.
+    ``OpenVINOExecutionProvider,CPUExecutionProvider`` when onnxruntime-openvino
+    is installed.
+    """
+
+    name = "onnx"
+
+    def __init__(self, weights: str = DEFAULT_WEIGHTS, model_path: str = None, imgsz: int = 640):
+        import onnxruntime as ort
+        self.model_path = model_path or onnx_path(weights)
+        if not os.path.exists(self.model_path):
+            export_onnx(weights, imgsz)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = os.getenv('DETECTOR_PROVIDERS', 'CPUExecutionProvider').split(',')
+        self.session = ort.InferenceSession(self.model_path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+
+    def __call__(self, source, imgsz: Optional[int] = None, verbose: bool = False) -> List[np.ndarray]:
+        images = as_batch(source)
+        batch, transforms = preprocess(images, imgsz or self.imgsz)
+        output = self.session.run(None, {self.input_name: batch})[0]
+        return postprocess(output, transforms)
+
+    def describe(self) -> str:
+        return f"{self.name} ({self.model_path}, {self.session.get_providers()[0]})"
+
+
+class Int8OnnxDetector(OnnxDetector):
+    """Statically quantized (INT8 QDQ) ONNX model; build it with ``quantize_onnx``"""
+
+    name = "int8"
+
+    def __init__(self, weights: str = DEFAULT_WEIGHTS, model_path: str = None, imgsz: int = 640):
+        model_path = model_path or int8_path(weights)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found - run: python python/detector_backends.py "
+                                    f"quantize --calibration <clip or frame dir>")
+        super().__init__(weights, model_path, imgsz)
+
+
+def export_onnx(weights: str = DEFAULT_WEIGHTS, imgsz: int = 640) -> str:
+    """Export ``weights`` to ONNX with dynamic batch and input size (crops and batches of frames)"""
+    from ultralytics import YOLO
+    path = YOLO(weights).export(format='onnx', dynamic=True, imgsz=imgsz, simplify=True)
+    print(f"✓ Exported {path}")
+    return path
+
+
+def sample_frames(source: str, count: int = 100) -> List[np.ndarray]:
+    """Up to ``count`` frames spread evenly over a clip or frame directory"""
+    from pipeline import open_replay_source
+    cap = open_replay_source(source)
+    step = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) // count)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def head_nodes(model_path: str) -> List[str]:
+    """Nodes of the Detect head (the last ``/model.N/`` block); kept in float for box accuracy"""
+    import onnx
+    graph = onnx.load(model_path).graph
+    blocks = [int(match.group(1)) for match in (re.match(r'/model\.(\d+)/', node.name) for node in graph.node)
+              if match]
+    if not blocks:
+        return []
+    prefix = f"/model.{max(blocks)}/"
+    return [node.name for node in graph.node if node.name.startswith(prefix)]
+
+
+def quantize_onnx(weights: str = DEFAULT_WEIGHTS, calibration: Sequence[np.ndarray] = (),
+                  imgsz: int = 640, output: str = None) -> str:
+    """Static INT8 quantization calibrated on real camera frames"""
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+    if len(calibration) == 0:
+        raise ValueError("INT8 calibration needs sample frames from the camera")
+    fp32_path = onnx_path(weights)
+    if not os.path.exists(fp32_path):
+        export_onnx(weights, imgsz)
+    output = output or int8_path(weights)
+    input_name = onnx.load(fp32_path, load_external_data=False).graph.input[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.frames = iter(calibration)
+
+        def get_next(self):
+            frame = next(self.frames, None)
+            if frame is None:
+                return None
+            return {input_name: preprocess([frame], imgsz)[0]}
+
+    quantize_static(fp32_path, output, FrameReader(), quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    calibrate_method=CalibrationMethod.MinMax, nodes_to_exclude=head_nodes(fp32_path))
+
+    # Keep the class names (and other export metadata) on the quantized model
+    fp32, int8 = onnx.load(fp32_path), onnx.load(output)
+    del int8.metadata_props[:]
+    int8.metadata_props.extend(fp32.metadata_props)
+    onnx.save(int8, output)
+    print(f"✓ Quantized {output} with {len(calibration)} calibration frames")
+    return output
+
+
+DETECTOR_BACKENDS = {
+    'torch': TorchDetector,
+    'onnx': OnnxDetector,
+    'int8': Int8OnnxDetector,
+}
+
+
+def get_detector(name: str = None, weights: str = None) -> DetectorBackend:
+    """Build the configured detector (``DETECTOR_BACKEND`` env var, default ``torch``).
+
+    ``auto`` uses the fastest model that has already been exported: INT8,
+    then ONNX, then PyTorch.  Nothing is exported implicitly in ``auto`` mode.
+    """
+    name = (name or os.getenv('DETECTOR_BACKEND', 'torch')).lower()
+    weights = weights or os.getenv('DETECTOR_WEIGHTS', DEFAULT_WEIGHTS)
+    if name != 'auto':
+        return DETECTOR_BACKENDS[name](weights)
+    for candidate, path in (('int8', int8_path(weights)), ('onnx', onnx_path(weights))):
+        if os.path.exists(path):
+            try:
+                return DETECTOR_BACKENDS[candidate](weights)
+            except ImportError:
+                break  # onnxruntime not installed
+    return TorchDetector(weights)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / quantize the YOLO detector")
+    parser.add_argument('command', choices=['export', 'quantize'])
+    parser.add_argument('--weights', default=DEFAULT_WEIGHTS)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--calibration', help="clip or frame directory to calibrate INT8 on")
+    parser.add_argument('--frames', type=int, default=100, help="calibration frames to sample")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_onnx(args.weights, args.imgsz)
+    else:
+        if not args.calibration:
+            parser.error("quantize needs --calibration")
+        quantize_onnx(args.weights, sample_frames(args.calibration, args.frames), args.imgsz)
+
+
+if __name__ == "__main__":
+    main()
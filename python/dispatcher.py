@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Callable, Dict, Optional
+
+from metrics import REGISTRY
+
+DispatchRecord = namedtuple('DispatchRecord', ['channel', 'args', 'critical', 'queued_at'])
+
+
+class Channel:
+    """One bounded queue and the worker thread that drains it.
+
+    When the queue is full the oldest non-critical record is dropped to
+    make room; if every queued record is critical, a new non-critical one
+    is dropped instead.  A critical record is never dropped.  The handler
+    is retried up to ``retries`` times, with a doubling delay, whenever it
+    raises or returns False.
+    """
+
+    def __init__(self, name: str, handler: Callable[..., Optional[bool]], capacity: int = 100,
+                 retries: int = 0, backoff: float = 1.0, stream: str = "0"):
+        self.name = name
+        self.stream = stream
+        self.handler = handler
+        self.capacity = capacity
+        self.retries = retries
+        self.backoff = backoff
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.closing = False
+        self.busy = False
+        self.counts = {'delivered': 0, 'retried': 0, 'failed': 0, 'dropped': 0}
+        self.latency = REGISTRY.histogram('dispatch_latency_seconds', "Time from enqueue to delivery",
+                                          stream=stream, channel=name)
+        REGISTRY.gauge('dispatch_queue_depth', lambda: len(self.queue), "Records waiting per channel",
+                       stream=stream, channel=name)
+        self.thread = threading.Thread(target=self.run, name=f"dispatch-{name}", daemon=True)
+        self.thread.start()
+
+    def count(self, outcome: str):
+        self.counts[outcome] += 1
+        REGISTRY.counter('dispatch_total', "Dispatched records by outcome", stream=self.stream,
+                         channel=self.name, outcome=outcome).inc()
+
+    def put(self, record: DispatchRecord) -> bool:
+        """Enqueue without blocking; False when the record was dropped"""
+        with self.condition:
+            if self.closing:
+                self.count('dropped')
+                return False
+            if len(self.queue) >= self.capacity:
+                victim = next((queued for queued in self.queue if not queued.critical), None)
+                if victim is not None:
+                    self.queue.remove(victim)
+                    self.count('dropped')
+                    if self.counts['dropped'] % 100 == 1:  # first drop, then every 100th
+                        print(f"⚠ Dispatch {self.name} queue full, dropping oldest "
+                              f"({self.counts['dropped']} dropped so far)")
+                elif not record.critical:
+                    self.count('dropped')
+                    return False
+                # else: only critical records queued; let the queue grow past capacity
+            self.queue.append(record)
+            self.condition.notify()
+        return True
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closing:
+                    self.condition.wait()
+                if not self.queue:
+                    return  # closing and drained
+                record = self.queue.popleft()
+                self.busy = True
+            try:
+                self.deliver(record)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def deliver(self, record: DispatchRecord):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                ok = self.handler(*record.args) is not False
+                error = None
+            except Exception as e:
+                ok, error = False, e
+            if ok:
+                self.count('delivered')
+                self.latency.observe(time.time() - record.queued_at)
+                return
+            if attempt < self.retries:
+                self.count('retried')
+                if not self.closing:  # when flushing, retry at once rather than wait out the backoff
+                    time.sleep(delay)
+                    delay *= 2
+        self.count('failed')
+        print(f"⚠ Dispatch {self.name} failed after {self.retries + 1} attempts: {error or 'handler returned False'}")
+
+    def stop(self):
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+
+    def close(self, deadline: float) -> int:
+        """Stop accepting, drain until ``deadline`` (monotonic); returns records left undelivered"""
+        self.stop()
+        self.thread.join(max(0.0, deadline - time.monotonic()))
+        with self.condition:
+            return len(self.queue) + (1 if self.busy else 0)
+
+    def stats(self) -> dict:
+        return dict(self.counts, queued=len(self.queue))
+
+
+class EventDispatcher:
+    """Moves persistence, SMS and speech off the frame loop.
+
+    ``submit()`` only appends a small record to the channel's bounded queue;
+    each channel has its own worker thread, so a slow MongoDB insert never
+    delays an SMS and neither delays the camera.  ``close()`` flushes what
+    is queued before shutdown.
+    """
+
+    def __init__(self, stream: str = "0"):
+        self.stream = stream
+        self.channels: Dict[str, Channel] = {}
+
+    def add_channel(self, name: str, handler: Callable[..., Optional[bool]], capacity: int = 100,
+                    retries: int = 0, backoff: float = 1.0) -> Channel:
+        self.channels[name] = Channel(name, handler, capacity, retries, backoff, self.stream)
+        return self.channels[name]
+
+    def submit(self, channel: str, *args, critical: bool = False) -> bool:
+        return self.channels[channel].put(DispatchRecord(channel, args, critical, time.time()))
+
+    def close(self, timeout: float = 10.0) -> Dict[str, int]:
+        """Flush every channel within ``timeout`` seconds in total; returns what was left per channel"""
+        deadline = time.monotonic() + timeout
+        for channel in self.channels.values():
+            channel.stop()  # all channels drain in parallel
+        return {name: channel.close(deadline) for name, channel in self.channels.items()}
+
+    def stats(self) -> dict:
+        return {name: channel.stats() for name, channel in self.channels.items()}
@@ -0,0 +1,243 @@
+"""Fall and consumption rules as a pure state machine.
+
+``EventEngine.update(timestamp, landmarks, detections)`` returns the events
+the inputs trigger and never touches the camera, clock, database or SMS, so
+the same rules drive ``LiveCameraOCR`` and ``bodydetect.main`` and a recorded
+trace replays at thousands of frames per second to tune thresholds:
+
+    python python/event_engine.py trace.jsonl --set fall_timeout=3,5,8 --set consuming_distance=120,150
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# kind: status / fall / pill_reminder / consumed; details is a dict
+Event = namedtuple('Event', ['time', 'kind', 'name', 'details'])
+
+CATEGORIES = ('pills', 'water', 'food')
+
+# category -> (logged as "consumed <label>", SMSService method)
+CONSUMED = {
+    'pills': ('pill', 'send_pill_consumed_sms'),
+    'water': ('water', 'send_water_consumed_sms'),
+    'food': ('food', 'send_food_consumed_sms'),
+}
+
+
+def meal_time(timestamp: float) -> str:
+    """Breakfast, lunch or dinner at ``timestamp`` (local time)"""
+    hour = datetime.fromtimestamp(timestamp).hour
+    if 6 <= hour < 11:
+        return "breakfast"
+    elif 11 <= hour < 15:
+        return "lunch"
+    return "dinner"
+
+
+def landmark_distance(landmarks: Sequence, p1: int, p2: int) -> float:
+    """Pixel distance between two ``findPosition`` rows (``[id, x, y]``)"""
+    x1, y1 = landmarks[p1][1:3]
+    x2, y2 = landmarks[p2][1:3]
+    return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+
+class EventEngine:
+    """Pose status, fall and consumption rules; all state and thresholds live here.
+
+    ``landmarks`` is a ``findPosition`` list (empty = nobody in view, None =
+    pose was not run this frame).  ``detections`` holds the object types in
+    view (None = no detection result to check).
+    """
+
+    PARAMETERS = ('headfoot_min', 'upright_margin', 'consuming_distance', 'fall_timeout', 'missing_after',
+                  'quick_reappear', 'status_cooldown', 'water_sms_cooldown', 'food_cooldown')
+
+    def __init__(self, start_time: float = 0.0, headfoot_min: float = 150, upright_margin: float = 15,
+                 consuming_distance: float = 150, fall_timeout: float = 5.0, missing_after: float = 1.0,
+                 quick_reappear: float = 3.0, status_cooldown: float = 5.0, water_sms_cooldown: float = 30.0,
+                 food_cooldown: float = 1800.0):
+        self.headfoot_min = headfoot_min  # eye-to-ankle pixels for someone upright
+        self.upright_margin = upright_margin
+        self.consuming_distance = consuming_distance  # mouth-to-hand pixels while eating/drinking
+        self.fall_timeout = fall_timeout
+        self.missing_after = missing_after
+        self.quick_reappear = quick_reappear
+        self.status_cooldown = status_cooldown  # also the gap between consumption/reminder events
+        self.water_sms_cooldown = water_sms_cooldown
+        self.food_cooldown = food_cooldown
+
+        self.status = "idle"
+        self.pose_time = start_time  # last frame that was not upright
+        self.first_body_time = None
+        self.last_status_time = 0
+        self.last_reminder_time = 0
+        self.last_consumption_time = 0
+        self.last_food_consumption_time = 0
+        self.last_food_sms_time = 0
+        self.last_water_sms_time = 0
+
+    def update(self, timestamp: float, landmarks: Optional[Sequence] = None,
+               detections: Optional[Iterable[str]] = None) -> List[Event]:
+        events = []
+        if landmarks is not None:
+            self.update_pose(timestamp, landmarks, events)
+        if detections is not None:
+            self.check_consumption(timestamp, detections, events)
+        return events
+
+    def set_status(self, timestamp: float, status: str, events: List[Event], reason: str = None):
+        """Change status; announce it if it changed or the last announcement is old"""
+        if status == self.status and timestamp - self.last_status_time <= self.status_cooldown:
+            return
+        self.status = status
+        self.last_status_time = timestamp
+        if reason:
+            events.append(Event(timestamp, 'fall', status, {'reason': reason}))
+        else:
+            events.append(Event(timestamp, 'status', status, {}))
+
+    def update_pose(self, timestamp: float, landmarks: Sequence, events: List[Event]):
+        if not landmarks:
+            if self.first_body_time is None:
+                self.first_body_time = timestamp
+                self.status = "body_missing"
+            elif timestamp - self.first_body_time > self.missing_after and self.status not in ("fallen", "body_missing"):
+                self.status = "body_missing"
+                self.last_status_time = timestamp
+                events.append(Event(timestamp, 'status', self.status, {}))
+            return
+
+        if self.first_body_time is None:
+            self.first_body_time = timestamp
+        elif self.status == "body_missing" and timestamp - self.first_body_time < self.quick_reappear:
+            self.set_status(timestamp, "fallen", events, reason="body disappeared quickly")
+
+        if (landmark_distance(landmarks, 2, 27) > self.headfoot_min and
+                landmarks[2][2] - landmarks[27][2] < self.upright_margin):
+            if landmark_distance(landmarks, 9, 19) < self.consuming_distance:
+                new_status = "consuming"
+            else:
+                new_status = "standing"
+            if new_status != self.status or timestamp - self.last_status_time > self.status_cooldown:
+                self.status = new_status
+                self.last_status_time = timestamp
+                events.append(Event(timestamp, 'status', new_status, {}))
+            return
+
+        if timestamp - self.pose_time > self.fall_timeout:
+            self.set_status(timestamp, "fallen", events, reason="pose detection")
+        else:
+            self.status = "idle"
+        self.pose_time = timestamp
+
+    def check_consumption(self, timestamp: float, detections: Iterable[str], events: List[Event]):
+        present = set(detections)
+        if (self.status == "standing" and 'pills' in present and
+                timestamp - self.last_reminder_time > self.status_cooldown):
+            events.append(Event(timestamp, 'pill_reminder', "pill reminder", {
+                'day_of_week': datetime.fromtimestamp(timestamp).strftime("%A"),
+                'meal_time': meal_time(timestamp),
+            }))
+            self.last_reminder_time = timestamp
+            return
+        if self.status != "consuming" or timestamp - self.last_consumption_time <= self.status_cooldown:
+            return
+
+        category = next((c for c in CATEGORIES if c in present), None)
+        if category is None:
+            return
+        label, sms = CONSUMED[category]
+        if category == 'water':
+            if timestamp - self.last_water_sms_time > self.water_sms_cooldown:
+                self.last_water_sms_time = timestamp
+            else:
+                sms = None
+        elif category == 'food':
+            send = False
+            if timestamp - self.last_food_consumption_time > self.food_cooldown:
+                if timestamp - self.last_food_sms_time > self.food_cooldown:
+                    self.last_food_sms_time = timestamp
+                    send = True
+                self.last_food_consumption_time = timestamp
+            sms = sms if send else None
+        events.append(Event(timestamp, 'consumed', f"consumed {label}", {'category': category, 'sms': sms}))
+        self.last_consumption_time = timestamp
+
+
+def trace_line(timestamp: float, landmarks: Optional[Sequence] = None,
+               detections: Optional[Iterable[str]] = None) -> str:
+    """One JSON line of engine input, as read back by ``iter_trace``"""
+    record = {'t': timestamp}
+    if landmarks is not None:
+        record['landmarks'] = [list(row) for row in landmarks]
+    if detections is not None:
+        record['detections'] = list(detections)
+    return json.dumps(record, separators=(',', ':')) + "\n"
+
+
+def iter_trace(path: str) -> Iterator[dict]:
+    """Engine inputs from a ``--trace`` JSON-lines file or a ``--record`` recording, streamed"""
+    if os.path.isdir(path) or path.endswith('.rec'):
+        from recording import engine_inputs
+        yield from engine_inputs(path)
+        return
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay_trace(records: Iterable[dict], **parameters) -> Tuple[List[Event], int]:
+    """Run a trace through a fresh engine; returns every event and the number of records"""
+    engine = None
+    events = []
+    count = 0
+    for record in records:
+        if engine is None:
+            engine = EventEngine(start_time=record['t'], **parameters)
+        events.extend(engine.update(record['t'], record.get('landmarks'), record.get('detections')))
+        count += 1
+    return events, count
+
+
+def parse_setting(text: str):
+    name, _, values = text.partition('=')
+    if name not in EventEngine.PARAMETERS:
+        raise argparse.ArgumentTypeError(f"unknown parameter {name!r} (one of {', '.join(EventEngine.PARAMETERS)})")
+    return name, [float(value) for value in values.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded engine trace with different thresholds")
+    parser.add_argument('trace', help="JSON lines written by --trace, or a --record file/directory")
+    parser.add_argument('--set', dest='settings', type=parse_setting, action='append', default=[],
+                        metavar='NAME=V1[,V2...]', help="threshold to override; several values are swept")
+    parser.add_argument('--events', action='store_true', help="print every event of each run")
+    args = parser.parse_args()
+
+    names = [name for name, _ in args.settings]
+    for values in itertools.product(*[values for _, values in args.settings]):
+        parameters = dict(zip(names, values))
+        start = time.perf_counter()
+        events, records = replay_trace(iter_trace(args.trace), **parameters)
+        elapsed = time.perf_counter() - start
+        counts = Counter(event.name if event.kind != 'fall' else f"fallen ({event.details['reason']})"
+                         for event in events if event.kind != 'status')
+        label = ', '.join(f"{name}={value:g}" for name, value in parameters.items()) or "defaults"
+        rate = records / elapsed if elapsed > 0 else float('inf')
+        print(f"\n🎯 {label}  ({records} records, {rate:,.0f} records/s)")
+        for name, count in sorted(counts.items()):
+            print(f"  {name:<40}{count:>6}")
+        if args.events:
+            for event in events:
+                print(f"  {datetime.fromtimestamp(event.time):%H:%M:%S}  {event.kind:<14}{event.name}")
+
+
+if __name__ == "__main__":
+    main()
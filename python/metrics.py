@@ -0,0 +1,290 @@
+"""In-process metrics for the camera pipeline.
+
+Hot-path functions are wrapped with ``@timed('name')``, which records a
+latency histogram (and therefore a call count) per function.  Counters can be
+bumped directly, and values that already live elsewhere (cache hits, queue
+depths) are registered as callbacks that are only read at export time.
+
+Export is pull-based: ``serve(port)`` answers ``/metrics`` (Prometheus text)
+and ``/metrics.json`` on localhost, and ``write_file(path)`` /
+``start_file_export(path)`` dump a snapshot to disk.
+
+Set ``METRICS=0`` to turn everything off: ``@timed`` then returns the
+function unchanged, counters and histograms are shared no-ops that take no
+lock, and gauges and exporters are not registered, so disabled metrics cost
+nothing per call.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+# Upper bounds in seconds: 0.5 ms .. 2 s covers everything from keyword matching to YOLO on CPU
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: cumulative on export)"""
+
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Bucket upper bound that contains the given fraction of observations"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        return {
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else 0.0,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], counts)),
+        }
+
+
+class NullCounter(Counter):
+    """Counter handed out by a disabled registry; ``inc`` does nothing"""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        pass
+
+
+class NullHistogram(Histogram):
+    """Histogram handed out by a disabled registry; stays empty"""
+
+    def observe(self, value: float):
+        pass
+
+
+NULL_METRICS = {Counter: NullCounter(), Histogram: NullHistogram()}
+
+
+class CallbackGauge:
+    """Value read from ``fn()`` at export time (queue depths, cache hit counts, ...)"""
+
+    def __init__(self, fn: Callable[[], float], kind: str = "gauge"):
+        self.fn = fn
+        self.kind = kind
+
+    def snapshot(self):
+        try:
+            return self.fn()
+        except Exception:
+            return None
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, Dict[tuple, object]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _get(self, name: str, kind: type, factory: Callable, help: str, labels: dict):
+        if not self.enabled:
+            return NULL_METRICS[kind]
+        key = _label_key(labels)
+        with self._lock:
+            family = self._metrics.setdefault(name, {})
+            if help:
+                self._help.setdefault(name, help)
+            metric = family.get(key)
+            if metric is None:
+                metric = family[key] = factory()
+            return metric
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get(name, Counter, Counter, help, labels)
+
+    def histogram(self, name: str, help: str = "", buckets=LATENCY_BUCKETS, **labels) -> Histogram:
+        return self._get(name, Histogram, lambda: Histogram(buckets), help, labels)
+
+    def gauge(self, name: str, fn: Callable[[], float], help: str = "", kind: str = "gauge", **labels):
+        """Register (or replace) a value that is sampled only when metrics are exported"""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._metrics.setdefault(name, {})[key] = CallbackGauge(fn, kind)
+            if help:
+                self._help.setdefault(name, help)
+
+    def timed(self, name: str, help: str = ""):
+        """Decorator recording the wrapped function's latency as ``<name>_seconds``"""
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            histogram = self.histogram(f"{name}_seconds", help or f"Latency of {name}")
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            families = {name: dict(family) for name, family in self._metrics.items()}
+        result = {}
+        for name, family in families.items():
+            for key, metric in family.items():
+                label_text = _format_labels(key)
+                result[name + label_text] = metric.snapshot()
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            families = {name: dict(family) for name, family in self._metrics.items()}
+        for name, family in sorted(families.items()):
+            if not family:
+                continue
+            kind = next(iter(family.values())).kind
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in family.items():
+                if isinstance(metric, Histogram):
+                    data = metric.snapshot()
+                    running = 0
+                    for bound, count in data['buckets'].items():
+                        running += count
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {running}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {data['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {data['count']}")
+                else:
+                    value = metric.snapshot()
+                    if value is not None:
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str):
+        """Atomically write a snapshot; ``.prom`` files get Prometheus text, anything else JSON"""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def start_file_export(self, path: str, interval: float = 5.0) -> Optional[threading.Thread]:
+        """Rewrite ``path`` every ``interval`` seconds from a daemon thread"""
+        if not self.enabled:
+            return None
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_file(path)
+                except OSError as e:
+                    print(f"⚠ Could not write metrics to {path}: {e}")
+
+        thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+        thread.start()
+        return thread
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Serve ``/metrics`` (Prometheus) and ``/metrics.json`` on a local port"""
+        if not self.enabled or self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body, content_type = registry.to_json(), 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # keep the console for the camera output
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+REGISTRY = MetricsRegistry(enabled=os.getenv('METRICS', '1') != '0')
+timed = REGISTRY.timed
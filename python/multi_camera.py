@@ -0,0 +1,143 @@
+import os
+from typing import List
+
+import cv2
+
+from camera_ocr import LiveCameraOCR
+from ocr_worker import OCRWorkerPool
+from pipeline import FrameGrabber, FPSMeter
+from pose_roi import crop_windows, inference_size
+from detector_backends import get_detector
+
+
+class MultiCameraOCR:
+    """Watch several cameras from one process with a single, batched YOLO model.
+
+    Every stream keeps its own ``LiveCameraOCR`` (capture, pose detector and
+    event state); the detector and the OCR worker processes are shared.  Each
+    stream's scheduler decides whether it needs YOLO this tick, and the frames
+    of all streams that do are sent through one ``model([...])`` call.
+    """
+
+    def __init__(self, sources: List, patient_id: str = "default_patient",
+                 adaptive: bool = True, skip_static_pose: bool = False, roi_mode: bool = False,
+                 detector: str = None, pose_complexity=1, pose_budget_ms: float = 30.0):
+        self.model = get_detector(detector)
+        # One set of Tesseract processes for every camera, with the per-stream queue limit scaled up
+        self.ocr_pool = OCRWorkerPool(max_pending=8 * len(sources))
+        self.streams = [
+            LiveCameraOCR(patient_id, source=source, model=self.model, stream_name=f"cam{i}:{source}",
+                          adaptive=adaptive, skip_static_pose=skip_static_pose, roi_mode=roi_mode,
+                          pose_complexity=pose_complexity, pose_budget_ms=pose_budget_ms, ocr_pool=self.ocr_pool)
+            for i, source in enumerate(sources)
+        ]
+        self.fps_meters = [FPSMeter() for _ in self.streams]
+        self.batch_count = 0
+
+    def start_trace(self, path: str):
+        """Event-engine trace per stream: ``trace.jsonl`` becomes ``trace-cam0.jsonl``, ``trace-cam1.jsonl``, ..."""
+        root, ext = os.path.splitext(path)
+        for i, stream in enumerate(self.streams):
+            stream.event_trace = open(f"{root}-cam{i}{ext}", 'w')
+
+    def start_recording(self, directory: str):
+        """Frame recording per stream, in ``directory/cam0``, ``directory/cam1``, ..."""
+        for i, stream in enumerate(self.streams):
+            stream.start_recording(os.path.join(directory, f"cam{i}"))
+
+    def detect_batch(self, streams: List[LiveCameraOCR], frames: list):
+        """One YOLO call for all full frames (and one for all ROI crops), results handed back to their own stream"""
+        full, cropped = [], []
+        for stream, frame in zip(streams, frames):
+            windows = stream.detection_windows(frame)
+            if windows:
+                cropped.append((stream, frame, windows))
+            else:
+                full.append((stream, frame))
+
+        if full:
+            results = self.model([frame for _, frame in full], verbose=False)
+            for (stream, frame), result in zip(full, results):
+                stream.last_detections = stream.parse_detections([result], frame)
+            self.batch_count += 1
+
+        if cropped:
+            crops = [crop for _, frame, windows in cropped for crop in crop_windows(frame, windows)]
+            results = iter(self.model(crops, imgsz=inference_size(crops), verbose=False))
+            for stream, frame, windows in cropped:
+                stream_results = [next(results) for _ in windows]
+                stream.last_detections = stream.parse_detections(stream_results, frame,
+                                                                 offsets=[(x1, y1) for x1, y1, _, _ in windows])
+            self.batch_count += 1
+
+    def run(self):
+        opened = [stream for stream in self.streams if stream.cap.isOpened()]
+        for stream in self.streams:
+            if stream not in opened:
+                print(f"Error: Could not open source {stream.source}")
+        if not opened:
+            return
+
+        grabbers = {id(stream): FrameGrabber(stream.cap, name=stream.stream_name).start() for stream in opened}
+        last_ids = {id(stream): 0 for stream in opened}
+
+        try:
+            while True:
+                # Newest frame from every stream that produced one since last time
+                ready = []
+                for stream in opened:
+                    grabber = grabbers[id(stream)]
+                    packet = grabber.read(last_ids[id(stream)], timeout=0.0)
+                    if packet is not None:
+                        last_ids[id(stream)] = packet.frame_id
+                        ready.append((stream, packet))
+
+                if not ready:
+                    if all(grabbers[id(stream)].failed for stream in opened):
+                        print("Error: All sources stopped producing frames")
+                        break
+                    if cv2.waitKey(5) & 0xFF in (ord('q'), 27):
+                        break
+                    continue
+
+                decisions = {}
+                for stream, packet in ready:
+                    decision = decisions[id(stream)] = stream.scheduler.update(packet.frame, stream.pose_status)
+                    stream.advance_tracks(packet.frame, predict=decision.moving)
+                wanted = [(stream, packet) for stream, packet in ready if decisions[id(stream)].detect]
+                if wanted:
+                    self.detect_batch([stream for stream, _ in wanted], [packet.frame for _, packet in wanted])
+
+                for stream, packet in ready:
+                    stream.frame_count += 1
+                    if decisions[id(stream)].pose:
+                        annotated_frame = stream.process_pose_detection(packet.frame.copy())
+                    else:
+                        annotated_frame = stream.draw_pose_status(packet.frame.copy())
+                    stream.check_consumption_event()
+                    stream.record_frame(stream.pose_landmarks if decisions[id(stream)].pose else None)
+                    stream.startup.mark('first_frame')
+                    annotated_frame = stream.draw_detections(annotated_frame, stream.last_detections, show_ocr=False)
+
+                    fps = self.fps_meters[self.streams.index(stream)].tick(packet.timestamp)
+                    cv2.putText(annotated_frame, f"{stream.stream_name}  {fps:.1f} FPS", (10, 55),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+                    cv2.imshow(f"Live Camera OCR - {stream.stream_name}", annotated_frame)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:
+                    break
+        finally:
+            for grabber in grabbers.values():
+                grabber.stop()
+            self.print_stream_stats(grabbers)
+            for stream in self.streams:
+                stream.cleanup()
+            self.ocr_pool.shutdown()
+
+    def print_stream_stats(self, grabbers: dict):
+        print(f"📈 Multi-camera: {self.batch_count} batched YOLO calls")
+        for stream, meter in zip(self.streams, self.fps_meters):
+            grabber = grabbers.get(id(stream))
+            dropped = grabber.dropped if grabber else 0
+            print(f"   {stream.stream_name}: {meter.frames} frames, {meter.fps:.1f} FPS, {dropped} dropped")
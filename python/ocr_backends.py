@@ -0,0 +1,183 @@
+import os
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Padding between tiles (and around the canvas) when several ROIs are read in one call
+TILE_PADDING = 12
+
+
+def configure_tesseract():
+    import pytesseract
+    # Set Tesseract path for macOS (installed via Homebrew)
+    if os.path.exists('/opt/homebrew/bin/tesseract'):
+        pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+    else:
+        pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+
+def tile_rois(rois: Sequence[np.ndarray], padding: int = TILE_PADDING) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Stack BGR crops vertically on a white canvas.
+
+    Returns the RGB canvas and the (top, bottom) row span of every tile, so
+    words found on the canvas can be assigned back to the ROI they came from.
+    """
+    width = max(roi.shape[1] for roi in rois) + 2 * padding
+    height = sum(roi.shape[0] for roi in rois) + padding * (len(rois) + 1)
+    canvas = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    spans = []
+    y = padding
+    for roi in rois:
+        h, w = roi.shape[:2]
+        canvas[y:y + h, padding:padding + w] = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
+        spans.append((y, y + h))
+        y += h + padding
+    return canvas, spans
+
+
+def split_words_by_tile(words: Sequence[Tuple[str, int, int, int, int]],
+                        spans: Sequence[Tuple[int, int]]) -> List[str]:
+    """Assign ``(text, left, top, width, height)`` words to tiles by vertical centre"""
+    per_tile = [[] for _ in spans]
+    for text, left, top, width, height in words:
+        text = text.strip()
+        if not text:
+            continue
+        centre = top + height / 2.0
+        for i, (y0, y1) in enumerate(spans):
+            if y0 - TILE_PADDING / 2.0 <= centre < y1 + TILE_PADDING / 2.0:
+                per_tile[i].append((top // 10, left, text))  # coarse line, then left to right
+                break
+    return [' '.join(text for _, _, text in sorted(tile)) for tile in per_tile]
+
+
+class OCRBackend:
+    """Reads text from small BGR crops.
+
+    ``recognize`` handles one ROI; ``recognize_batch`` may tile several ROIs
+    into one image so the engine is invoked once per batch.
+    """
+
+    name = "base"
+
+    def version(self) -> str:
+        """Engine version; raises when the engine is not actually usable"""
+        raise NotImplementedError
+
+    def recognize(self, roi: np.ndarray) -> str:
+        raise NotImplementedError
+
+    def recognize_batch(self, rois: Sequence[np.ndarray]) -> List[str]:
+        return [self.recognize(roi) for roi in rois]
+
+    def close(self):
+        pass
+
+
+class PytesseractBackend(OCRBackend):
+    """Fallback: one tesseract subprocess per call"""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+        self.pytesseract = pytesseract
+        configure_tesseract()
+
+    def version(self) -> str:
+        return str(self.pytesseract.get_tesseract_version())
+
+    def recognize(self, roi: np.ndarray) -> str:
+        try:
+            roi_pil = Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
+            # Fastest OCR configuration
+            return self.pytesseract.image_to_string(roi_pil, config='--psm 8').strip()
+        except Exception:
+            return ""
+
+    def recognize_batch(self, rois: Sequence[np.ndarray]) -> List[str]:
+        if len(rois) <= 1:
+            return [self.recognize(roi) for roi in rois]
+        canvas, spans = tile_rois(rois)
+        try:
+            data = self.pytesseract.image_to_data(Image.fromarray(canvas), config='--psm 6',
+                                                  output_type=self.pytesseract.Output.DICT)
+        except Exception:
+            return ["" for _ in rois]
+        words = zip(data['text'], data['left'], data['top'], data['width'], data['height'])
+        return split_words_by_tile(list(words), spans)
+
+
+class TesserocrBackend(OCRBackend):
+    """Long-lived in-process engine via the tesserocr C-API binding.
+
+    The language model is loaded once; every call only swaps the image.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_WORD)
+
+    def version(self) -> str:
+        return self.tesserocr.tesseract_version().splitlines()[0]
+
+    def recognize(self, roi: np.ndarray) -> str:
+        try:
+            self.api.SetPageSegMode(self.tesserocr.PSM.SINGLE_WORD)
+            self.api.SetImage(Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)))
+            return self.api.GetUTF8Text().strip()
+        except Exception:
+            return ""
+
+    def recognize_batch(self, rois: Sequence[np.ndarray]) -> List[str]:
+        if len(rois) <= 1:
+            return [self.recognize(roi) for roi in rois]
+        canvas, spans = tile_rois(rois)
+        words = []
+        try:
+            self.api.SetPageSegMode(self.tesserocr.PSM.SINGLE_BLOCK)
+            self.api.SetImage(Image.fromarray(canvas))
+            self.api.Recognize()
+            level = self.tesserocr.RIL.WORD
+            iterator = self.api.GetIterator()
+            while True:
+                box = iterator.BoundingBox(level)
+                text = iterator.GetUTF8Text(level)
+                if box is not None and text:
+                    x1, y1, x2, y2 = box
+                    words.append((text, x1, y1, x2 - x1, y2 - y1))
+                if not iterator.Next(level):
+                    break
+        except Exception:
+            return ["" for _ in rois]
+        return split_words_by_tile(words, spans)
+
+    def close(self):
+        self.api.End()
+
+
+OCR_BACKENDS = {
+    'tesserocr': TesserocrBackend,
+    'pytesseract': PytesseractBackend,
+}
+
+
+def get_ocr_backend(name: str = None) -> OCRBackend:
+    """Build the configured backend (``OCR_BACKEND`` env var, default ``auto``).
+
+    ``auto`` prefers the persistent tesserocr engine and falls back to
+    pytesseract when the binding is not installed.
+    """
+    name = (name or os.getenv('OCR_BACKEND', 'auto')).lower()
+    if name != 'auto':
+        return OCR_BACKENDS[name]()
+    try:
+        return TesserocrBackend()
+    except Exception:
+        return PytesseractBackend()
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Rough per-entry bookkeeping cost (entry object, dict slot, bbox tuple)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def roi_hash(roi: np.ndarray) -> int:
+    """64-bit difference hash (dHash) of an image region.
+
+    Compares neighbouring pixels of a 9x8 grayscale thumbnail, so small
+    shifts, lighting changes and JPEG noise barely change the hash.
+    """
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    thumb = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def bbox_iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+class _Entry:
+    __slots__ = ('phash', 'bbox', 'text', 'created', 'size')
+
+    def __init__(self, phash, bbox, text, created):
+        self.phash = phash
+        self.bbox = bbox
+        self.text = text
+        self.created = created
+        self.size = ENTRY_OVERHEAD_BYTES + len(text.encode('utf-8'))
+
+
+class OCRCache:
+    """LRU cache of Tesseract results keyed on what the region looks like.
+
+    A lookup hits when a stored entry has a perceptual hash within
+    ``max_hamming`` bits *and* overlaps the query box by at least ``min_iou``,
+    so an object that moved a few pixels reuses its earlier OCR text.
+    Entries expire after ``ttl`` seconds and the cache is bounded by both
+    entry count and (approximate) bytes.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024, ttl: float = 30.0,
+                 max_hamming: int = 6, min_iou: float = 0.5, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_hamming = max_hamming
+        self.min_iou = min_iou
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, phash: int, bbox: Tuple[int, int, int, int]) -> Optional[str]:
+        with self._lock:
+            self._expire(self.clock())
+            # Most recently used first - the same object is usually the last one seen
+            for key in reversed(self._entries):
+                entry = self._entries[key]
+                if bbox_iou(bbox, entry.bbox) >= self.min_iou and hamming(phash, entry.phash) <= self.max_hamming:
+                    entry.bbox = bbox  # follow the object as it moves
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.text
+            self.misses += 1
+            return None
+
+    def put(self, phash: int, bbox: Tuple[int, int, int, int], text: str):
+        entry = _Entry(phash, bbox, text, self.clock())
+        with self._lock:
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            self.bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+
+    def _expire(self, now: float):
+        # Entries are in LRU order, not creation order, so check them all
+        expired = [key for key, entry in self._entries.items() if now - entry.created > self.ttl]
+        for key in expired:
+            self.bytes -= self._entries.pop(key).size
+            self.expirations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
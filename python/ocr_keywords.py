@@ -0,0 +1,147 @@
+import re
+from typing import Dict, FrozenSet, Iterable
+
+# OCR vocabulary used by LiveCameraOCR.classify_object.  Each tag is one of
+# the keyword lists the classifier checks; matching is plain substring
+# matching on the lower-cased OCR text, exactly like ``word in text``.
+
+MEDICINE_KEYWORDS = [
+    'mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'dose', 'capsule',
+    'ibuprofen', 'aspirin', 'tylenol', 'advil', 'aleve', 'motrin', 'bayer',
+    'prescription', 'drug', 'medication', 'supplement', 'capsules', 'pills',
+    'tablets', 'softgel', 'gel cap', 'gelcap', 'caplet', 'pharmacy', 'pharma',
+    'mcg', 'iu', 'international unit', 'milligram', 'microgram', 'dosage',
+    'strength', 'potency', 'expiry', 'exp', 'lot', 'ndc', 'usp', 'otc'
+]
+
+# Pill bottles: label text also carries dosing instructions and drug names
+MEDICINE_BOTTLE_KEYWORDS = MEDICINE_KEYWORDS + [
+    'take with food', 'take daily', 'twice daily', 'morning', 'evening',
+    'acetaminophen', 'naproxen', 'diphenhydramine', 'loratadine', 'cetirizine',
+    'omeprazole', 'ranitidine', 'simvastatin', 'lisinopril', 'metformin',
+    'count', 'ct', 'tablets', 'caps', 'gelcaps', 'softgels', 'warning', 'directions'
+]
+
+MEDICINE_LABEL_KEYWORDS = MEDICINE_KEYWORDS + ['count', 'ct', 'warning', 'directions', 'daily', 'twice']
+MEDICINE_PACKAGE_KEYWORDS = ['pill', 'tablet', 'vitamin', 'medicine', 'capsule', 'mg']
+MEDICINE_COMPACT_KEYWORDS = ['mg', 'pill', 'tablet', 'vitamin', 'medicine', 'rx', 'capsule', 'count', 'ct']
+
+# Food words checked while the patient is consuming
+FOOD_CONSUMING_KEYWORDS = [
+    'muffin', 'cupcake', 'cake', 'bagel', 'pastry', 'croissant', 'danish', 'scone', 'biscuit',
+    'sandwich', 'burger', 'pizza', 'bread', 'donut', 'cookie', 'brownie', 'bar', 'energy bar',
+    'chips', 'crackers', 'cookies', 'cereal', 'snack', 'candy', 'chocolate', 'granola', 'pretzel',
+    'fruit', 'apple', 'banana', 'orange', 'grape', 'berry', 'nuts', 'trail mix', 'jerky',
+    'cheese', 'yogurt', 'pudding', 'ice cream', 'frozen', 'fresh', 'bakery', 'baked',
+    'wrapper', 'wrapped', 'packaging', 'packaged', 'food'
+]
+
+# Food words (including brands) printed on packages
+FOOD_PACKAGE_KEYWORDS = [
+    'chips', 'crackers', 'cookies', 'cereal', 'snack', 'candy', 'chocolate', 'granola', 'pretzel', 'popcorn',
+    'muffin', 'cupcake', 'cake', 'bagel', 'pastry', 'croissant', 'danish', 'scone', 'biscuit',
+    'sandwich', 'burger', 'pizza', 'bread', 'donut', 'cookie', 'brownie', 'bar', 'energy bar',
+    'fruit', 'apple', 'banana', 'orange', 'grape', 'berry', 'nuts', 'trail mix', 'jerky',
+    'cheese', 'yogurt', 'pudding', 'ice cream', 'frozen', 'fresh', 'bakery', 'baked',
+    'wrapper', 'wrapped', 'packaging', 'packaged', 'foil', 'plastic', 'peel', 'skin',
+    'hostess', 'little debbie', 'entenmann', 'pepperidge farm', 'nabisco', 'kellogg',
+    'organic', 'natural', 'gluten free', 'whole grain', 'multigrain', 'wheat', 'oat'
+]
+
+FOOD_KEYWORDS = FOOD_PACKAGE_KEYWORDS + ['food']
+FOOD_LABEL_KEYWORDS = ['muffin', 'cupcake', 'cake', 'food', 'bakery', 'baked', 'pastry', 'snack']
+FOOD_COMPACT_KEYWORDS = ['muffin', 'cake', 'food', 'snack']
+
+BEVERAGE_KEYWORDS = ['water', 'juice', 'soda', 'cola', 'drink', 'beverage', 'ml', 'fl oz', 'liter']
+BEVERAGE_PACKAGE_KEYWORDS = ['juice', 'milk', 'water', 'drink', 'soda', 'cola', 'beverage',
+                             'apple juice', 'orange juice', 'grape juice']
+BEVERAGE_BRAND_KEYWORDS = ['cola', 'pepsi', 'coke', 'sprite', 'water', 'juice', 'soda', 'drink']
+BEVERAGE_LABEL_KEYWORDS = ['water', 'juice', 'soda', 'drink', 'cola', 'ml', 'oz', 'liter']
+
+OCR_VOCABULARY = {
+    'medicine': MEDICINE_KEYWORDS,
+    'medicine_bottle': MEDICINE_BOTTLE_KEYWORDS,
+    'medicine_label': MEDICINE_LABEL_KEYWORDS,
+    'medicine_package': MEDICINE_PACKAGE_KEYWORDS,
+    'medicine_compact': MEDICINE_COMPACT_KEYWORDS,
+    'food': FOOD_KEYWORDS,
+    'food_consuming': FOOD_CONSUMING_KEYWORDS,
+    'food_package': FOOD_PACKAGE_KEYWORDS,
+    'food_label': FOOD_LABEL_KEYWORDS,
+    'food_compact': FOOD_COMPACT_KEYWORDS,
+    'beverage': BEVERAGE_KEYWORDS,
+    'beverage_package': BEVERAGE_PACKAGE_KEYWORDS,
+    'beverage_brand': BEVERAGE_BRAND_KEYWORDS,
+    'beverage_label': BEVERAGE_LABEL_KEYWORDS,
+}
+
+NO_MATCH: FrozenSet[str] = frozenset()
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex for a set of keywords with shared prefixes factored out.
+
+    ``re`` tries alternatives one after another, so a flat ``a|b|c`` over a
+    few hundred words is slow; nesting them by prefix lets each position
+    fail after a single character.  Optional tails are greedy, so the
+    longest keyword wins.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """All vocabulary tags found in a text, computed in a single regex scan.
+
+    The keywords are compiled into one trie-shaped regex wrapped in a
+    lookahead, so the scan reports the longest keyword starting at every
+    position (overlapping matches included).  Any shorter keyword starting at the same
+    position is a prefix of that one, so its tags are folded into the longer
+    keyword at compile time.  The result is identical to checking
+    ``any(word in text for word in words)`` for every tag.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Iterable[str]]):
+        tags_by_keyword = {}
+        for tag, words in vocabulary.items():
+            for word in words:
+                tags_by_keyword.setdefault(word.lower(), set()).add(tag)
+
+        self.tags_by_keyword = {}
+        for keyword in tags_by_keyword:
+            tags = set()
+            for other, other_tags in tags_by_keyword.items():
+                if keyword.startswith(other):
+                    tags |= other_tags
+            self.tags_by_keyword[keyword] = frozenset(tags)
+
+        self.pattern = re.compile('(?=(' + _trie_pattern(tags_by_keyword) + '))')
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Return every tag with at least one keyword occurring in ``text``"""
+        if not text:
+            return NO_MATCH
+        tags = set()
+        for keyword in set(self.pattern.findall(text)):
+            tags |= self.tags_by_keyword[keyword]
+        return frozenset(tags)
+
+
+OCR_MATCHER = KeywordMatcher(OCR_VOCABULARY)
+
+
+def match_ocr_keywords(ocr_text_lower: str) -> FrozenSet[str]:
+    return OCR_MATCHER.match(ocr_text_lower)
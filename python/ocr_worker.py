@@ -0,0 +1,219 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from ocr_backends import OCRBackend, get_ocr_backend
+
+# One OCR engine per process, created on first use (or by the pool initializer)
+_backend: Optional[OCRBackend] = None
+
+
+def init_backend(name: str = None):
+    global _backend
+    _backend = get_ocr_backend(name)
+
+
+def current_backend() -> OCRBackend:
+    if _backend is None:
+        init_backend()
+    return _backend
+
+
+def prepare_ocr_roi(roi: np.ndarray) -> Optional[np.ndarray]:
+    """Shrink a BGR crop for OCR; None when it is too small to be worth reading"""
+    if roi.size == 0 or roi.shape[0] < 15 or roi.shape[1] < 15:
+        return None  # Skip very small regions faster
+
+    # Skip OCR for very small regions to improve performance
+    if roi.shape[0] * roi.shape[1] < 2000:
+        return None
+
+    # Resize for faster OCR processing
+    if roi.shape[0] > 100 or roi.shape[1] > 100:
+        scale = min(100/roi.shape[0], 100/roi.shape[1])
+        new_width = int(roi.shape[1] * scale)
+        new_height = int(roi.shape[0] * scale)
+        roi = cv2.resize(roi, (new_width, new_height))
+
+    return roi
+
+
+def run_ocr(roi: np.ndarray) -> str:
+    """OCR one prepared crop with this process's engine"""
+    return current_backend().recognize(roi)
+
+
+def run_ocr_batch(rois: List[np.ndarray]) -> List[str]:
+    """OCR several prepared crops in one engine call (runs inside the worker processes)"""
+    return current_backend().recognize_batch(rois)
+
+
+class OCRWorkerPool:
+    """Runs Tesseract in worker processes so the camera loop never waits on it.
+
+    Requests are keyed (by track id); a second request for a key that is
+    still pending is coalesced into the first.  At most ``max_pending``
+    requests are in flight - further ones are rejected and can be retried
+    on a later frame.  ROIs submitted together are tiled into one engine
+    call.  Results are collected without blocking via ``poll()``; ``wait()``
+    blocks until all of them are in (headless replay).
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, backend: str = None):
+        self.max_pending = max_pending
+        # spawn: never fork a process that already runs capture/inference threads
+        self.executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=init_backend, initargs=(backend,))
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, key: Hashable, roi: np.ndarray) -> bool:
+        """Queue OCR for ``roi``; False when the queue is full"""
+        return key in self.submit_many({key: roi})
+
+    def submit_many(self, rois: Dict[Hashable, np.ndarray]) -> set:
+        """Queue several ROIs as one batch; returns the keys that are now pending"""
+        accepted = set()
+        batch_keys, batch_rois = [], []
+        with self._lock:
+            for key, roi in rois.items():
+                if key in self._pending:
+                    self.coalesced += 1
+                    accepted.add(key)
+                elif len(self._pending) + len(batch_keys) >= self.max_pending:
+                    self.rejected += 1
+                else:
+                    batch_keys.append(key)
+                    batch_rois.append(roi)
+            if batch_keys:
+                future = self.executor.submit(run_ocr_batch, batch_rois)
+                for index, key in enumerate(batch_keys):
+                    self._pending[key] = (future, index)
+                self.submitted += len(batch_keys)
+                accepted.update(batch_keys)
+        return accepted
+
+    def is_pending(self, key: Hashable) -> bool:
+        return key in self._pending
+
+    def cancel(self, key: Hashable):
+        """Drop a request; a result that is already being computed is discarded"""
+        with self._lock:
+            self._cancel(key)
+
+    def _cancel(self, key: Hashable):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        future = entry[0]
+        # Only stop the engine call when no other ROI in its batch still wants it
+        if not any(other[0] is future for other in self._pending.values()):
+            future.cancel()
+        self.cancelled += 1
+
+    def cancel_missing(self, live_keys: Union[Iterable[Hashable], Callable[[], Iterable[Hashable]]],
+                       scope: Optional[Callable[[Hashable], bool]] = None):
+        """Cancel requests for ROIs that have left the frame.
+
+        Pass a callable when keys are created on another thread: it is called
+        under the pool lock, so a request submitted for a key created after
+        the caller looked is never taken for a missing one.  ``scope`` limits
+        the requests considered (one stream's, on a shared pool).
+        """
+        with self._lock:
+            live = set(live_keys() if callable(live_keys) else live_keys)
+            for key in [key for key in self._pending if key not in live and (scope is None or scope(key))]:
+                self._cancel(key)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every pending request has finished; False if ``timeout`` ran out first"""
+        with self._lock:
+            futures = {future for future, _ in self._pending.values()}
+        return not wait_futures(futures, timeout=timeout).not_done
+
+    def poll(self, scope: Optional[Callable[[Hashable], bool]] = None) -> Dict[Hashable, str]:
+        """Finished results since the last call, keyed like the requests (only keys in ``scope``, if given)"""
+        results = {}
+        with self._lock:
+            done = [key for key, (future, _) in self._pending.items()
+                    if future.done() and (scope is None or scope(key))]
+            entries = [self._pending.pop(key) for key in done]
+        for key, (future, index) in zip(done, entries):
+            try:
+                results[key] = future.result()[index]
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            'pending': len(self._pending),
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected,
+            'cancelled': self.cancelled,
+            'completed': self.completed,
+            'failed': self.failed,
+        }
+
+
+class OCRPoolView:
+    """One stream's share of an ``OCRWorkerPool`` that several camera streams use.
+
+    Requests are stored under ``(stream, key)``, so track ids of different
+    streams never collide, and ``poll`` / ``cancel_missing`` only touch this
+    stream's requests.  The pool itself is shut down by its owner.
+    """
+
+    def __init__(self, pool: OCRWorkerPool, stream: Hashable):
+        self.pool = pool
+        self.stream = stream
+
+    def owns(self, key: Hashable) -> bool:
+        return isinstance(key, tuple) and len(key) == 2 and key[0] == self.stream
+
+    def submit(self, key: Hashable, roi: np.ndarray) -> bool:
+        return key in self.submit_many({key: roi})
+
+    def submit_many(self, rois: Dict[Hashable, np.ndarray]) -> set:
+        accepted = self.pool.submit_many({(self.stream, key): roi for key, roi in rois.items()})
+        return {key for _, key in accepted}
+
+    def is_pending(self, key: Hashable) -> bool:
+        return self.pool.is_pending((self.stream, key))
+
+    def cancel(self, key: Hashable):
+        self.pool.cancel((self.stream, key))
+
+    def cancel_missing(self, live_keys: Union[Iterable[Hashable], Callable[[], Iterable[Hashable]]]):
+        def live():
+            return [(self.stream, key) for key in (live_keys() if callable(live_keys) else live_keys)]
+        self.pool.cancel_missing(live, scope=self.owns)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.pool.wait(timeout)
+
+    def poll(self) -> Dict[Hashable, str]:
+        return {key: text for (_, key), text in self.pool.poll(scope=self.owns).items()}
+
+    def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        """The shared pool's counters, with ``pending`` for this stream only"""
+        return dict(self.pool.stats(), pending=sum(1 for key in list(self.pool._pending) if self.owns(key)))
@@ -0,0 +1,301 @@
+import glob
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# A captured frame plus the id/timestamp it was grabbed with
+FramePacket = namedtuple('FramePacket', ['frame_id', 'timestamp', 'frame'])
+
+
+class FrameGrabber:
+    """Background capture thread that only ever holds the newest frame.
+
+    Frames that are overwritten before any consumer read them are counted
+    in ``dropped`` instead of piling up in the driver buffer.
+    """
+
+    def __init__(self, cap, name: str = "grabber"):
+        self.cap = cap
+        self.name = name
+        self._cond = threading.Condition()
+        self._packet = None
+        self._last_read_id = 0
+        self._thread = None
+        self.running = False
+        self.failed = False
+        self.grabbed = 0
+        self.dropped = 0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        frame_id = 0
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                with self._cond:
+                    self.failed = True
+                    self.running = False
+                    self._cond.notify_all()
+                break
+
+            frame_id += 1
+            packet = FramePacket(frame_id, time.time(), frame)
+            with self._cond:
+                # Previous frame was never picked up - it is stale now
+                if self._packet is not None and self._packet.frame_id > self._last_read_id:
+                    self.dropped += 1
+                self._packet = packet
+                self.grabbed += 1
+                self._cond.notify_all()
+
+    def read(self, last_id: int = 0, timeout: float = 1.0) -> Optional[FramePacket]:
+        """Return the newest frame newer than ``last_id`` (None on timeout/failure)"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._packet is None or self._packet.frame_id <= last_id:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self.failed:
+                    return None
+                self._cond.wait(remaining)
+            self._last_read_id = self._packet.frame_id
+            return self._packet
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def stats(self) -> dict:
+        return {'grabbed': self.grabbed, 'dropped': self.dropped}
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize: int, name: str = "queue"):
+        self.name = name
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Pop the oldest item, or return None on timeout / close"""
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def get_latest(self):
+        """Drain the queue and return only the newest item (None if empty)"""
+        with self._cond:
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class PipelineStage:
+    """Worker thread that applies ``fn`` to every packet from its input queue.
+
+    The return value of ``fn`` is forwarded to ``output_queue`` when one is
+    given (``None`` results are not forwarded).
+    """
+
+    def __init__(self, name: str, fn: Callable, input_queue: DropOldestQueue,
+                 output_queue: Optional[DropOldestQueue] = None):
+        self.name = name
+        self.fn = fn
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self._thread = None
+        self.running = False
+        self.processed = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.total_frame_age = 0.0
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            packet = self.input_queue.get(timeout=0.1)
+            if packet is None:
+                continue
+
+            start = time.time()
+            try:
+                result = self.fn(packet)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠ Pipeline stage '{self.name}' error: {e}")
+                continue
+            end = time.time()
+
+            self.processed += 1
+            self.total_latency += end - start
+            if isinstance(packet, FramePacket):
+                self.total_frame_age += end - packet.timestamp
+
+            if self.output_queue is not None and result is not None:
+                self.output_queue.put(result)
+
+    def stop(self):
+        self.running = False
+        self.input_queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    def stats(self) -> dict:
+        processed = max(self.processed, 1)
+        return {
+            'processed': self.processed,
+            'dropped': self.input_queue.dropped,
+            'errors': self.errors,
+            'avg_latency_ms': 1000 * self.total_latency / processed,
+            'avg_frame_age_ms': 1000 * self.total_frame_age / processed,
+        }
+
+
+class FPSMeter:
+    """Exponentially smoothed frames-per-second counter"""
+
+    def __init__(self, smoothing: float = 0.9):
+        self.smoothing = smoothing
+        self.fps = 0.0
+        self.frames = 0
+        self._last = None
+
+    def tick(self, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        if self._last is not None and now > self._last:
+            instant = 1.0 / (now - self._last)
+            self.fps = instant if self.frames <= 1 else self.smoothing * self.fps + (1 - self.smoothing) * instant
+        self._last = now
+        self.frames += 1
+        return self.fps
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class StageTimer:
+    """Collects wall-clock durations per named stage"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def summary(self) -> dict:
+        """count / mean / p50 / p90 / p99 / max (milliseconds) for every stage"""
+        report = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            report[stage] = {
+                'count': len(ordered),
+                'mean_ms': 1000 * sum(ordered) / len(ordered),
+                'p50_ms': 1000 * percentile(ordered, 0.50),
+                'p90_ms': 1000 * percentile(ordered, 0.90),
+                'p99_ms': 1000 * percentile(ordered, 0.99),
+                'max_ms': 1000 * ordered[-1],
+            }
+        return report
+
+
+class NullStageTimer:
+    """StageTimer stand-in that measures nothing"""
+
+    def time(self, stage: str):
+        return nullcontext()
+
+
+class FrameDirectorySource:
+    """cv2.VideoCapture look-alike over the image files of a directory (sorted by name)"""
+
+    def __init__(self, directory: str, fps: float = 20.0):
+        self.paths = sorted(path for path in glob.glob(os.path.join(directory, '*'))
+                            if path.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+        self.index = 0
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def read(self):
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        return 0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.paths = []
+
+
+def open_replay_source(path: str, fps: float = None):
+    if os.path.isdir(path):
+        return FrameDirectorySource(path, fps or 20.0)
+    return cv2.VideoCapture(path)
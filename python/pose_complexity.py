@@ -0,0 +1,126 @@
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from metrics import REGISTRY
+from pipeline import percentile
+
+LEVELS = (0, 1, 2)  # MediaPipe Pose model_complexity: lite, full, heavy
+DEFAULT_COST_RATIO = 2.5  # one level up costs roughly this much more until measured
+
+
+class ComplexityController:
+    """Picks the heaviest MediaPipe pose model that fits a per-frame latency budget.
+
+    Warmup walks up from complexity 0, measuring ``findPose`` at each level,
+    and stops at the first level over budget.  After that the p90 of the
+    last ``window`` frames is checked every ``check_every`` frames: over
+    budget steps down, while stepping up needs the projected p90 of the next
+    level to fit in ``upgrade_headroom`` of the budget.  Switches are at
+    least ``min_dwell`` seconds apart, so the level does not flap.
+    ``observe()`` returns the level to switch to, or None.
+    """
+
+    def __init__(self, budget_ms: float = 30.0, start_level: int = 0, warmup_frames: int = 10,
+                 settle_frames: int = 3, window: int = 60, check_every: int = 30, upgrade_headroom: float = 0.7,
+                 min_dwell: float = 10.0, clock: Callable[[], float] = None, name: str = "pose"):
+        self.budget = budget_ms / 1000
+        self.warmup_frames = warmup_frames
+        self.settle_frames = settle_frames
+        self.check_every = check_every
+        self.upgrade_headroom = upgrade_headroom
+        self.min_dwell = min_dwell
+        self.clock = clock or time.monotonic
+        self.name = name
+
+        self.level = start_level
+        self.warming_up = True
+        self.samples = deque(maxlen=window)
+        self.skip = settle_frames  # first frames after a (re)build include graph setup
+        self.since_check = 0
+        self.last_switch = float('-inf')
+        self.p90: Dict[int, float] = {}  # latest measured p90 per level
+        self.cost_ratio: Dict[int, float] = {}  # p90(level + 1) / p90(level), from adjacent measurements
+        self.last_check = None  # (level, p90)
+        self.switches = 0
+
+        REGISTRY.gauge('pose_complexity', lambda: self.level, "MediaPipe pose model_complexity in use", stream=name)
+        REGISTRY.gauge('pose_latency_budget_seconds', lambda: self.budget, "Per-frame pose latency budget", stream=name)
+
+    def observe(self, seconds: float) -> Optional[int]:
+        """Record one ``findPose`` latency; returns a new level when it is time to switch"""
+        if self.skip > 0:
+            self.skip -= 1
+            return None
+        self.samples.append(seconds)
+        self.since_check += 1
+        if self.warming_up:
+            if len(self.samples) >= self.warmup_frames:
+                return self.finish_warmup_level()
+            return None
+        if self.since_check >= self.check_every and len(self.samples) >= self.check_every:
+            return self.check()
+        return None
+
+    def measure(self) -> float:
+        p90 = percentile(sorted(self.samples), 0.9)
+        self.p90[self.level] = p90
+        if self.last_check is not None:
+            level, previous = self.last_check
+            if level == self.level - 1 and previous > 0:
+                self.cost_ratio[level] = p90 / previous
+            elif level == self.level + 1 and p90 > 0:
+                self.cost_ratio[self.level] = previous / p90
+        self.last_check = (self.level, p90)
+        self.since_check = 0
+        return p90
+
+    def finish_warmup_level(self) -> Optional[int]:
+        p90 = self.measure()
+        if p90 <= self.budget and self.level < LEVELS[-1]:
+            return self.switch(self.level + 1, 'warmup', p90)
+        self.warming_up = False
+        fits = [level for level in LEVELS if self.p90.get(level, float('inf')) <= self.budget]
+        best = max(fits) if fits else LEVELS[0]
+        measured = ", ".join(f"{level}: {1000 * value:.1f}ms" for level, value in sorted(self.p90.items()))
+        print(f"🎯 Pose model_complexity {best} (p90 {measured}; budget {1000 * self.budget:.0f}ms)")
+        if best != self.level:
+            return self.switch(best, 'warmup', p90)
+        return None
+
+    def projected(self, level: int, p90: float) -> float:
+        """Expected p90 one level up, from the current p90 and the measured cost ratio"""
+        return p90 * self.cost_ratio.get(level, DEFAULT_COST_RATIO)
+
+    def check(self) -> Optional[int]:
+        p90 = self.measure()
+        if self.clock() - self.last_switch < self.min_dwell:
+            return None
+        if p90 > self.budget and self.level > LEVELS[0]:
+            return self.switch(self.level - 1, 'over_budget', p90)
+        if self.level < LEVELS[-1] and self.projected(self.level, p90) <= self.budget * self.upgrade_headroom:
+            return self.switch(self.level + 1, 'headroom', p90)
+        return None
+
+    def switch(self, level: int, reason: str, p90: float) -> int:
+        previous, self.level = self.level, level
+        self.samples.clear()
+        self.skip = self.settle_frames
+        self.since_check = 0
+        self.last_switch = self.clock()
+        self.switches += 1
+        REGISTRY.counter('pose_complexity_switches_total', "MediaPipe model_complexity changes",
+                         stream=self.name, reason=reason, to=str(level)).inc()
+        if reason != 'warmup':
+            print(f"🎯 Pose model_complexity {previous} -> {level} "
+                  f"({reason}: p90 {1000 * p90:.1f}ms, budget {1000 * self.budget:.0f}ms)")
+        return level
+
+    def stats(self) -> dict:
+        return {
+            'level': self.level,
+            'warming_up': self.warming_up,
+            'switches': self.switches,
+            'budget_ms': 1000 * self.budget,
+            'p90_ms': {level: 1000 * p90 for level, p90 in self.p90.items()},
+        }
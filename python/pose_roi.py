@@ -0,0 +1,82 @@
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# MediaPipe pose landmark ids: mouth corners, wrists and shoulders
+MOUTH_LANDMARKS = (9, 10)
+WRIST_LANDMARKS = (15, 16)
+SHOULDER_LANDMARKS = (11, 12)
+
+Window = Tuple[int, int, int, int]
+
+
+def landmark_points(landmarks: Sequence, ids: Sequence[int]) -> List[Tuple[int, int]]:
+    """``(x, y)`` of the requested ids from a ``findPosition`` list (``[id, x, y]`` rows)"""
+    return [(landmarks[i][1], landmarks[i][2]) for i in ids if i < len(landmarks)]
+
+
+def window_half_size(landmarks: Sequence, frame_shape) -> int:
+    """Half the side of a hand/mouth window: about one shoulder width, so it scales with distance to the camera"""
+    frame_height = frame_shape[0]
+    shoulders = landmark_points(landmarks, SHOULDER_LANDMARKS)
+    if len(shoulders) == 2:
+        (ax, ay), (bx, by) = shoulders
+        half = math.hypot(ax - bx, ay - by)
+    else:
+        half = 0.2 * frame_height
+    return int(min(max(half, 48), frame_height / 3))
+
+
+def merge_windows(windows: List[Window], gap: int = 16) -> List[Window]:
+    """Union windows that overlap (or nearly touch) so no object is split between crops"""
+    windows = list(windows)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(windows)):
+            for j in range(i + 1, len(windows)):
+                a, b = windows[i], windows[j]
+                if a[0] - gap < b[2] and b[0] - gap < a[2] and a[1] - gap < b[3] and b[1] - gap < a[3]:
+                    windows[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del windows[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return windows
+
+
+def pose_rois(landmarks: Sequence, frame_shape, ids: Sequence[int] = MOUTH_LANDMARKS + WRIST_LANDMARKS,
+              max_coverage: float = 0.6) -> List[Window]:
+    """Crop windows around the mouth and wrists, in frame coordinates.
+
+    Returns an empty list (= run on the full frame) when there are no usable
+    landmarks or the windows would cover most of the frame anyway.
+    """
+    if not landmarks:
+        return []
+    frame_height, frame_width = frame_shape[:2]
+    half = window_half_size(landmarks, frame_shape)
+
+    windows = []
+    for x, y in landmark_points(landmarks, ids):
+        if not (0 <= x < frame_width and 0 <= y < frame_height):
+            continue  # hand out of view
+        windows.append((max(0, x - half), max(0, y - half), min(frame_width, x + half), min(frame_height, y + half)))
+    windows = merge_windows(windows)
+
+    covered = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in windows)
+    if not windows or covered > max_coverage * frame_width * frame_height:
+        return []
+    return windows
+
+
+def crop_windows(frame: np.ndarray, windows: List[Window]) -> List[np.ndarray]:
+    return [np.ascontiguousarray(frame[y1:y2, x1:x2]) for x1, y1, x2, y2 in windows]
+
+
+def inference_size(crops: List[np.ndarray], stride: int = 32, min_size: int = 160, max_size: int = 640) -> int:
+    """Smallest stride-aligned YOLO input that holds every crop without downscaling"""
+    longest = max(max(crop.shape[:2]) for crop in crops)
+    return int(min(max(math.ceil(longest / stride) * stride, min_size), max_size))
@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metrics import REGISTRY
+
+# Frames in flight: one being captured, one per worker, plus slack for results not yet applied
+DEFAULT_SLOTS = 6
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block without making this process responsible for unlinking it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: spawned workers share the parent's resource tracker, which
+        # only unlinks the block once, when the parent does
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """``slots`` equally sized frame buffers in one shared-memory block.
+
+    The capture process creates the ring and copies each frame into a free
+    slot; workers attach by name and read slots as NumPy views, so a frame
+    crosses process boundaries without being pickled.
+    """
+
+    def __init__(self, slots: int, shape: Tuple[int, ...], dtype=np.uint8, name: str = None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def spec(self) -> tuple:
+        """What a worker needs to attach: ``SharedFrameRing(*spec)``"""
+        return self.slots, self.shape, self.dtype.str, self.shm.name
+
+    def frame(self, slot: int) -> np.ndarray:
+        return self.frames[slot]
+
+    def close(self):
+        self.frames = None  # views must go before the buffer can be released
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes with the process
+        if self.owner:
+            self.shm.unlink()
+
+
+def detector_worker(spec: tuple, requests, results, backend: str = None, weights: str = None):
+    """Worker process: YOLO on ring slots; sends back only the ``(N, 6)`` box arrays"""
+    from detector_backends import get_detector
+    from pose_roi import crop_windows, inference_size
+
+    ring = SharedFrameRing(*spec)
+    model = get_detector(backend, weights)
+    results.put(('ready', 'detect', os.getpid(), model.names, 0.0))
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        kind, seq, payload, windows = request
+        start = time.perf_counter()
+        if kind == 'call':
+            # Synchronous call from the parent (snapshot); the image travels with it
+            output = model(payload, imgsz=windows, verbose=False)
+            results.put(('call', seq, None, (output, None), time.perf_counter() - start))
+            continue
+        frame = ring.frame(payload)
+        if windows:
+            crops = crop_windows(frame, windows)
+            output = model(crops, imgsz=inference_size(crops), verbose=False)
+        else:
+            output = model(frame, verbose=False)
+        results.put(('detect', seq, payload, (output, windows), time.perf_counter() - start))
+
+
+def pose_worker(spec: tuple, requests, results, complexity=1, budget_ms: float = 30.0, name: str = "pose"):
+    """Worker process: MediaPipe on ring slots; sends back the ``findPosition`` list"""
+    from bodydetect import poseDetector
+
+    ring = SharedFrameRing(*spec)
+    detector = poseDetector(complexity=complexity, budget_ms=budget_ms, name=name)
+    results.put(('ready', 'pose', os.getpid(), None, 0.0))
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        _, seq, slot, _ = request
+        start = time.perf_counter()
+        frame = ring.frame(slot)
+        detector.findPose(frame, draw=False)  # reads the slot in place; nothing is drawn on it
+        landmarks = detector.findPosition(frame, draw=False)
+        results.put(('pose', seq, slot, (landmarks, detector.complexity), time.perf_counter() - start))
+
+
+class WorkerPool:
+    """Detector and pose worker processes fed from a shared frame ring.
+
+    ``write()`` copies a frame into a free slot, ``submit()`` hands the slot
+    to a worker and ``poll()`` returns finished results.  A slot stays
+    pinned until every worker it was given to has answered and the caller
+    has ``release()``d it, so a worker never sees a half-overwritten frame.
+    Each kind of worker has a small in-flight limit; when it is busy the
+    frame is simply not sent (YOLO and pose always work on recent frames).
+    """
+
+    def __init__(self, frame_shape, slots: int = DEFAULT_SLOTS, detector_workers: int = 1, backend: str = None,
+                 weights: str = None, pose_complexity=1, pose_budget_ms: float = 30.0, name: str = "0"):
+        # spawn: never fork a process that already runs capture/inference threads
+        context = multiprocessing.get_context('spawn')
+        self.ring = SharedFrameRing(slots, frame_shape)
+        self.results = context.Queue()
+        self.requests = {'detect': context.Queue(), 'pose': context.Queue()}
+        self.capacity = {'detect': detector_workers, 'pose': 2}
+        self.in_flight = {'detect': 0, 'pose': 0}
+        self.refs = [0] * slots
+        self.next_slot = 0
+        self.names = None
+        self.ready = set()
+        self.backlog = []
+        self.calls = 0
+        self.dropped = 0
+        self.name = name
+
+        self.processes = [context.Process(target=detector_worker, name=f"detector-{i}", daemon=True,
+                                          args=(self.ring.spec, self.requests['detect'], self.results, backend, weights))
+                          for i in range(detector_workers)]
+        self.processes.append(context.Process(target=pose_worker, name="pose", daemon=True,
+                                              args=(self.ring.spec, self.requests['pose'], self.results,
+                                                    pose_complexity, pose_budget_ms, name)))
+        for process in self.processes:
+            process.start()
+
+        REGISTRY.gauge('shm_slots_in_use', lambda: sum(1 for refs in self.refs if refs), "Shared frame slots pinned",
+                       stream=name)
+        REGISTRY.gauge('shm_frames_dropped_total', lambda: self.dropped, "Frames dropped with every slot pinned",
+                       kind="counter", stream=name)
+
+    def write(self, frame: np.ndarray) -> Optional[int]:
+        """Copy ``frame`` into a free slot; None (frame dropped) when all are pinned"""
+        for i in range(self.ring.slots):
+            slot = (self.next_slot + i) % self.ring.slots
+            if self.refs[slot] == 0:
+                self.next_slot = slot + 1
+                if frame.shape != self.ring.shape:
+                    frame = cv2.resize(frame, (self.ring.shape[1], self.ring.shape[0]))
+                np.copyto(self.ring.frame(slot), frame)
+                return slot
+        self.dropped += 1
+        return None
+
+    def is_ready(self, kind: str) -> bool:
+        return kind in self.ready
+
+    def submit(self, kind: str, seq: int, slot: int, windows: Optional[List] = None) -> bool:
+        """Give ``slot`` to a ``kind`` worker; False when it is still busy or not up yet"""
+        if kind not in self.ready or self.in_flight[kind] >= self.capacity[kind]:
+            return False
+        self.refs[slot] += 1
+        self.in_flight[kind] += 1
+        self.requests[kind].put((kind, seq, slot, windows))
+        return True
+
+    def release(self, slot: int):
+        self.refs[slot] -= 1
+
+    def frame(self, slot: int) -> np.ndarray:
+        return self.ring.frame(slot)
+
+    def _handle(self, result) -> Optional[tuple]:
+        kind, seq, slot, payload, latency = result
+        if kind == 'ready':
+            self.ready.add(seq)
+            if seq == 'detect':
+                self.names = payload
+            return result
+        if kind in self.in_flight:
+            self.in_flight[kind] -= 1
+            REGISTRY.histogram('worker_latency_seconds', "Inference time inside a worker process",
+                               stream=self.name, worker=kind).observe(latency)
+        return result
+
+    def poll(self, timeout: float = 0) -> List[tuple]:
+        """Finished results as ``(kind, seq, slot, payload, latency)``; ``slot`` is still pinned"""
+        results, self.backlog = self.backlog, []
+        try:
+            result = self.results.get(timeout=timeout) if timeout else self.results.get_nowait()
+            while True:
+                results.append(self._handle(result))
+                result = self.results.get_nowait()
+        except queue.Empty:
+            pass
+        return results
+
+    def wait_ready(self, kind: str, timeout: float = 60.0) -> bool:
+        """Block until a ``kind`` worker is up; results received meanwhile are kept for ``poll()``"""
+        deadline = time.monotonic() + timeout
+        while kind not in self.ready and time.monotonic() < deadline:
+            try:
+                result = self.results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            self.backlog.append(self._handle(result))
+        return kind in self.ready
+
+    def call_detector(self, source, imgsz=None, timeout: float = 30.0):
+        """Run YOLO on an image outside the ring and wait for it (rare: snapshots)"""
+        self.calls += 1
+        call_id = -self.calls
+        self.requests['detect'].put(('call', call_id, source, imgsz))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                result = self.results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if result[0] == 'call' and result[1] == call_id:
+                return result[3][0]
+            self.backlog.append(self._handle(result))
+        raise TimeoutError("detector worker did not answer")
+
+    def close(self, timeout: float = 5.0):
+        for kind, requests in self.requests.items():
+            for _ in range(self.capacity[kind] if kind == 'detect' else 1):
+                requests.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
+
+
+class RemoteDetector:
+    """Stands in for a detector backend in the capture process; calls go to a worker"""
+
+    def __init__(self, pool: WorkerPool):
+        self.pool = pool
+        self.names = pool.names
+
+    def __call__(self, source, imgsz=None, verbose=False):
+        return self.pool.call_detector(source, imgsz)
@@ -0,0 +1,321 @@
+"""Always-on binary recording of what the pipeline saw: landmarks and detections per frame.
+
+A recording file is a small JSON header followed by fixed-size NumPy
+records (``FRAME_DTYPE``), written a chunk at a time.  Files rotate by size
+and age, and are read back through ``np.memmap`` so a day of frames can be
+streamed without loading it:
+
+    python python/camera_ocr.py --record recordings/
+    python python/recording.py recordings/                  # summary of each file
+    python python/event_engine.py recordings/ --set fall_timeout=3,5
+"""
+import argparse
+import json
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b'TRHREC01'
+HEADER_ALIGN = 64
+EXTENSION = '.rec'
+
+NUM_LANDMARKS = 33  # MediaPipe pose
+MAX_BOXES = 8  # highest-confidence boxes kept per frame; n_boxes holds the real count
+CATEGORIES = ('unknown', 'pills', 'water', 'food')
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+
+# flags
+HAS_POSE = 1  # pose ran this frame (landmarks may still be empty)
+HAS_BODY = 2  # landmarks holds a body
+HAS_DETECTIONS = 4  # boxes hold the detections the event rules saw
+
+FRAME_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('frame', '<u4'),
+    ('flags', 'u1'),
+    ('n_boxes', 'u1'),
+    ('landmarks', '<i2', (NUM_LANDMARKS, 2)),  # pixel x, y as from findPosition
+    ('boxes', '<i2', (MAX_BOXES, 4)),  # x1, y1, x2, y2
+    ('confidence', '<f4', (MAX_BOXES,)),
+    ('class_id', '<i2', (MAX_BOXES,)),  # YOLO class, -1 if unknown
+    ('category', 'u1', (MAX_BOXES,)),  # index into CATEGORIES
+    ('track_id', '<i4', (MAX_BOXES,)),
+])
+
+
+def write_header(f, header: dict) -> int:
+    """Magic, length and JSON header padded so records start on an aligned offset"""
+    payload = json.dumps(header).encode()
+    offset = len(MAGIC) + 4 + len(payload)
+    payload += b' ' * (-offset % HEADER_ALIGN)
+    f.write(MAGIC + struct.pack('<I', len(payload)) + payload)
+    return len(MAGIC) + 4 + len(payload)
+
+
+def read_header(path: str) -> dict:
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a frame recording")
+        length, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length))
+    header['offset'] = len(MAGIC) + 4 + length
+    header['dtype'] = np.dtype([tuple(field[:2]) + (tuple(field[2]),) if len(field) > 2 else tuple(field)
+                                for field in header['dtype']])
+    return header
+
+
+class FrameRecorder:
+    """Appends one record per frame; cheap enough to leave on.
+
+    Records go into a preallocated chunk that is written out when full or
+    ``flush_interval`` seconds after its first frame, so a crash loses at
+    most one chunk.  A new file starts when the current one passes
+    ``max_bytes`` or ``max_seconds``.  Timestamps come from the caller's
+    clock, so replays rotate the same way live runs do.
+    """
+
+    def __init__(self, directory: str, prefix: str = 'frames', chunk_frames: int = 256,
+                 flush_interval: float = 5.0, max_bytes: int = 256 * 1024 * 1024, max_seconds: float = 3600,
+                 class_names=None, stream: str = None):
+        self.directory = directory
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.stream = stream
+        self.class_names = class_names
+        os.makedirs(directory, exist_ok=True)
+
+        self.chunk = np.zeros(chunk_frames, dtype=FRAME_DTYPE)
+        # Per-field views: writing through these is much cheaper than through a record
+        self.columns = {name: self.chunk[name] for name in FRAME_DTYPE.names}
+        self.count = 0
+        self.chunk_start = None
+        self.file = None
+        self.path = None
+        self.file_start = None
+        self.file_bytes = 0
+
+        self.frames = 0
+        self.chunks_written = 0
+        self.files = []
+        self.truncated_frames = 0
+
+    @property
+    def class_names(self):
+        return self._class_names
+
+    @class_names.setter
+    def class_names(self, names):
+        """YOLO ``names`` (dict or list); later files carry them in their header"""
+        if isinstance(names, dict):
+            names = [names[i] for i in sorted(names)]
+        self._class_names = list(names) if names is not None else None
+        self.class_ids = {name: i for i, name in enumerate(self._class_names or [])}
+
+    def append(self, timestamp: float, landmarks: Optional[Sequence] = None,
+               detections: Optional[Sequence[Dict]] = None, frame_index: int = 0):
+        """Record one frame.
+
+        ``landmarks`` is a ``findPosition`` list (None = pose not run);
+        ``detections`` are the dicts ``LiveCameraOCR`` tracks (None = not checked).
+        """
+        if self.count == 0:
+            self.chunk_start = timestamp
+        i = self.count
+        columns = self.columns
+        columns['timestamp'][i] = timestamp
+        columns['frame'][i] = frame_index
+        flags = 0
+        if landmarks is not None:
+            flags |= HAS_POSE
+            if len(landmarks):
+                flags |= HAS_BODY
+                points = np.asarray(landmarks, dtype=np.int16)[:NUM_LANDMARKS, 1:3]
+                columns['landmarks'][i, :len(points)] = points
+        if not flags & HAS_BODY:
+            columns['landmarks'][i] = 0
+        if detections is not None:
+            flags |= HAS_DETECTIONS
+            self.write_boxes(i, detections)
+        else:
+            columns['n_boxes'][i] = 0
+        columns['flags'][i] = flags
+        self.count += 1
+        self.frames += 1
+
+        if self.count == len(self.chunk) or timestamp - self.chunk_start >= self.flush_interval:
+            self.flush()
+
+    def write_boxes(self, i: int, detections: Sequence[Dict]):
+        if len(detections) > MAX_BOXES:
+            detections = sorted(detections, key=lambda d: d['confidence'], reverse=True)[:MAX_BOXES]
+            self.truncated_frames += 1
+        n = len(detections)
+        columns = self.columns
+        columns['n_boxes'][i] = n
+        columns['boxes'][i] = 0
+        columns['confidence'][i] = 0
+        columns['class_id'][i] = -1
+        columns['track_id'][i] = -1
+        columns['category'][i] = 0
+        if n == 0:
+            return
+        columns['boxes'][i, :n] = [detection['bbox'] for detection in detections]
+        columns['confidence'][i, :n] = [detection['confidence'] for detection in detections]
+        columns['class_id'][i, :n] = [self.class_ids.get(detection.get('class'), -1) for detection in detections]
+        columns['category'][i, :n] = [CATEGORY_CODES.get(detection.get('object_type'), 0) for detection in detections]
+        columns['track_id'][i, :n] = [detection.get('track_id', -1) for detection in detections]
+
+    def flush(self):
+        if self.count == 0:
+            return
+        first = float(self.chunk['timestamp'][0])
+        if self.file is None or self.should_rotate(first):
+            self.open_file(first)
+        data = self.chunk[:self.count].tobytes()
+        self.file.write(data)
+        self.file.flush()
+        self.file_bytes += len(data)
+        self.chunks_written += 1
+        self.count = 0
+
+    def should_rotate(self, timestamp: float) -> bool:
+        return self.file_bytes >= self.max_bytes or timestamp - self.file_start >= self.max_seconds
+
+    def open_file(self, timestamp: float):
+        self.close_file()
+        name = f"{self.prefix}-{datetime.fromtimestamp(timestamp):%Y%m%d-%H%M%S}"
+        path = os.path.join(self.directory, name + EXTENSION)
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{name}-{suffix}{EXTENSION}")
+            suffix += 1
+        self.file = open(path, 'wb')
+        self.path = path
+        self.file_start = timestamp
+        self.file_bytes = write_header(self.file, {
+            'version': 1,
+            'dtype': FRAME_DTYPE.descr,
+            'created': timestamp,
+            'stream': self.stream,
+            'categories': list(CATEGORIES),
+            'class_names': self.class_names,
+        })
+        self.files.append(path)
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        self.flush()
+        self.close_file()
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'chunks_written': self.chunks_written,
+            'files': len(self.files),
+            'current_file': self.path,
+            'truncated_frames': self.truncated_frames,
+        }
+
+
+def open_recording(path: str) -> np.memmap:
+    """All complete records of one file as a read-only memmap (a torn last record is ignored)"""
+    header = read_header(path)
+    dtype = header['dtype']
+    frames = (os.path.getsize(path) - header['offset']) // dtype.itemsize
+    if frames == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=header['offset'], shape=(frames,))
+
+
+def recording_files(path: str) -> List[str]:
+    """``path`` itself, or every recording in a directory in time order"""
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in os.listdir(path) if name.endswith(EXTENSION)]
+        return sorted(paths, key=lambda p: (read_header(p)['created'], p))
+    return [path]
+
+
+def iter_chunks(path: str, chunk_frames: int = 4096) -> Iterator[np.ndarray]:
+    """Stream records in slices of at most ``chunk_frames``; only the current slice is paged in"""
+    for file_path in recording_files(path):
+        frames = open_recording(file_path)
+        for start in range(0, len(frames), chunk_frames):
+            yield frames[start:start + chunk_frames]
+
+
+def frame_landmarks(row) -> Optional[list]:
+    """``findPosition``-style landmarks of a record; None if pose did not run"""
+    flags = int(row['flags'])
+    if not flags & HAS_POSE:
+        return None
+    if not flags & HAS_BODY:
+        return []
+    return [[i, x, y] for i, (x, y) in enumerate(row['landmarks'].tolist())]
+
+
+def frame_categories(row) -> Optional[List[str]]:
+    """Object types in view (what the event rules check); None if not recorded"""
+    if not int(row['flags']) & HAS_DETECTIONS:
+        return None
+    return [CATEGORIES[code] for code in row['category'][:row['n_boxes']].tolist()]
+
+
+def engine_inputs(path: str) -> Iterator[dict]:
+    """Records as ``event_engine`` trace entries (``t`` / ``landmarks`` / ``detections``)"""
+    for chunk in iter_chunks(path):
+        for row in chunk:
+            record = {'t': float(row['timestamp'])}
+            landmarks = frame_landmarks(row)
+            if landmarks is not None:
+                record['landmarks'] = landmarks
+            detections = frame_categories(row)
+            if detections is not None:
+                record['detections'] = detections
+            yield record
+
+
+def summarize(path: str) -> dict:
+    header = read_header(path)
+    frames = open_recording(path)
+    flags = frames['flags']
+    span = float(frames['timestamp'][-1] - frames['timestamp'][0]) if len(frames) else 0.0
+    return {
+        'path': path,
+        'stream': header.get('stream'),
+        'frames': len(frames),
+        'seconds': span,
+        'pose_frames': int(np.count_nonzero(flags & HAS_POSE)),
+        'body_frames': int(np.count_nonzero(flags & HAS_BODY)),
+        'boxes': int(frames['n_boxes'].astype(int).sum()),
+        'bytes': os.path.getsize(path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize frame recordings")
+    parser.add_argument('path', help="recording file or directory")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total = 0
+    for file_path in recording_files(args.path):
+        summary = summarize(file_path)
+        total += summary['frames']
+        print(f"📈 {os.path.basename(file_path)}: {summary['frames']} frames, {summary['seconds'] / 60:.1f} min, "
+              f"body in {summary['body_frames']}/{summary['pose_frames']} pose frames, {summary['boxes']} boxes, "
+              f"{summary['bytes'] / 1e6:.1f} MB")
+    print(f"✓ {total} frames read in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Headless replay of a recorded video (or a directory of frames) through LiveCameraOCR.
+
+Frames are processed as fast as possible with no window.  Time is taken from
+the video (frame index / fps), so cooldowns and fall timers behave exactly as
+they would live.  MongoDB, SMS and TTS are replaced by an in-memory event
+timeline that ends up in the report together with throughput and per-stage
+latency percentiles.  OCR results are waited for after every frame, so
+the report does not depend on how fast the OCR workers happen to run.
+
+    python python/replay.py clip.mp4 --report replay.json
+"""
+import argparse
+import json
+import time
+
+import cv2
+
+from camera_ocr import LiveCameraOCR
+from metrics import REGISTRY
+from pipeline import StageTimer, open_replay_source
+
+
+class ReplayClock:
+    """Video time: ``start + frames_read / fps``"""
+
+    def __init__(self, fps: float, start: float = None):
+        self.fps = fps
+        self.start = time.time() if start is None else start
+        self.frame_index = 0
+
+    def __call__(self) -> float:
+        return self.start + self.frame_index / self.fps
+
+
+def run_replay(source: str, report_path: str = None, fps: float = None, max_frames: int = None,
+               patient_id: str = "replay_patient", adaptive: bool = True, skip_static_pose: bool = False,
+               roi_mode: bool = False, detector: str = None, trace_path: str = None,
+               record_dir: str = None, pose_complexity=1, pose_budget_ms: float = 30.0) -> dict:
+    cap = open_replay_source(source, fps)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {source}")
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 20.0
+    clock = ReplayClock(fps)
+    events = []
+
+    system = LiveCameraOCR(patient_id=patient_id, source=source, cap=cap, clock=clock, offline_events=events,
+                           adaptive=adaptive, skip_static_pose=skip_static_pose, roi_mode=roi_mode,
+                           detector=detector, pose_complexity=pose_complexity, pose_budget_ms=pose_budget_ms)
+    system.stage_timer = StageTimer()
+    if trace_path:
+        system.event_trace = open(trace_path, 'w')
+    if record_dir:
+        system.start_recording(record_dir)
+    # Live runs skip YOLO until it is loaded; a replay should see every detection
+    system.startup.wait('detector')
+
+    frames = 0
+    last_status = system.pose_status
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            clock.frame_index = frames
+            system.process_frame(frame)
+            # OCR text lands on the next frame no matter how fast the workers are,
+            # so two replays of a clip give the same classifications and events
+            system.ocr_pool.wait()
+            frames += 1
+            if system.pose_status != last_status:
+                system.record_event('pose', system.pose_status, previous=last_status)
+                last_status = system.pose_status
+    finally:
+        wall_time = time.perf_counter() - start
+        system.cleanup()
+
+    report = {
+        'source': source,
+        'frames': frames,
+        'video_fps': fps,
+        'video_seconds': frames / fps,
+        'wall_seconds': wall_time,
+        'throughput_fps': frames / wall_time if wall_time > 0 else 0.0,
+        'stages': system.stage_timer.summary(),
+        'ocr_workers': system.ocr_pool.stats(),
+        'ocr_cache': system.ocr_cache.stats(),
+        'scheduler': system.scheduler.stats(),
+        'pose': (system.pose_detector.controller.stats() if system.pose_detector.controller is not None
+                 else {'level': system.pose_detector.complexity}),
+        'startup': system.startup.report(),
+        'metrics': REGISTRY.snapshot(),
+        # Video-relative times are easier to line up with the clip than epoch seconds
+        'events': [dict(event, time=round(event['time'] - clock.start, 3)) for event in events],
+    }
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report: dict):
+    print(f"📈 {report['frames']} frames ({report['video_seconds']:.1f}s of video) in "
+          f"{report['wall_seconds']:.1f}s -> {report['throughput_fps']:.1f} FPS")
+    for stage, summary in report['stages'].items():
+        print(f"   {stage:<8} n={summary['count']:<6} p50 {summary['p50_ms']:7.2f}ms  "
+              f"p90 {summary['p90_ms']:7.2f}ms  p99 {summary['p99_ms']:7.2f}ms")
+    print(f"   {len(report['events'])} events")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a video or frame directory without a display")
+    parser.add_argument('source', help="video file or directory of frames")
+    parser.add_argument('--report', default='replay_report.json', help="where to write the JSON report")
+    parser.add_argument('--fps', type=float, default=None, help="override the source frame rate")
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--fixed-schedule', action='store_true', help="YOLO every 5th frame regardless of motion")
+    parser.add_argument('--skip-static-pose', action='store_true')
+    parser.add_argument('--roi', action='store_true', help="YOLO on hand/mouth crops")
+    parser.add_argument('--detector', default=None, help="torch / onnx / int8 / auto")
+    parser.add_argument('--trace', default=None, help="also write the event-engine inputs (see event_engine.py)")
+    parser.add_argument('--record', default=None, metavar='DIR', help="also write a binary frame recording (see recording.py)")
+    parser.add_argument('--pose-complexity', default='1', choices=['0', '1', '2', 'auto'])
+    parser.add_argument('--pose-budget-ms', type=float, default=30.0)
+    args = parser.parse_args()
+
+    report = run_replay(args.source, args.report, fps=args.fps, max_frames=args.max_frames,
+                        adaptive=not args.fixed_schedule, skip_static_pose=args.skip_static_pose,
+                        roi_mode=args.roi, detector=args.detector, trace_path=args.trace,
+                        record_dir=args.record,
+                        pose_complexity=args.pose_complexity if args.pose_complexity == 'auto' else int(args.pose_complexity),
+                        pose_budget_ms=args.pose_budget_ms)
+    print_report(report)
+    print(f"✓ Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
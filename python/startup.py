@@ -0,0 +1,96 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# Taken when this module is first imported - close enough to process start to include import time
+PROCESS_START = time.perf_counter()
+
+
+class StartupTrace:
+    """Brings subsystems up in order or in the background and records when each was ready.
+
+    ``step()`` times a blocking initializer on the calling thread;
+    ``background()`` runs one on a daemon thread and hands the result to a
+    callback.  ``wait(name)`` blocks until a background component is up.
+    Every component prints one line when it is ready, relative to process start.
+    """
+
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+        self.entries: Dict[str, dict] = {}
+        self._ready: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _event(self, name: str) -> threading.Event:
+        with self._lock:
+            return self._ready.setdefault(name, threading.Event())
+
+    def _record(self, name: str, start: float, end: float, mode: str, error: Optional[Exception] = None):
+        entry = {
+            'name': name,
+            'mode': mode,
+            'start_s': start - PROCESS_START,
+            'ready_s': end - PROCESS_START,
+            'took_s': end - start,
+            'error': str(error) if error else None,
+        }
+        with self._lock:
+            self.entries[name] = entry
+        if not self.verbose:
+            return
+        if mode == 'mark':
+            print(f"⏱ {name} at {entry['ready_s']:.2f}s")
+        else:
+            status = f"failed: {error}" if error else f"took {entry['took_s']:.2f}s"
+            print(f"⏱ {name} ready at {entry['ready_s']:.2f}s ({mode}, {status})")
+
+    def mark(self, name: str):
+        """Record an instant (e.g. first frame processed) once"""
+        if name in self.entries:
+            return
+        now = time.perf_counter()
+        self._record(name, now, now, 'mark')
+        self._event(name).set()
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter(), 'blocking')
+            self._event(name).set()
+
+    def background(self, name: str, init: Callable[[], Any], on_ready: Callable[[Any], None] = None):
+        """Run ``init`` on its own thread; ``on_ready`` receives the result"""
+        event = self._event(name)
+
+        def run():
+            start = time.perf_counter()
+            error = None
+            try:
+                result = init()
+                if on_ready is not None:
+                    on_ready(result)
+            except Exception as e:
+                error = e
+            self._record(name, start, time.perf_counter(), 'background', error)
+            event.set()
+
+        threading.Thread(target=run, name=f"init-{name}", daemon=True).start()
+
+    def is_ready(self, name: str) -> bool:
+        return self._event(name).is_set() and not self.failed(name)
+
+    def failed(self, name: str) -> bool:
+        entry = self.entries.get(name)
+        return bool(entry and entry['error'])
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until ``name`` is up; False on timeout or if its initializer failed"""
+        return self._event(name).wait(timeout) and not self.failed(name)
+
+    def report(self) -> list:
+        with self._lock:
+            return sorted(self.entries.values(), key=lambda entry: entry['ready_s'])
@@ -0,0 +1,169 @@
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two (N, 4) / (M, 4) arrays of x1, y1, x2, y2 boxes"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)))
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def _bbox_to_z(bbox) -> np.ndarray:
+    """x1, y1, x2, y2 -> centre x, centre y, area, aspect ratio"""
+    x1, y1, x2, y2 = bbox
+    w, h = max(x2 - x1, 1.0), max(y2 - y1, 1.0)
+    return np.array([x1 + w / 2.0, y1 + h / 2.0, w * h, w / h])
+
+
+def _x_to_bbox(x: np.ndarray) -> Tuple[int, int, int, int]:
+    area = max(x[2], 1.0)
+    ratio = max(x[3], 1e-3)
+    w = np.sqrt(area * ratio)
+    h = area / w
+    return (int(x[0] - w / 2.0), int(x[1] - h / 2.0), int(x[0] + w / 2.0), int(x[1] + h / 2.0))
+
+
+class KalmanBoxTracker:
+    """Constant-velocity Kalman filter over one object's box (as in SORT)"""
+
+    # State: cx, cy, area, ratio, d(cx), d(cy), d(area)
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1.0
+    H = np.eye(4, 7)
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001])
+    R = np.diag([1.0, 1.0, 10.0, 10.0])
+
+    def __init__(self, bbox):
+        self.x = np.zeros(7)
+        self.x[:4] = _bbox_to_z(bbox)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+
+    def predict(self):
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+    def update(self, bbox):
+        y = _bbox_to_z(bbox) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        return _x_to_bbox(self.x)
+
+
+class Track:
+    """One physical object followed across frames, with its cached OCR/classification"""
+
+    def __init__(self, track_id: int, bbox, confidence: float, class_name: str):
+        self.track_id = track_id
+        self.kalman = KalmanBoxTracker(bbox)
+        self.bbox = tuple(int(v) for v in bbox)
+        self.confidence = confidence
+        self.class_name = class_name
+        self.hits = 1
+        self.age = 0
+        self.time_since_update = 0
+        # Filled in once by the classifier, then reused for the lifetime of the track
+        self.ocr_text: Optional[str] = None
+        self.ocr_request: Optional[tuple] = None  # (hash, bbox) of the ROI sent for async OCR
+        self.object_type: Optional[str] = None
+        self.classified_as: Optional[tuple] = None
+
+    def to_detection(self) -> dict:
+        return {
+            'bbox': self.bbox,
+            'confidence': self.confidence,
+            'class': self.class_name,
+            'object_type': self.object_type or 'unknown',
+            'track_id': self.track_id,
+            'ocr_text': self.ocr_text or "",
+        }
+
+
+class ObjectTracker:
+    """IoU-matching multi-object tracker with Kalman prediction between detections.
+
+    ``predict()`` is called once per camera frame and moves every track along
+    its estimated velocity; ``update()`` is called on frames where YOLO ran.
+    Tracks that go unmatched for more than ``max_age`` frames are dropped.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 10):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.tracks: List[Track] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def predict(self):
+        with self._lock:
+            for track in self.tracks:
+                track.kalman.predict()
+                track.bbox = track.kalman.bbox
+                track.age += 1
+                track.time_since_update += 1
+            self.tracks = [track for track in self.tracks if track.time_since_update <= self.max_age]
+
+    def update(self, boxes: List[Tuple[tuple, float, str]]) -> Tuple[List[Track], List[Track]]:
+        """Match ``(bbox, confidence, class_name)`` detections to tracks.
+
+        Returns ``(matched, new)`` tracks; new tracks still need classifying.
+        """
+        with self._lock:
+            track_boxes = np.array([track.bbox for track in self.tracks], dtype=float).reshape(-1, 4)
+            det_boxes = np.array([bbox for bbox, _, _ in boxes], dtype=float).reshape(-1, 4)
+            ious = iou_matrix(track_boxes, det_boxes)
+
+            # Greedy assignment, best overlap first
+            matched, used_tracks, used_dets = [], set(), set()
+            if ious.size:
+                for flat in np.argsort(-ious, axis=None):
+                    t, d = divmod(int(flat), ious.shape[1])
+                    if ious[t, d] < self.iou_threshold:
+                        break
+                    if t in used_tracks or d in used_dets:
+                        continue
+                    used_tracks.add(t)
+                    used_dets.add(d)
+                    bbox, confidence, class_name = boxes[d]
+                    track = self.tracks[t]
+                    track.kalman.update(bbox)
+                    track.bbox = tuple(int(v) for v in bbox)
+                    track.confidence = confidence
+                    track.class_name = class_name
+                    track.hits += 1
+                    track.time_since_update = 0
+                    matched.append(track)
+
+            new = []
+            for d, (bbox, confidence, class_name) in enumerate(boxes):
+                if d in used_dets:
+                    continue
+                track = Track(self._next_id, bbox, confidence, class_name)
+                self._next_id += 1
+                self.tracks.append(track)
+                new.append(track)
+            return matched, new
+
+    def active_tracks(self) -> List[Track]:
+        with self._lock:
+            return list(self.tracks)
+
+    def reset(self):
+        with self._lock:
+            self.tracks = []